@@ -12,20 +12,39 @@ Usage:
     # Or with bytes
     result = await extractor.extract_from_bytes(image_bytes, media_type="image/png")
 
+    # Or print pads as the model writes them
+    result = extractor.extract_streaming_from_bytes_multi([(png_bytes, "image/png")], on_pad=print)
+
+    # Or many independent datasheets concurrently
+    results = await extract_many([(png_bytes, "image/png"), ...], concurrency=8)
+
+    # Or as one Message Batch (half price, completes asynchronously)
+    results = extractor.extract_batch([(png_bytes, "image/png"), ...])
+
 Configuration:
     Set ANTHROPIC_API_KEY environment variable for authentication.
     Optionally set CLAUDE_MODEL to override the default model.
 """
 
-import base64
+import asyncio
+import functools
 import json
 import os
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Generator, Optional
 
 import anthropic
+import fastjsonschema
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from extraction_cache import CacheKey, ExtractionCache
+from image_preprocessing import image_content_block, image_url_block, is_image_url
 from models import (
     Footprint,
     Pad,
@@ -37,8 +56,24 @@ from models import (
     Outline,
     ExtractionResult,
 )
-from prompts import get_extraction_prompt, get_standard_package_prompt
-from prompts_staged import get_stage1_prompt, get_stage2_prompt
+from prompts import (
+    EXTRACTION_TOOL,
+    ExtractionPayload,
+    EXTRACTION_TOOL_CHOICE,
+    get_extraction_prompt_blocks,
+    get_standard_package_prompt,
+    validate_extraction,
+)
+from prompts_staged import (
+    STAGE1_TOOL,
+    STAGE1_TOOL_CHOICE,
+    STAGE2_TOOL,
+    STAGE2_TOOL_CHOICE,
+    get_stage1_prompt_blocks,
+    get_stage2_prompt_blocks,
+    get_stage2_variant,
+    validate_stage1,
+)
 
 
 # =============================================================================
@@ -59,9 +94,55 @@ MODELS = {
 # Maximum tokens for response
 MAX_TOKENS = 4096
 
+# Tiered extraction: Haiku results below this overall confidence (or that
+# fail schema validation) are re-run with Sonnet
+TIER_ESCALATION_CONFIDENCE = 0.6
+
+# model_used for a tiered result that escalated from Haiku to Sonnet (the
+# result itself is Sonnet's; results Haiku kept report the Haiku model)
+TIERED_ESCALATED_MODEL_LABEL = "tiered (haiku+sonnet)"
+
+# model_used reported for two-stage (Haiku table parse + Sonnet geometry) results
+STAGED_MODEL_LABEL = "staged (haiku+sonnet)"
+
+# model_used for tiered Stage 2: Haiku kept, or Haiku escalated to Sonnet.
+# Labels only describe the path; cost_usd prices each call at its own model
+STAGED_HAIKU_MODEL_LABEL = "staged (haiku+haiku)"
+STAGED_ESCALATED_MODEL_LABEL = "staged (haiku+haiku+sonnet)"
+
+# Seconds between status checks while a Message Batch is processing
+BATCH_POLL_INTERVAL = 30.0
+
+# Pricing per 1M tokens (as of 2025)
+MODEL_PRICING = {
+    "haiku": {"input": 0.25, "output": 1.25},
+    "sonnet": {"input": 3.00, "output": 15.00},
+    "opus": {"input": 15.00, "output": 75.00},
+}
+
+# Prompt-cache pricing relative to the base input rate
+CACHE_READ_PRICE_FACTOR = 0.1
+CACHE_WRITE_PRICE_FACTOR = 1.25
+
+# Prefix of the warning added when a response fails schema validation
+SCHEMA_MISMATCH_WARNING = "Response did not match extraction schema"
+STAGE2_MISMATCH_WARNING = f"{SCHEMA_MISMATCH_WARNING} (Stage 2)"
+
 # Supported image types
 SUPPORTED_MEDIA_TYPES = ["image/png", "image/jpeg", "image/gif", "image/webp"]
 
+# JSON parser for model responses; orjson's C parser is several times faster
+# on float-heavy payloads, and its JSONDecodeError subclasses json's
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Schema shape values -> PadShape (unknown shapes fall back to rectangular)
+PAD_SHAPE_MAP = {
+    "rectangular": PadShape.RECTANGULAR,
+    "round": PadShape.ROUND,
+    "oval": PadShape.OVAL,
+    "rounded_rectangle": PadShape.ROUNDED_RECTANGLE,
+}
+
 
 # =============================================================================
 # Data Classes
@@ -78,8 +159,12 @@ class ExtractionResponse:
         raw_response: Raw JSON response from Claude
         error: Error message (if failed)
         model_used: Which Claude model was used
-        input_tokens: Number of input tokens used
+        input_tokens: Number of uncached input tokens used
         output_tokens: Number of output tokens used
+        cache_read_input_tokens: Input tokens served from the prompt cache
+        cache_creation_input_tokens: Input tokens written to the prompt cache
+        cost_usd: Estimated cost of every call that produced this result,
+            each priced at the rates of the model that served it
     """
     success: bool
     footprint: Optional[Footprint] = None
@@ -89,6 +174,9 @@ class ExtractionResponse:
     model_used: Optional[str] = None
     input_tokens: int = 0
     output_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cost_usd: float = 0.0
 
 
 @dataclass
@@ -127,16 +215,32 @@ class FootprintExtractor:
     Attributes:
         model: Claude model to use (default: haiku)
         client: Anthropic API client
+        async_client: AsyncAnthropic client for the *_async methods (lazy)
+        cache: Optional result cache consulted by single-pass extraction
     """
 
-    def __init__(self, model: str = None, api_key: str = None, include_examples: bool = False):
+    def __init__(
+        self,
+        model: str = None,
+        api_key: str = None,
+        include_examples: bool = False,
+        cache: Optional[ExtractionCache] = None,
+        client: Optional[anthropic.Anthropic] = None,
+        async_client: Optional[anthropic.AsyncAnthropic] = None,
+    ):
         """
         Initialize the extractor.
 
         Args:
             model: Model name or alias ('haiku', 'sonnet', 'opus')
-            api_key: Anthropic API key (defaults to ANTHROPIC_API_KEY env var)
+            api_key: Anthropic API key (defaults to the client's key, then
+                ANTHROPIC_API_KEY env var)
             include_examples: Include few-shot examples in prompt (can improve accuracy)
+            cache: Result cache; repeat images skip the API call
+            client: Existing client to share, so its HTTP connection pool is
+                reused across extractors instead of opening a new one
+            async_client: Existing async client to share; without one, an
+                async client is only created on first async extraction
         """
         # Resolve model name
         if model is None:
@@ -148,8 +252,11 @@ class FootprintExtractor:
             self.model = model
 
         self.include_examples = include_examples
+        self.cache = cache
 
         # Initialize client
+        if api_key is None and client is not None:
+            api_key = client.api_key
         if api_key is None:
             api_key = os.environ.get("ANTHROPIC_API_KEY")
 
@@ -159,7 +266,16 @@ class FootprintExtractor:
                 "or pass api_key parameter."
             )
 
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.client = client or anthropic.Anthropic(api_key=api_key)
+        self._api_key = api_key
+        self._async_client = async_client
+
+    @property
+    def async_client(self) -> anthropic.AsyncAnthropic:
+        """Async API client, created on first use (sync-only callers never open its pool)."""
+        if self._async_client is None:
+            self._async_client = anthropic.AsyncAnthropic(api_key=self._api_key)
+        return self._async_client
 
     def extract_from_image(self, image_path: str | Path) -> ExtractionResponse:
         """
@@ -222,7 +338,7 @@ class FootprintExtractor:
 
     def extract_from_bytes_multi(
         self,
-        images: list[tuple[bytes, str]]
+        images: list[tuple[bytes, str] | str]
     ) -> ExtractionResponse:
         """
         Extract footprint from multiple image bytes.
@@ -231,103 +347,207 @@ class FootprintExtractor:
         Images might include dimension drawings, pin diagrams, tables, etc.
 
         Args:
-            images: List of (image_bytes, media_type) tuples
+            images: List of (image_bytes, media_type) tuples or image URLs
 
         Returns:
             ExtractionResponse with extracted footprint or error
         """
-        if not images:
-            return ExtractionResponse(
-                success=False,
-                error="At least one image is required"
-            )
+        return _drive(self._extraction_steps(images), self.client.messages.create)
 
-        # Validate and encode all images
-        content_parts = []
-        for i, (image_bytes, media_type) in enumerate(images):
-            # Validate media type
-            if media_type not in SUPPORTED_MEDIA_TYPES:
-                return ExtractionResponse(
-                    success=False,
-                    error=f"Image {i+1}: Unsupported media type: {media_type}. Supported: {SUPPORTED_MEDIA_TYPES}"
-                )
+    def extract_streaming_from_bytes_multi(
+        self,
+        images: list[tuple[bytes, str] | str],
+        on_pad: Callable[[Pad], None],
+    ) -> ExtractionResponse:
+        """
+        Extract footprint from multiple images, reporting pads as they stream in.
 
-            # Encode image as base64
-            image_base64 = base64.b64encode(image_bytes).decode("utf-8")
+        The emit_footprint input is streamed and each pad is passed to on_pad
+        as soon as the model has finished writing it, so callers can show
+        progress long before the full response is complete. Pads are reported
+        in response order, each exactly once; a cache hit replays its pads.
 
-            content_parts.append({
-                "type": "image",
-                "source": {
-                    "type": "base64",
-                    "media_type": media_type,
-                    "data": image_base64,
-                },
-            })
+        Args:
+            images: List of (image_bytes, media_type) tuples or image URLs
+            on_pad: Called with each converted Pad as it completes
 
-        # Get extraction prompt with multi-image context
-        prompt = get_extraction_prompt(include_examples=self.include_examples)
-        if len(images) > 1:
-            prompt = f"I'm providing {len(images)} images from a component datasheet. Use ALL images to extract the most accurate footprint dimensions. Cross-reference information between images to verify values and resolve ambiguities.\n\n" + prompt
+        Returns:
+            ExtractionResponse with extracted footprint or error
+        """
+        emitted = 0
+
+        def stream(**request):
+            nonlocal emitted
+            with self.client.messages.stream(**request) as events:
+                for event in events:
+                    if event.type != "input_json" or not isinstance(event.snapshot, dict):
+                        continue
+                    # The last pad in the partial snapshot may still be growing
+                    pads = event.snapshot.get("pads") or []
+                    while emitted < len(pads) - 1:
+                        on_pad(_pad_from_data(pads[emitted]))
+                        emitted += 1
+                return events.get_final_message()
+
+        # Cache hits never stream, so all their pads are replayed here
+        result = _drive(self._extraction_steps(images), stream)
+        if result.success:
+            for pad in result.footprint.pads[emitted:]:
+                on_pad(pad)
+        return result
+
+    async def extract_from_bytes_multi_async(
+        self,
+        images: list[tuple[bytes, str] | str]
+    ) -> ExtractionResponse:
+        """
+        Async variant of extract_from_bytes_multi.
+
+        Uses the AsyncAnthropic client so many extractions can be awaited
+        concurrently (see extract_many).
+
+        Args:
+            images: List of (image_bytes, media_type) tuples or image URLs
+
+        Returns:
+            ExtractionResponse with extracted footprint or error
+        """
+        return await _drive_async(self._extraction_steps(images), self.async_client.messages.create)
 
-        # Add text prompt at the end
-        content_parts.append({
-            "type": "text",
-            "text": prompt,
-        })
+    def extract_tiered_from_bytes_multi(
+        self,
+        images: list[tuple[bytes, str] | str],
+        escalate_below: float = TIER_ESCALATION_CONFIDENCE,
+    ) -> ExtractionResponse:
+        """
+        Extract footprint with Haiku first, escalating to Sonnet only if needed.
 
+        The Haiku result is kept when it parses, matches the schema and its
+        overall confidence is at least escalate_below. Otherwise the same
+        request (same cached prompt prefix) is re-sent to Sonnet. Token
+        counts and cost of both calls are reported, each call priced at its
+        own model's rates.
+
+        The result cache is shared with single-pass extraction, keyed per
+        model: a cached Sonnet result is returned as-is, and a cached Haiku
+        result stands in for the Haiku call (escalating if it is too
+        uncertain).
+
+        Args:
+            images: List of (image_bytes, media_type) tuples or image URLs
+            escalate_below: Overall confidence threshold for escalation
+
+        Returns:
+            ExtractionResponse from whichever tier produced the final result;
+            model_used is the Haiku model if it was kept, otherwise
+            TIERED_ESCALATED_MODEL_LABEL
+        """
+        haiku, sonnet = MODELS["haiku"], MODELS["sonnet"]
         try:
-            # Call Claude API
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=MAX_TOKENS,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": content_parts,
-                    }
-                ],
-            )
+            request = self._build_extraction_request(images, model=haiku)
+        except ValueError as e:
+            return ExtractionResponse(success=False, error=str(e))
+
+        sonnet_key = self._cache_key(images, sonnet)
+        cached = self._cached_response(sonnet_key, sonnet)
+        if cached is not None:
+            return cached
+
+        # Usage of the Haiku tier, and whether Sonnet was called, for failures
+        tier1 = ExtractionResponse(success=False)
+        escalated = False
+        try:
+            # Tier 1: Haiku (or its cached result)
+            haiku_key = self._cache_key(images, haiku)
+            cached = self._cached_response(haiku_key, haiku)
+            if cached is None:
+                response = self.client.messages.create(**request)
+                tier1 = self._store_result(haiku_key, self._build_extraction_response(response, haiku))
+            else:
+                tier1 = cached
+            if tier1.success and not self._needs_escalation(tier1, escalate_below):
+                return tier1
+
+            # Tier 2: Sonnet with the identical request
+            escalated = True
+            request["model"] = sonnet
+            response = self.client.messages.create(**request)
+            result = self._store_result(sonnet_key, self._build_extraction_response(response, sonnet))
+            result.model_used = TIERED_ESCALATED_MODEL_LABEL
+            return _add_usage(result, tier1)
 
-            # Extract response text
-            response_text = response.content[0].text
+        except anthropic.APIError as e:
+            error = f"Claude API error: {str(e)}"
+        except Exception as e:
+            error = f"Tiered extraction failed: {str(e)}"
 
-            # Parse JSON from response
-            raw_response = self._parse_json_response(response_text)
+        failure = ExtractionResponse(
+            success=False,
+            error=error,
+            model_used=TIERED_ESCALATED_MODEL_LABEL if escalated else haiku,
+        )
+        return _add_usage(failure, tier1)
 
-            if raw_response is None:
-                return ExtractionResponse(
-                    success=False,
-                    error="Failed to parse JSON from Claude response",
-                    model_used=self.model,
-                    input_tokens=response.usage.input_tokens,
-                    output_tokens=response.usage.output_tokens,
-                )
+    def extract_batch(
+        self,
+        images: list[tuple[bytes, str] | str],
+        poll_interval: float = BATCH_POLL_INTERVAL,
+    ) -> list[ExtractionResponse]:
+        """
+        Extract footprints from many independent images via the Message Batches API.
 
-            # Convert to Footprint model
-            footprint, extraction_result = self._response_to_footprint(raw_response)
+        Each image is submitted as its own single-pass extraction request in
+        one batch, which is billed at half the synchronous price but may take
+        minutes (up to 24 hours) to complete. Blocks until the batch has ended.
 
-            return ExtractionResponse(
-                success=True,
-                footprint=footprint,
-                extraction_result=extraction_result,
-                raw_response=raw_response,
-                model_used=self.model,
-                input_tokens=response.usage.input_tokens,
-                output_tokens=response.usage.output_tokens,
-            )
+        Args:
+            images: List of (image_bytes, media_type) tuples or image URLs, one per footprint
+            poll_interval: Seconds to wait between batch status checks
+
+        Returns:
+            ExtractionResponse per image, in input order
+        """
+        results: list[Optional[ExtractionResponse]] = [None] * len(images)
+        batch_requests = []
+        for i, image in enumerate(images):
+            try:
+                params = self._build_extraction_request([image])
+            except ValueError as e:
+                results[i] = ExtractionResponse(success=False, error=str(e))
+                continue
+            batch_requests.append({"custom_id": f"img-{i}", "params": params})
+
+        if not batch_requests:
+            return results
+
+        try:
+            batch = self.client.messages.batches.create(requests=batch_requests)
+            while batch.processing_status != "ended":
+                time.sleep(poll_interval)
+                batch = self.client.messages.batches.retrieve(batch.id)
+
+            for entry in self.client.messages.batches.results(batch.id):
+                i = int(entry.custom_id.removeprefix("img-"))
+                if entry.result.type == "succeeded":
+                    results[i] = self._build_extraction_response(entry.result.message)
+                else:
+                    results[i] = ExtractionResponse(
+                        success=False,
+                        error=f"Batch request {entry.result.type}",
+                        model_used=self.model,
+                    )
 
         except anthropic.APIError as e:
-            return ExtractionResponse(
-                success=False,
-                error=f"Claude API error: {str(e)}",
-                model_used=self.model,
-            )
+            error = f"Claude API error: {str(e)}"
         except Exception as e:
-            return ExtractionResponse(
-                success=False,
-                error=f"Extraction failed: {str(e)}",
-                model_used=self.model,
-            )
+            error = f"Batch extraction failed: {str(e)}"
+        else:
+            error = "Batch request missing from results"
+
+        return [
+            result or ExtractionResponse(success=False, error=error, model_used=self.model)
+            for result in results
+        ]
 
     def detect_standard_package(
         self,
@@ -347,9 +567,6 @@ class FootprintExtractor:
         Returns:
             StandardPackageResponse with detection results
         """
-        # Encode image
-        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-
         # Get detection prompt
         prompt = get_standard_package_prompt()
 
@@ -361,14 +578,7 @@ class FootprintExtractor:
                     {
                         "role": "user",
                         "content": [
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": media_type,
-                                    "data": image_base64,
-                                },
-                            },
+                            image_content_block(image_bytes, media_type),
                             {
                                 "type": "text",
                                 "text": prompt,
@@ -403,7 +613,8 @@ class FootprintExtractor:
 
     def extract_staged_from_bytes_multi(
         self,
-        images: list[tuple[bytes, str]]
+        images: list[tuple[bytes, str] | str],
+        tiered_stage2: bool = False,
     ) -> ExtractionResponse:
         """
         Extract footprint using 2-stage pipeline for improved accuracy.
@@ -416,8 +627,104 @@ class FootprintExtractor:
         - Preventing pad dimension vs pitch confusion
         - Providing explicit dimension values to Stage 2
 
+        With tiered_stage2, Stage 2 runs on Haiku first and is re-sent to
+        Sonnet only if the result fails to parse, fails Stage 2 schema
+        validation or has overall confidence below
+        TIER_ESCALATION_CONFIDENCE. model_used reports which path ran.
+
+        Args:
+            images: List of (image_bytes, media_type) tuples or image URLs
+            tiered_stage2: Try Haiku for Stage 2 before Sonnet
+
+        Returns:
+            ExtractionResponse with extracted footprint or error
+        """
+        return _drive(self._staged_steps(images, tiered_stage2), self.client.messages.create)
+
+    async def extract_staged_from_bytes_multi_async(
+        self,
+        images: list[tuple[bytes, str] | str],
+        tiered_stage2: bool = False,
+    ) -> ExtractionResponse:
+        """
+        Async variant of extract_staged_from_bytes_multi.
+
+        The two stages of one footprint still run in order (Stage 2 needs
+        the Stage 1 table), but many footprints can be awaited concurrently
+        (see extract_many).
+
+        Args:
+            images: List of (image_bytes, media_type) tuples or image URLs
+            tiered_stage2: Try Haiku for Stage 2 before Sonnet
+
+        Returns:
+            ExtractionResponse with extracted footprint or error
+        """
+        return await _drive_async(
+            self._staged_steps(images, tiered_stage2), self.async_client.messages.create
+        )
+
+    # =========================================================================
+    # Private Methods
+    # =========================================================================
+
+    def _extraction_steps(
+        self, images: list[tuple[bytes, str] | str]
+    ) -> Generator[dict, Any, ExtractionResponse]:
+        """
+        Single-pass extraction as request steps (see _drive).
+
+        Yields the messages.create keyword arguments unless the request is
+        invalid or cached, and stores the result built from the message
+        sent back.
+
+        Args:
+            images: List of (image_bytes, media_type) tuples or image URLs
+
+        Returns:
+            ExtractionResponse with extracted footprint or error
+        """
+        try:
+            request = self._build_extraction_request(images)
+        except ValueError as e:
+            return ExtractionResponse(success=False, error=str(e))
+
+        cache_key = self._cache_key(images)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = yield request
+            return self._store_result(cache_key, self._build_extraction_response(response))
+
+        except anthropic.APIError as e:
+            return ExtractionResponse(
+                success=False,
+                error=f"Claude API error: {str(e)}",
+                model_used=self.model,
+            )
+        except Exception as e:
+            return ExtractionResponse(
+                success=False,
+                error=f"Extraction failed: {str(e)}",
+                model_used=self.model,
+            )
+
+    def _staged_steps(
+        self,
+        images: list[tuple[bytes, str] | str],
+        tiered_stage2: bool,
+    ) -> Generator[dict, Any, ExtractionResponse]:
+        """
+        Staged extraction as request steps (see _drive).
+
+        Yields the Stage 1, Stage 2 and (if tiered and escalated) Sonnet
+        Stage 2 requests in order; each message sent back decides the next.
+
         Args:
-            images: List of (image_bytes, media_type) tuples
+            images: List of (image_bytes, media_type) tuples or image URLs
+            tiered_stage2: Try Haiku for Stage 2 before Sonnet
 
         Returns:
             ExtractionResponse with extracted footprint or error
@@ -428,121 +735,323 @@ class FootprintExtractor:
                 error="At least one image is required"
             )
 
-        # Validate and encode all images
-        content_parts = []
-        for i, (image_bytes, media_type) in enumerate(images):
-            if media_type not in SUPPORTED_MEDIA_TYPES:
-                return ExtractionResponse(
-                    success=False,
-                    error=f"Image {i+1}: Unsupported media type: {media_type}"
-                )
-
-            image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-            content_parts.append({
-                "type": "image",
-                "source": {
-                    "type": "base64",
-                    "media_type": media_type,
-                    "data": image_base64,
-                },
-            })
+        try:
+            content_parts = _image_blocks(images)
+        except ValueError as e:
+            return ExtractionResponse(success=False, error=str(e))
 
-        total_input_tokens = 0
-        total_output_tokens = 0
+        # Usage of every call so far, each priced at its own model's rates
+        spent = ExtractionResponse(success=False)
 
         try:
-            # =================================================================
             # Stage 1: Scene Analysis + Table Parsing (Haiku)
-            # =================================================================
-            stage1_prompt = get_stage1_prompt()
-            stage1_content = content_parts.copy()
-            stage1_content.append({"type": "text", "text": stage1_prompt})
-
-            stage1_response = self.client.messages.create(
-                model=MODELS["haiku"],
-                max_tokens=2048,
-                messages=[{"role": "user", "content": stage1_content}],
-            )
+            stage1_request = self._build_stage1_request(content_parts)
+            stage1_response = yield stage1_request
+            _add_usage(spent, _call_usage(stage1_response, stage1_request["model"]))
 
-            total_input_tokens += stage1_response.usage.input_tokens
-            total_output_tokens += stage1_response.usage.output_tokens
+            stage1_result = self._parse_tool_response(stage1_response, STAGE1_TOOL["name"])
+            if stage1_result is None:
+                return _staged_failure("Stage 1 failed: Could not parse table analysis", spent)
+
+            # Stage 2: Geometry Extraction with Table Context (Sonnet, or Haiku first if tiered)
+            stage2_request = self._build_stage2_request(stage1_result, content_parts)
+            if tiered_stage2:
+                stage2_request["model"] = MODELS["haiku"]
+
+            stage2_response = yield stage2_request
+            _add_usage(spent, _call_usage(stage2_response, stage2_request["model"]))
+
+            result = self._build_staged_response(stage1_result, stage2_response, spent)
+            if not tiered_stage2:
+                return result
+            if result.success and not self._needs_escalation(
+                result, TIER_ESCALATION_CONFIDENCE, STAGE2_MISMATCH_WARNING
+            ):
+                result.model_used = STAGED_HAIKU_MODEL_LABEL
+                return result
+
+            # Escalate Stage 2 to Sonnet with the identical request
+            stage2_request["model"] = MODELS["sonnet"]
+            stage2_response = yield stage2_request
+            _add_usage(spent, _call_usage(stage2_response, stage2_request["model"]))
+
+            result = self._build_staged_response(stage1_result, stage2_response, spent)
+            result.model_used = STAGED_ESCALATED_MODEL_LABEL
+            return result
 
-            stage1_text = stage1_response.content[0].text
-            stage1_result = self._parse_json_response(stage1_text)
+        except anthropic.APIError as e:
+            return _staged_failure(f"Claude API error: {str(e)}", spent)
+        except Exception as e:
+            return _staged_failure(f"Staged extraction failed: {str(e)}", spent)
 
-            if stage1_result is None:
-                return ExtractionResponse(
-                    success=False,
-                    error="Stage 1 failed: Could not parse table analysis",
-                    model_used="staged (haiku+sonnet)",
-                    input_tokens=total_input_tokens,
-                    output_tokens=total_output_tokens,
-                )
+    def _build_extraction_request(self, images: list[tuple[bytes, str] | str], model: str = None) -> dict:
+        """
+        Build the messages.create keyword arguments for single-pass extraction.
 
-            # =================================================================
-            # Stage 2: Geometry Extraction with Table Context (Sonnet)
-            # =================================================================
-            stage2_prompt = get_stage2_prompt(stage1_result)
-            stage2_content = content_parts.copy()
-            stage2_content.append({"type": "text", "text": stage2_prompt})
-
-            stage2_response = self.client.messages.create(
-                model=MODELS["sonnet"],
-                max_tokens=MAX_TOKENS,
-                messages=[{"role": "user", "content": stage2_content}],
-            )
+        Args:
+            images: List of (image_bytes, media_type) tuples or image URLs
+            model: Model override (defaults to the extractor's model)
 
-            total_input_tokens += stage2_response.usage.input_tokens
-            total_output_tokens += stage2_response.usage.output_tokens
+        Returns:
+            Keyword arguments for client.messages.create
 
-            stage2_text = stage2_response.content[0].text
-            raw_response = self._parse_json_response(stage2_text)
+        Raises:
+            ValueError: If no images are given or a media type is unsupported
+        """
+        if not images:
+            raise ValueError("At least one image is required")
 
-            if raw_response is None:
-                return ExtractionResponse(
-                    success=False,
-                    error="Stage 2 failed: Could not parse geometry extraction",
-                    model_used="staged (haiku+sonnet)",
-                    input_tokens=total_input_tokens,
-                    output_tokens=total_output_tokens,
-                )
+        # Static prompt first so it forms a cacheable prefix; images follow
+        content_parts = get_extraction_prompt_blocks(include_examples=self.include_examples)
+        if len(images) > 1:
+            content_parts.append({
+                "type": "text",
+                "text": f"I'm providing {len(images)} images from a component datasheet. Use ALL images to extract the most accurate footprint dimensions. Cross-reference information between images to verify values and resolve ambiguities.",
+            })
 
-            # Add stage1 metadata to raw response for debugging
-            raw_response["_stage1_analysis"] = stage1_result
+        content_parts.extend(_image_blocks(images))
+
+        return {
+            "model": model or self.model,
+            "max_tokens": MAX_TOKENS,
+            "tools": [EXTRACTION_TOOL],
+            "tool_choice": EXTRACTION_TOOL_CHOICE,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": content_parts,
+                }
+            ],
+        }
 
-            # Convert to Footprint model
-            footprint, extraction_result = self._response_to_footprint(raw_response)
+    def _build_extraction_response(self, response, model: str = None) -> ExtractionResponse:
+        """
+        Convert a Claude extraction message into an ExtractionResponse.
 
-            return ExtractionResponse(
-                success=True,
-                footprint=footprint,
-                extraction_result=extraction_result,
-                raw_response=raw_response,
-                model_used="staged (haiku+sonnet)",
-                input_tokens=total_input_tokens,
-                output_tokens=total_output_tokens,
-            )
+        Args:
+            response: Message returned by client.messages.create
+            model: Model that produced the response (defaults to the extractor's model)
 
-        except anthropic.APIError as e:
-            return ExtractionResponse(
+        Returns:
+            ExtractionResponse with extracted footprint or parse error
+        """
+        model = model or self.model
+
+        # Schema-shaped input of the forced emit_footprint call
+        raw_response = self._parse_tool_response(response)
+        usage = _call_usage(response, model)
+
+        if raw_response is None:
+            failure = ExtractionResponse(
                 success=False,
-                error=f"Claude API error: {str(e)}",
-                model_used="staged (haiku+sonnet)",
-                input_tokens=total_input_tokens,
-                output_tokens=total_output_tokens,
+                error="Failed to parse footprint from Claude response",
+                model_used=model,
             )
-        except Exception as e:
-            return ExtractionResponse(
-                success=False,
-                error=f"Staged extraction failed: {str(e)}",
-                model_used="staged (haiku+sonnet)",
-                input_tokens=total_input_tokens,
-                output_tokens=total_output_tokens,
+            return _add_usage(failure, usage)
+
+        # Convert to Footprint model
+        footprint, extraction_result = self._response_to_footprint(raw_response)
+
+        # Conversion is lenient, so schema mismatches are surfaced for review
+        mismatch = _schema_mismatch(validate_extraction, raw_response)
+        if mismatch:
+            extraction_result.warnings.append(f"{SCHEMA_MISMATCH_WARNING}: {mismatch}")
+
+        result = ExtractionResponse(
+            success=True,
+            footprint=footprint,
+            extraction_result=extraction_result,
+            raw_response=raw_response,
+            model_used=model,
+        )
+        return _add_usage(result, usage)
+
+    def _cache_key(self, images: list[tuple[bytes, str] | str], model: str = None) -> Optional[CacheKey]:
+        """Get the result-cache key for a single-pass request on a model (None if uncached)."""
+        if self.cache is None:
+            return None
+        return self.cache.key(images, model or self.model, self.include_examples)
+
+    def _cached_response(self, cache_key: Optional[CacheKey], model: str = None) -> Optional[ExtractionResponse]:
+        """
+        Rebuild an ExtractionResponse from the result cache.
+
+        Args:
+            cache_key: Key from _cache_key
+            model: Model the key was built for (defaults to the extractor's model)
+
+        Returns:
+            Response with zero token usage on a hit, None on a miss
+        """
+        if cache_key is None:
+            return None
+
+        raw_response = self.cache.get(cache_key)
+        if raw_response is None:
+            return None
+
+        footprint, extraction_result = self._response_to_footprint(raw_response)
+        return ExtractionResponse(
+            success=True,
+            footprint=footprint,
+            extraction_result=extraction_result,
+            raw_response=raw_response,
+            model_used=model or self.model,
+        )
+
+    def _store_result(self, cache_key: Optional[CacheKey], result: ExtractionResponse) -> ExtractionResponse:
+        """
+        Store a successful, schema-valid result in the result cache.
+
+        Args:
+            cache_key: Key from _cache_key
+            result: Freshly extracted response
+
+        Returns:
+            The same result, for chaining
+        """
+        if cache_key is not None and result.success and not any(
+            w.startswith(SCHEMA_MISMATCH_WARNING) for w in result.extraction_result.warnings
+        ):
+            self.cache.put(cache_key, result.raw_response)
+        return result
+
+    @staticmethod
+    def _build_stage1_request(content_parts: list[dict]) -> dict:
+        """
+        Build the messages.create keyword arguments for Stage 1.
+
+        Args:
+            content_parts: Image content blocks
+
+        Returns:
+            Keyword arguments for client.messages.create
+        """
+        # Static prompt first, then the images
+        return {
+            "model": MODELS["haiku"],
+            "max_tokens": 2048,
+            "tools": [STAGE1_TOOL],
+            "tool_choice": STAGE1_TOOL_CHOICE,
+            "messages": [{"role": "user", "content": get_stage1_prompt_blocks() + content_parts}],
+        }
+
+    @staticmethod
+    def _build_stage2_request(stage1_result: dict, content_parts: list[dict]) -> dict:
+        """
+        Build the messages.create keyword arguments for Stage 2.
+
+        Args:
+            stage1_result: Parsed Stage 1 analysis
+            content_parts: Image content blocks
+
+        Returns:
+            Keyword arguments for client.messages.create
+        """
+        return {
+            "model": MODELS["sonnet"],
+            "max_tokens": MAX_TOKENS,
+            "tools": [get_stage2_variant(stage1_result).tool],
+            "tool_choice": STAGE2_TOOL_CHOICE,
+            "messages": [
+                {"role": "user", "content": get_stage2_prompt_blocks(stage1_result) + content_parts}
+            ],
+        }
+
+    def _build_staged_response(
+        self,
+        stage1_result: dict,
+        stage2_response,
+        spent: ExtractionResponse,
+    ) -> ExtractionResponse:
+        """
+        Convert the Stage 2 message into an ExtractionResponse.
+
+        Args:
+            stage1_result: Parsed Stage 1 analysis
+            stage2_response: Message returned for the Stage 2 request
+            spent: Usage and cost of every call made for this result
+
+        Returns:
+            ExtractionResponse with extracted footprint or parse error
+        """
+        raw_response = self._parse_tool_response(stage2_response, STAGE2_TOOL["name"])
+        if raw_response is None:
+            return _staged_failure("Stage 2 failed: Could not parse geometry extraction", spent)
+
+        # Validate both stages before stage1 metadata is attached
+        mismatches = [
+            (stage, _schema_mismatch(validator, payload))
+            for stage, validator, payload in (
+                ("Stage 1", validate_stage1, stage1_result),
+                ("Stage 2", get_stage2_variant(stage1_result).validate, raw_response),
             )
+        ]
+
+        # Add stage1 metadata to raw response for debugging
+        raw_response["_stage1_analysis"] = stage1_result
+
+        # Convert to Footprint model
+        footprint, extraction_result = self._response_to_footprint(raw_response)
+        for stage, mismatch in mismatches:
+            if mismatch:
+                extraction_result.warnings.append(f"{SCHEMA_MISMATCH_WARNING} ({stage}): {mismatch}")
+
+        result = ExtractionResponse(
+            success=True,
+            footprint=footprint,
+            extraction_result=extraction_result,
+            raw_response=raw_response,
+            model_used=STAGED_MODEL_LABEL,
+        )
+        return _add_usage(result, spent)
+
+    @staticmethod
+    def _needs_escalation(
+        result: ExtractionResponse,
+        escalate_below: float,
+        mismatch_prefix: str = SCHEMA_MISMATCH_WARNING,
+    ) -> bool:
+        """
+        Check whether a tier-1 result is too uncertain to keep.
 
-    # =========================================================================
-    # Private Methods
-    # =========================================================================
+        Args:
+            result: Successful extraction response
+            escalate_below: Overall confidence threshold
+            mismatch_prefix: Warning prefix that marks the schema failures
+                that count (staged results only escalate on Stage 2 ones)
+
+        Returns:
+            True if confidence is low or the payload failed schema validation
+        """
+        extraction_result = result.extraction_result
+        if extraction_result.overall_confidence < escalate_below:
+            return True
+        return any(w.startswith(mismatch_prefix) for w in extraction_result.warnings)
+
+    def _parse_tool_response(self, response, tool_name: str = EXTRACTION_TOOL["name"]) -> Optional[dict]:
+        """
+        Get the forced tool call's input from a Claude response.
+
+        Falls back to parsing JSON from a text block in case the model
+        answered in plain text instead of calling the tool.
+
+        Args:
+            response: Message returned by client.messages.create
+            tool_name: Name of the tool the request forced (emit_footprint by default)
+
+        Returns:
+            Tool input dict or None if no usable payload was found
+        """
+        for block in response.content:
+            if block.type == "tool_use" and block.name == tool_name:
+                return dict(block.input)
+
+        for block in response.content:
+            if block.type == "text":
+                return self._parse_json_response(block.text)
+
+        return None
 
     def _parse_json_response(self, response_text: str) -> Optional[dict]:
         """
@@ -560,7 +1069,7 @@ class FootprintExtractor:
 
         # Try direct parse first
         try:
-            return json.loads(text)
+            return _json_loads(text)
         except json.JSONDecodeError:
             pass
 
@@ -570,7 +1079,7 @@ class FootprintExtractor:
             end = text.find("```", start)
             if end > start:
                 try:
-                    return json.loads(text[start:end].strip())
+                    return _json_loads(text[start:end].strip())
                 except json.JSONDecodeError:
                     pass
 
@@ -584,7 +1093,7 @@ class FootprintExtractor:
             end = text.find("```", start)
             if end > start:
                 try:
-                    return json.loads(text[start:end].strip())
+                    return _json_loads(text[start:end].strip())
                 except json.JSONDecodeError:
                     pass
 
@@ -592,7 +1101,7 @@ class FootprintExtractor:
 
     def _response_to_footprint(
         self,
-        response: dict
+        response: ExtractionPayload
     ) -> tuple[Footprint, ExtractionResult]:
         """
         Convert Claude's JSON response to Footprint and ExtractionResult models.
@@ -604,47 +1113,7 @@ class FootprintExtractor:
             Tuple of (Footprint, ExtractionResult)
         """
         # Extract pads
-        pads = []
-        for pad_data in response.get("pads", []):
-            # Determine pad shape
-            shape_str = pad_data.get("shape", "rectangular").lower()
-            shape_map = {
-                "rectangular": PadShape.RECTANGULAR,
-                "round": PadShape.ROUND,
-                "oval": PadShape.OVAL,
-                "rounded_rectangle": PadShape.ROUNDED_RECTANGLE,
-            }
-            shape = shape_map.get(shape_str, PadShape.RECTANGULAR)
-
-            # Determine pad type
-            pad_type_str = pad_data.get("pad_type", "smd").lower()
-            pad_type = PadType.THROUGH_HOLE if pad_type_str == "th" else PadType.SMD
-
-            # Create drill if through-hole
-            drill = None
-            if pad_type == PadType.THROUGH_HOLE:
-                drill_diameter = pad_data.get("drill_diameter")
-                slot_length = pad_data.get("drill_slot_length")
-
-                if drill_diameter:
-                    drill = Drill(
-                        diameter=drill_diameter,
-                        drill_type=DrillType.SLOT if slot_length else DrillType.ROUND,
-                        slot_length=slot_length,
-                    )
-
-            pad = Pad(
-                designator=str(pad_data.get("designator", "")),
-                x=float(pad_data.get("x", 0)),
-                y=float(pad_data.get("y", 0)),
-                width=float(pad_data.get("width", 0)),
-                height=float(pad_data.get("height", 0)),
-                shape=shape,
-                pad_type=pad_type,
-                rotation=float(pad_data.get("rotation", 0)),
-                drill=drill,
-            )
-            pads.append(pad)
+        pads = [_pad_from_data(pad_data) for pad_data in response.get("pads", [])]
 
         # Extract outline
         outline_data = response.get("outline", {})
@@ -702,6 +1171,231 @@ class FootprintExtractor:
         return footprint, extraction_result
 
 
+# =============================================================================
+# Helper Functions
+# =============================================================================
+
+def _drive(
+    steps: Generator[dict, Any, ExtractionResponse],
+    create: Callable[..., Any],
+) -> ExtractionResponse:
+    """
+    Run request steps to completion with a blocking create call.
+
+    Each yielded request is passed to create and the message is sent back;
+    an exception from create is thrown into the steps, which turn it into
+    a failed response. The sync, streaming and async entry points share
+    the steps and differ only in the driver and create call.
+
+    Args:
+        steps: Generator from _extraction_steps or _staged_steps
+        create: Called with each request's keyword arguments
+
+    Returns:
+        The steps' ExtractionResponse
+    """
+    try:
+        request = next(steps)
+        while True:
+            try:
+                response = create(**request)
+            except Exception as e:
+                request = steps.throw(e)
+            else:
+                request = steps.send(response)
+    except StopIteration as done:
+        return done.value
+
+
+async def _drive_async(
+    steps: Generator[dict, Any, ExtractionResponse],
+    create: Callable[..., Any],
+) -> ExtractionResponse:
+    """
+    Async variant of _drive; create returns an awaitable message.
+
+    Args:
+        steps: Generator from _extraction_steps or _staged_steps
+        create: Called with each request's keyword arguments
+
+    Returns:
+        The steps' ExtractionResponse
+    """
+    try:
+        request = next(steps)
+        while True:
+            try:
+                response = await create(**request)
+            except Exception as e:
+                request = steps.throw(e)
+            else:
+                request = steps.send(response)
+    except StopIteration as done:
+        return done.value
+
+
+def _image_blocks(images: list[tuple[bytes, str] | str]) -> list[dict]:
+    """
+    Validate images and build their message content blocks.
+
+    Hosted images given as http(s) URL strings are referenced by URL;
+    (bytes, media_type) tuples are downscaled if oversized and sent as base64.
+
+    Args:
+        images: List of (image_bytes, media_type) tuples or image URLs
+
+    Returns:
+        Image content blocks, in input order
+
+    Raises:
+        ValueError: If a media type is unsupported, a string is not a URL or
+            an image is too large to decode
+    """
+    blocks = []
+    for i, image in enumerate(images):
+        if is_image_url(image):
+            blocks.append(image_url_block(image))
+            continue
+        if isinstance(image, str):
+            raise ValueError(f"Image {i+1}: Unsupported image URL: {image}")
+
+        image_bytes, media_type = image
+        if media_type not in SUPPORTED_MEDIA_TYPES:
+            raise ValueError(
+                f"Image {i+1}: Unsupported media type: {media_type}. Supported: {SUPPORTED_MEDIA_TYPES}"
+            )
+        blocks.append(image_content_block(image_bytes, media_type))
+    return blocks
+
+
+def _pad_from_data(pad_data: dict) -> Pad:
+    """
+    Convert one pad object of an extraction response to a Pad.
+
+    Args:
+        pad_data: Pad object from the emit_footprint input
+
+    Returns:
+        Pad with missing fields defaulted
+    """
+    # Determine pad shape
+    shape_str = pad_data.get("shape", "rectangular").lower()
+    shape = PAD_SHAPE_MAP.get(shape_str, PadShape.RECTANGULAR)
+
+    # Determine pad type
+    pad_type_str = pad_data.get("pad_type", "smd").lower()
+    pad_type = PadType.THROUGH_HOLE if pad_type_str == "th" else PadType.SMD
+
+    # Create drill if through-hole
+    drill = None
+    if pad_type == PadType.THROUGH_HOLE:
+        drill_diameter = pad_data.get("drill_diameter")
+        slot_length = pad_data.get("drill_slot_length")
+
+        if drill_diameter:
+            drill = Drill(
+                diameter=drill_diameter,
+                drill_type=DrillType.SLOT if slot_length else DrillType.ROUND,
+                slot_length=slot_length,
+            )
+
+    return Pad(
+        designator=str(pad_data.get("designator", "")),
+        x=float(pad_data.get("x", 0)),
+        y=float(pad_data.get("y", 0)),
+        width=float(pad_data.get("width", 0)),
+        height=float(pad_data.get("height", 0)),
+        shape=shape,
+        pad_type=pad_type,
+        rotation=float(pad_data.get("rotation", 0)),
+        drill=drill,
+    )
+
+
+def _cache_usage(usage) -> tuple[int, int]:
+    """
+    Read prompt-cache token counts from a response's usage block.
+
+    Args:
+        usage: Usage block of a Claude message
+
+    Returns:
+        Tuple of (cache_read_input_tokens, cache_creation_input_tokens);
+        counts the API omits or reports as null are 0
+    """
+    counts = (
+        getattr(usage, "cache_read_input_tokens", None),
+        getattr(usage, "cache_creation_input_tokens", None),
+    )
+    return tuple(count if isinstance(count, int) else 0 for count in counts)
+
+
+def _add_usage(result: ExtractionResponse, earlier: ExtractionResponse) -> ExtractionResponse:
+    """
+    Add an earlier call's token usage and cost to a result.
+
+    Args:
+        result: Response being returned
+        earlier: Response of a call that ran before it (e.g. a lower tier)
+
+    Returns:
+        The same result, for chaining
+    """
+    result.input_tokens += earlier.input_tokens
+    result.output_tokens += earlier.output_tokens
+    result.cache_read_input_tokens += earlier.cache_read_input_tokens
+    result.cache_creation_input_tokens += earlier.cache_creation_input_tokens
+    result.cost_usd += earlier.cost_usd
+    return result
+
+
+def _call_usage(response, model: str) -> ExtractionResponse:
+    """
+    Record one call's token usage and cost as an otherwise empty response.
+
+    Args:
+        response: Message returned by messages.create
+        model: Model that served the call
+
+    Returns:
+        Failed ExtractionResponse carrying only usage, for _add_usage
+    """
+    usage = response.usage
+    cache_read, cache_creation = _cache_usage(usage)
+    return ExtractionResponse(
+        success=False,
+        input_tokens=usage.input_tokens,
+        output_tokens=usage.output_tokens,
+        cache_read_input_tokens=cache_read,
+        cache_creation_input_tokens=cache_creation,
+        cost_usd=estimate_cost(usage.input_tokens, usage.output_tokens, model, cache_read, cache_creation),
+    )
+
+
+def _staged_failure(error: str, spent: ExtractionResponse) -> ExtractionResponse:
+    """Build a failed staged-pipeline response that still reports usage and cost."""
+    failure = ExtractionResponse(success=False, error=error, model_used=STAGED_MODEL_LABEL)
+    return _add_usage(failure, spent)
+
+
+def _schema_mismatch(validator, payload: dict) -> Optional[str]:
+    """
+    Run a compiled schema validator without raising.
+
+    Args:
+        validator: Validator from fastjsonschema.compile
+        payload: Parsed model response
+
+    Returns:
+        Validation error message, or None if the payload matches
+    """
+    try:
+        validator(payload)
+    except fastjsonschema.JsonSchemaException as e:
+        return e.message
+    return None
+
+
 # =============================================================================
 # Convenience Functions
 # =============================================================================
@@ -726,35 +1420,90 @@ def extract_footprint(
     return extractor.extract_from_image(image_path)
 
 
-def estimate_cost(input_tokens: int, output_tokens: int, model: str = "haiku") -> float:
+async def extract_many(
+    images: list[tuple[bytes, str] | str],
+    model: str = None,
+    *,
+    concurrency: int = 8,
+    include_examples: bool = False,
+    staged: bool = False,
+    api_key: str = None,
+) -> list[ExtractionResponse]:
+    """
+    Extract footprints from many independent images concurrently.
+
+    Each image is treated as a separate datasheet. Calls are fanned out with
+    asyncio.gather and bounded by a semaphore, so wall time is roughly
+    ceil(N / concurrency) API round trips instead of N.
+
+    Args:
+        images: List of (image_bytes, media_type) tuples or image URLs, one per footprint
+        model: Model to use ('haiku', 'sonnet', 'opus')
+        concurrency: Maximum number of requests in flight at once
+        include_examples: Include few-shot examples in the prompt
+        staged: Use the two-stage pipeline; each image's Stage 1 and Stage 2
+            calls run in order inside one concurrency slot
+        api_key: Anthropic API key (defaults to ANTHROPIC_API_KEY env var)
+
+    Returns:
+        ExtractionResponse per image, in input order
+    """
+    extractor = FootprintExtractor(model=model, api_key=api_key, include_examples=include_examples)
+    extract = (
+        extractor.extract_staged_from_bytes_multi_async if staged
+        else extractor.extract_from_bytes_multi_async
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def extract_one(image: tuple[bytes, str] | str) -> ExtractionResponse:
+        async with semaphore:
+            return await extract([image])
+
+    return list(await asyncio.gather(*(extract_one(image) for image in images)))
+
+
+# Bounded: model names can come from request parameters
+@functools.lru_cache(maxsize=32)
+def _model_rates(model: str) -> dict:
+    """Look up the MODEL_PRICING rates for a model name (haiku if unknown)."""
+    model_key = model.lower()
+    for key in MODEL_PRICING:
+        if key in model_key:
+            return MODEL_PRICING[key]
+    return MODEL_PRICING["haiku"]
+
+
+def estimate_cost(
+    input_tokens: int,
+    output_tokens: int,
+    model: str = "haiku",
+    cache_read_input_tokens: int = 0,
+    cache_creation_input_tokens: int = 0,
+) -> float:
     """
     Estimate the cost of an extraction based on token usage.
 
+    Only the model-name lookup is cached (there are a handful of models);
+    token counts are almost always unique, so the arithmetic runs each call.
+
     Args:
-        input_tokens: Number of input tokens
+        input_tokens: Number of uncached input tokens
         output_tokens: Number of output tokens
         model: Model used
+        cache_read_input_tokens: Input tokens read from the prompt cache
+            (billed at CACHE_READ_PRICE_FACTOR of the input rate)
+        cache_creation_input_tokens: Input tokens written to the prompt cache
+            (billed at CACHE_WRITE_PRICE_FACTOR of the input rate)
 
     Returns:
         Estimated cost in USD
     """
-    # Pricing per 1M tokens (as of 2025)
-    pricing = {
-        "haiku": {"input": 0.25, "output": 1.25},
-        "sonnet": {"input": 3.00, "output": 15.00},
-        "opus": {"input": 15.00, "output": 75.00},
-    }
-
-    # Normalize model name
-    model_key = model.lower()
-    for key in pricing:
-        if key in model_key:
-            model_key = key
-            break
-    else:
-        model_key = "haiku"  # Default
-
-    rates = pricing[model_key]
-    cost = (input_tokens * rates["input"] + output_tokens * rates["output"]) / 1_000_000
+    rates = _model_rates(model)
+    billed_input = (
+        input_tokens
+        + cache_read_input_tokens * CACHE_READ_PRICE_FACTOR
+        + cache_creation_input_tokens * CACHE_WRITE_PRICE_FACTOR
+    )
+    cost = (billed_input * rates["input"] + output_tokens * rates["output"]) / 1_000_000
 
     return cost
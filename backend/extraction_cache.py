@@ -0,0 +1,221 @@
+"""
+Persistent cache of extraction results keyed by image content.
+
+The same datasheet image is often extracted more than once (reruns,
+re-uploads). By default images are keyed by an exact content digest, so a
+hit only ever replays the result for byte-identical images and skips the
+Claude call entirely.
+
+Near-duplicate matching (re-encoded or resized copies, found by perceptual
+hash and Hamming distance) is an explicit opt-in. Land-pattern drawings
+that share a layout but differ only in their dimension numbers hash within
+the match distance, so a near-duplicate hit can return another part's
+footprint; only enable it where the image set is known not to contain such
+look-alikes.
+
+Entries are also keyed by prompt version, few-shot flag and model, so
+prompt or model changes never reuse stale results.
+
+imagehash and Pillow are optional and only used for near-duplicate
+matching; without them that mode falls back to exact content digests.
+
+Usage:
+    cache = ExtractionCache("extractions.sqlite3")
+    extractor = FootprintExtractor(cache=cache)
+
+    # Opt in to near-duplicate matching
+    cache = ExtractionCache("extractions.sqlite3", near_duplicates=True)
+"""
+
+import hashlib
+import io
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+try:
+    import imagehash
+    from PIL import Image
+except ImportError:
+    imagehash = None
+
+from image_preprocessing import is_image_url
+from prompts import PROMPT_VERSION
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# pHash size; 16 gives a 256-bit hash per image
+PHASH_SIZE = 16
+
+# Maximum differing pHash bits per image for a near-duplicate hit. Kept low:
+# re-encodes and resizes of one drawing differ by a few bits, while a miss
+# only costs an API call but a false hit returns the wrong footprint.
+MAX_PHASH_DISTANCE = 8
+
+
+# =============================================================================
+# Fingerprinting
+# =============================================================================
+
+def content_digest(image_bytes: bytes) -> bytes:
+    """Fingerprint an image by exact content: b"b" + a 128-bit BLAKE2b digest."""
+    return b"b" + hashlib.blake2b(image_bytes, digest_size=16).digest()
+
+
+def image_fingerprint(image_bytes: bytes) -> bytes:
+    """
+    Fingerprint an image for near-duplicate cache lookups.
+
+    Args:
+        image_bytes: Raw image bytes
+
+    Returns:
+        b"p" + perceptual hash when imagehash can decode the image, otherwise
+        the exact content_digest. The two kinds never collide.
+    """
+    if imagehash is not None:
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as im:
+                return b"p" + bytes.fromhex(str(imagehash.phash(im, hash_size=PHASH_SIZE)))
+        except OSError:
+            pass
+    return content_digest(image_bytes)
+
+
+def _hamming(a: bytes, b: bytes) -> int:
+    """Count differing bits between two equal-length fingerprints."""
+    return (int.from_bytes(a, "big") ^ int.from_bytes(b, "big")).bit_count()
+
+
+# =============================================================================
+# Cache
+# =============================================================================
+
+class CacheKey(NamedTuple):
+    """
+    Lookup key for one extraction request.
+
+    Attributes:
+        fingerprint: Concatenated image fingerprints, in request order
+        variant: Prompt version, few-shot flag and model
+        perceptual: Whether every image has a perceptual hash, so
+            near-duplicates may be matched by distance
+        image_count: Number of images in the request
+    """
+    fingerprint: bytes
+    variant: str
+    perceptual: bool
+    image_count: int
+
+
+class ExtractionCache:
+    """
+    SQLite-backed store of raw extraction responses.
+
+    Only the schema-shaped raw response is stored; callers rebuild the
+    Footprint from it. The connection is shared across threads behind a
+    lock, so one cache can serve the API's worker threads.
+
+    Attributes:
+        path: Database file path (":memory:" for a process-local cache)
+        near_duplicates: Whether images are keyed by perceptual hash and
+            near-duplicates within MAX_PHASH_DISTANCE are served (opt-in;
+            exact content digests otherwise)
+    """
+
+    def __init__(self, path: str | Path = ":memory:", near_duplicates: bool = False):
+        self.path = str(path)
+        self.near_duplicates = near_duplicates
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " fingerprint BLOB NOT NULL,"
+                " variant TEXT NOT NULL,"
+                " perceptual INTEGER NOT NULL,"
+                " raw_response TEXT NOT NULL,"
+                " PRIMARY KEY (fingerprint, variant))"
+            )
+
+    def key(
+        self,
+        images: list[tuple[bytes, str] | str],
+        model: str,
+        include_examples: bool = False,
+    ) -> Optional[CacheKey]:
+        """
+        Build the cache key for an extraction request.
+
+        Args:
+            images: List of (image_bytes, media_type) tuples or image URLs
+            model: Model the extraction runs on
+            include_examples: Whether the few-shot prompt variant is used
+
+        Returns:
+            CacheKey, or None if the request cannot be cached (no images,
+            or hosted images whose content is not available locally)
+        """
+        if not images or any(is_image_url(image) for image in images):
+            return None
+
+        fingerprint = image_fingerprint if self.near_duplicates else content_digest
+        parts = [fingerprint(image_bytes) for image_bytes, _ in images]
+        return CacheKey(
+            fingerprint=b"".join(parts),
+            variant=f"{PROMPT_VERSION}:{int(include_examples)}:{model}",
+            perceptual=all(part.startswith(b"p") for part in parts),
+            image_count=len(parts),
+        )
+
+    def get(self, key: CacheKey) -> Optional[dict]:
+        """
+        Look up a cached raw response by exact key. With near_duplicates,
+        fall back to the nearest perceptual match within MAX_PHASH_DISTANCE
+        bits per image.
+
+        Args:
+            key: Key from ExtractionCache.key
+
+        Returns:
+            The stored raw response, or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT raw_response FROM results WHERE fingerprint = ? AND variant = ?",
+                (key.fingerprint, key.variant),
+            ).fetchone()
+            if row is None and self.near_duplicates and key.perceptual:
+                candidates = self._conn.execute(
+                    "SELECT fingerprint, raw_response FROM results"
+                    " WHERE variant = ? AND perceptual = 1 AND length(fingerprint) = ?",
+                    (key.variant, len(key.fingerprint)),
+                ).fetchall()
+                limit = MAX_PHASH_DISTANCE * key.image_count
+                scored = [(_hamming(key.fingerprint, fp), raw) for fp, raw in candidates]
+                nearest = min(scored, default=None, key=lambda item: item[0])
+                if nearest is not None and nearest[0] <= limit:
+                    row = (nearest[1],)
+
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: CacheKey, raw_response: dict) -> None:
+        """
+        Store a raw response, replacing any previous entry for the key.
+
+        Args:
+            key: Key from ExtractionCache.key
+            raw_response: Schema-valid raw extraction response
+        """
+        data = json.dumps(raw_response)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (fingerprint, variant, perceptual, raw_response)"
+                " VALUES (?, ?, ?, ?)",
+                (key.fingerprint, key.variant, int(key.perceptual), data),
+            )
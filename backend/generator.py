@@ -57,6 +57,9 @@ SHAPE_OVAL = "Oval"
 DRILL_ROUND = "Round"
 DRILL_SLOT = "Slot"
 
+# Format spec for every coordinate, dimension and angle (micrometer precision)
+NUMBER_FORMAT = ".3f"
+
 
 # =============================================================================
 # Shape Mapping - Convert our enum values to Altium format strings
@@ -117,7 +120,29 @@ class AltiumGenerator:
             String containing the full ASCII file content ready for import.
         """
         output = StringIO()
+        self._write_library(output)
+        return output.getvalue()
+
+    def write_to_file(self, filepath: str) -> None:
+        """
+        Generate and write the ASCII content to a file.
 
+        Records are written straight to the (buffered) file, so the full
+        content is never held in memory.
+
+        Args:
+            filepath: Path to the output .PcbLib file
+        """
+        with open(filepath, "w", encoding="utf-8") as f:
+            self._write_library(f)
+
+    def _write_library(self, output: TextIO) -> None:
+        """
+        Write the complete .PcbLib ASCII content to a stream.
+
+        Args:
+            output: Output stream to write to
+        """
         # Write file header
         self._write_header(output)
 
@@ -140,19 +165,6 @@ class AltiumGenerator:
         # Write file footer
         self._write_footer(output)
 
-        return output.getvalue()
-
-    def write_to_file(self, filepath: str) -> None:
-        """
-        Generate and write the ASCII content to a file.
-
-        Args:
-            filepath: Path to the output .PcbLib file
-        """
-        content = self.generate()
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(content)
-
     # =========================================================================
     # Private Methods - Section Writers
     # =========================================================================
@@ -199,29 +211,23 @@ class AltiumGenerator:
             output: Output stream to write to
             pad: The Pad model to write
         """
-        output.write("[Pad]\n")
-        output.write(f"RecordID={self._next_record_id()}\n")
-        output.write(f"Designator={pad.designator}\n")
-
         # Layer depends on pad type
         layer = LAYER_TOP if pad.pad_type == PadType.SMD else LAYER_MULTI
-        output.write(f"Layer={layer}\n")
-
-        # Position (in mm)
-        output.write(f"X={self._format_coord(pad.x)}\n")
-        output.write(f"Y={self._format_coord(pad.y)}\n")
-
-        # Rotation
-        output.write(f"Rotation={self._format_rotation(pad.rotation)}\n")
-
-        # Pad shape
         shape_name = SHAPE_MAP.get(pad.shape, SHAPE_RECTANGULAR)
-        output.write(f"Shape={shape_name}\n")
 
-        # Pad size (XSize and YSize)
-        # Note: For rotated pads, width/height are pre-rotation dimensions
-        output.write(f"XSize={self._format_dim(pad.width)}\n")
-        output.write(f"YSize={self._format_dim(pad.height)}\n")
+        # One write per record; sizes are pre-rotation dimensions
+        output.write(
+            "[Pad]\n"
+            f"RecordID={self._next_record_id()}\n"
+            f"Designator={pad.designator}\n"
+            f"Layer={layer}\n"
+            f"X={pad.x:{NUMBER_FORMAT}}mm\n"
+            f"Y={pad.y:{NUMBER_FORMAT}}mm\n"
+            f"Rotation={pad.rotation:{NUMBER_FORMAT}}\n"
+            f"Shape={shape_name}\n"
+            f"XSize={pad.width:{NUMBER_FORMAT}}mm\n"
+            f"YSize={pad.height:{NUMBER_FORMAT}}mm\n"
+        )
 
         # Through-hole specific: drill hole
         if pad.pad_type == PadType.THROUGH_HOLE and pad.drill:
@@ -261,14 +267,16 @@ class AltiumGenerator:
             output: Output stream to write to
             via: The Via model to write
         """
-        output.write("[Via]\n")
-        output.write(f"RecordID={self._next_record_id()}\n")
-        output.write(f"Layer={LAYER_MULTI}\n")
-        output.write(f"X={self._format_coord(via.x)}\n")
-        output.write(f"Y={self._format_coord(via.y)}\n")
-        output.write(f"Diameter={self._format_dim(via.diameter)}\n")
-        output.write(f"HoleSize={self._format_dim(via.drill_diameter)}\n")
-        output.write("\n")
+        output.write(
+            "[Via]\n"
+            f"RecordID={self._next_record_id()}\n"
+            f"Layer={LAYER_MULTI}\n"
+            f"X={via.x:{NUMBER_FORMAT}}mm\n"
+            f"Y={via.y:{NUMBER_FORMAT}}mm\n"
+            f"Diameter={via.diameter:{NUMBER_FORMAT}}mm\n"
+            f"HoleSize={via.drill_diameter:{NUMBER_FORMAT}}mm\n"
+            "\n"
+        )
 
     def _write_outline_tracks(self, output: TextIO, outline: Outline) -> None:
         """
@@ -386,9 +394,7 @@ class AltiumGenerator:
         Returns:
             Formatted string with 'mm' suffix (e.g., "2.54mm")
         """
-        # Use enough precision to preserve accuracy
-        # Round to 3 decimal places (micrometer precision)
-        return f"{value:.3f}mm"
+        return f"{value:{NUMBER_FORMAT}}mm"
 
     def _format_dim(self, value: float) -> str:
         """
@@ -400,19 +406,7 @@ class AltiumGenerator:
         Returns:
             Formatted string with 'mm' suffix (e.g., "0.802mm")
         """
-        return f"{value:.3f}mm"
-
-    def _format_rotation(self, value: float) -> str:
-        """
-        Format a rotation angle for output.
-
-        Args:
-            value: Rotation in degrees
-
-        Returns:
-            Formatted string (e.g., "90.000")
-        """
-        return f"{value:.3f}"
+        return f"{value:{NUMBER_FORMAT}}mm"
 
 
 # =============================================================================
@@ -23,7 +23,7 @@ Coordinate System:
 """
 
 from io import StringIO
-from typing import TextIO
+from typing import Iterator, TextIO
 
 from models import (
     Footprint,
@@ -89,12 +89,20 @@ class DelphiScriptGenerator:
         Returns:
             String containing the full script ready to run in Altium.
         """
-        output = StringIO()
+        return "".join(self._iter_sections())
 
-        self._write_header(output)
-        self._write_main_procedure(output)
+    def generate_iter(self) -> Iterator[bytes]:
+        """
+        Generate the script as UTF-8 encoded chunks.
 
-        return output.getvalue()
+        Yields the header, one chunk per pad/via, and the closing code,
+        so callers can stream the script without building the full string.
+
+        Yields:
+            UTF-8 encoded script chunks, in order.
+        """
+        for section in self._iter_sections():
+            yield section.encode("utf-8")
 
     def write_to_file(self, filepath: str) -> None:
         """
@@ -103,14 +111,41 @@ class DelphiScriptGenerator:
         Args:
             filepath: Path to the output .pas file
         """
-        content = self.generate()
         with open(filepath, "w", encoding="utf-8") as f:
-            f.write(content)
+            for section in self._iter_sections():
+                f.write(section)
 
     # =========================================================================
     # Private Methods - Script Generation
     # =========================================================================
 
+    def _iter_sections(self) -> Iterator[str]:
+        """Yield the script text section by section (header, each pad/via, footer)."""
+        output = StringIO()
+
+        self._write_header(output)
+        self._write_procedure_start(output)
+        yield self._drain(output)
+
+        for i, pad in enumerate(self.footprint.pads):
+            self._write_pad_creation(output, pad, i)
+            yield self._drain(output)
+
+        for i, via in enumerate(self.footprint.vias):
+            self._write_via_creation(output, via, i)
+            yield self._drain(output)
+
+        self._write_procedure_end(output)
+        yield self._drain(output)
+
+    @staticmethod
+    def _drain(output: StringIO) -> str:
+        """Return buffered text and reset the buffer for the next section."""
+        text = output.getvalue()
+        output.seek(0)
+        output.truncate()
+        return text
+
     def _write_header(self, output: TextIO) -> None:
         """Write script header with comments and uses clause."""
         output.write(f"{{ Altium DelphiScript - Create Footprint: {self.footprint.name} }}\n")
@@ -123,8 +158,8 @@ class DelphiScriptGenerator:
         output.write(f"  Vias: {len(self.footprint.vias)}\n")
         output.write("}\n\n")
 
-    def _write_main_procedure(self, output: TextIO) -> None:
-        """Write the main procedure that creates the footprint."""
+    def _write_procedure_start(self, output: TextIO) -> None:
+        """Write the procedure declaration and setup code that precedes the pads."""
         output.write(f"Procedure CreateFootprint_{self._safe_name(self.footprint.name)};\n")
         output.write("Var\n")
         output.write("    Board      : IPCB_Board;\n")
@@ -172,14 +207,8 @@ class DelphiScriptGenerator:
         output.write("    // Begin modification\n")
         output.write("    PCBServer.PreProcess;\n\n")
 
-        # Create all pads
-        for i, pad in enumerate(self.footprint.pads):
-            self._write_pad_creation(output, pad, i)
-
-        # Create all vias
-        for i, via in enumerate(self.footprint.vias):
-            self._write_via_creation(output, via, i)
-
+    def _write_procedure_end(self, output: TextIO) -> None:
+        """Write the outline, Pin 1 indicator, registration code and Run entry point."""
         # Create outline tracks
         if self.footprint.outline:
             self._write_outline_creation(output, self.footprint.outline)
@@ -0,0 +1,132 @@
+"""
+Image preprocessing for Claude Vision requests.
+
+Claude bills images by pixel area and large uploads also slow the request,
+so oversized datasheet images are downscaled before they are attached to a
+message. The caller's original bytes are never modified; only the copy sent
+to the API is resized.
+
+Hosted images (http/https URLs) are referenced by URL instead, so they are
+neither downloaded nor base64-inflated on our side.
+
+Pillow is optional: without it images are sent unchanged.
+
+Usage:
+    block = image_content_block(image_bytes, "image/png")
+    block = image_url_block("https://example.com/datasheet.png")
+    content = [prompt_block, block]
+"""
+
+import base64
+import io
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+# =============================================================================
+# Configuration
+# =============================================================================
+
+# Images above this many pixels are downscaled (Claude resizes anything
+# larger server-side anyway, so the extra pixels only cost upload time)
+MAX_IMAGE_PIXELS = 1_300_000
+
+# Bounding box for downscaled images; aspect ratio is preserved
+MAX_IMAGE_SIDE = 1400
+
+# JPEG quality for re-encoded images
+JPEG_QUALITY = 85
+
+
+# =============================================================================
+# Public Functions
+# =============================================================================
+
+def preprocess_image(image_bytes: bytes, media_type: str) -> tuple[bytes, str]:
+    """
+    Downscale an oversized image for upload.
+
+    Images at or below MAX_IMAGE_PIXELS, images Pillow cannot decode, and
+    all images when Pillow is not installed are returned unchanged, so
+    small line drawings are never re-compressed. Larger images are
+    resized to fit MAX_IMAGE_SIDE and re-encoded as JPEG.
+
+    Args:
+        image_bytes: Raw image bytes
+        media_type: MIME type (e.g., 'image/png')
+
+    Returns:
+        Tuple of (image_bytes, media_type) to send
+
+    Raises:
+        ValueError: If the image's pixel count makes Pillow refuse to decode
+            it as a decompression bomb
+    """
+    if Image is None:
+        return image_bytes, media_type
+
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as im:
+            if im.width * im.height <= MAX_IMAGE_PIXELS:
+                return image_bytes, media_type
+
+            im.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE), Image.LANCZOS)
+            buf = io.BytesIO()
+            im.convert("RGB").save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True)
+    except Image.DecompressionBombError:
+        # Not an OSError; callers report ValueError as a failed request
+        raise ValueError("Image too large to decode") from None
+    except OSError:
+        # Not decodable by Pillow; let the API judge the original
+        return image_bytes, media_type
+
+    return buf.getvalue(), "image/jpeg"
+
+
+def is_image_url(image: object) -> bool:
+    """Check whether an image reference is an http(s) URL string."""
+    return isinstance(image, str) and image.startswith(("http://", "https://"))
+
+
+def image_url_block(url: str) -> dict:
+    """
+    Build a URL-sourced image content block for the Messages API.
+
+    The API fetches the image itself (up to 20 MB, vs 5 MB for base64), so
+    the image is not preprocessed.
+
+    Args:
+        url: Public or presigned http(s) URL of the image
+
+    Returns:
+        Image content block referencing the URL
+    """
+    return {"type": "image", "source": {"type": "url", "url": url}}
+
+
+def image_content_block(image_bytes: bytes, media_type: str) -> dict:
+    """
+    Build a base64 image content block for the Messages API.
+
+    Args:
+        image_bytes: Raw image bytes
+        media_type: MIME type (e.g., 'image/png')
+
+    Returns:
+        Image content block with the preprocessed image embedded
+
+    Raises:
+        ValueError: If the image is too large to decode
+    """
+    image_bytes, media_type = preprocess_image(image_bytes, media_type)
+    return {
+        "type": "image",
+        "source": {
+            "type": "base64",
+            "media_type": media_type,
+            "data": base64.b64encode(image_bytes).decode("utf-8"),
+        },
+    }
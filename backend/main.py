@@ -12,10 +12,13 @@ Usage:
     uvicorn main:app --reload --port 8000
 """
 
+import functools
 import io
 import os
+import threading
 import uuid
 import zipfile
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional
@@ -31,10 +34,16 @@ from slowapi.errors import RateLimitExceeded
 
 import anthropic
 
+# Optional: compress stored uploads in memory
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # Images are stored uncompressed
+
 from extraction import FootprintExtractor, ExtractionResponse, estimate_cost
 from generator_delphiscript import DelphiScriptGenerator
 from models import Footprint, Pad, PadShape, PadType, Outline, ExtractionResult
-from verification import detect_suspicious_values, verify_extraction, apply_corrections
+from verification import should_verify, verify_extraction, apply_corrections
 
 
 # =============================================================================
@@ -65,9 +74,30 @@ SUPPORTED_FORMATS = {
 # Job expiration time (jobs are cleaned up after this)
 JOB_EXPIRATION_HOURS = 1
 
+# Number of independently locked shards in the job store
+JOB_STORE_SHARDS = 16
+
+# Maximum jobs kept in memory (least recently used are evicted beyond this)
+MAX_JOBS = 1024
+
 # Maximum file size (10MB)
 MAX_FILE_SIZE = 10 * 1024 * 1024
 
+# Footprint fields not exposed in the extract response (internal-only values)
+FOOTPRINT_RESPONSE_EXCLUDE = {
+    "pads": {"__all__": {"confidence"}},
+    "outline": {"line_width"},
+}
+
+# Compression level for stored image bytes (1-3 is fast, ~500MB/s)
+IMAGE_COMPRESSION_LEVEL = 3
+
+# Formats stored as-is (already entropy coded, zstd gains nothing)
+UNCOMPRESSED_FORMATS = {"image/jpeg"}
+
+_zstd_compressor = zstandard.ZstdCompressor(level=IMAGE_COMPRESSION_LEVEL) if zstandard else None
+_zstd_decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
 
 # =============================================================================
 # Rate Limiting Setup (production only)
@@ -138,11 +168,36 @@ app.add_middleware(
 # =============================================================================
 
 class ImageData:
-    """Stores data for a single uploaded image."""
+    """
+    Stores data for a single uploaded image.
+
+    Image bytes are held zstd-compressed between upload and extraction
+    (when zstandard is installed) and decompressed on access.
+    """
     def __init__(self, filename: str, image_bytes: bytes, content_type: str):
         self.filename = filename
-        self.image_bytes = image_bytes
         self.content_type = content_type
+        self.compressed = False
+        self._data = image_bytes
+
+        # JPEG data is effectively incompressible, don't spend CPU on it
+        if _zstd_compressor and content_type not in UNCOMPRESSED_FORMATS:
+            compressed = _zstd_compressor.compress(image_bytes)
+            if len(compressed) < len(image_bytes):
+                self._data = compressed
+                self.compressed = True
+
+    @property
+    def image_bytes(self) -> bytes:
+        """Return the original (decompressed) image bytes."""
+        if self.compressed:
+            return _zstd_decompressor.decompress(self._data)
+        return self._data
+
+    @property
+    def stored_size(self) -> int:
+        """Return the number of bytes held in memory for this image."""
+        return len(self._data)
 
 
 class Job:
@@ -163,6 +218,8 @@ class Job:
         self.confirmed = False
         self.confirmed_footprint: Optional[Footprint] = None
         self.pin1_index: Optional[int] = None
+        # Last confirm response, replayed for repeated identical confirms
+        self.confirm_response: Optional["ConfirmResponse"] = None
 
     def add_image(self, filename: str, image_bytes: bytes, content_type: str):
         """Add an image to this job."""
@@ -171,6 +228,7 @@ class Job:
         if self.extracted:
             self.extracted = False
             self.extraction_response = None
+            self.confirm_response = None
 
     @property
     def filename(self) -> str:
@@ -193,24 +251,182 @@ class Job:
         return len(self.images)
 
 
-# In-memory job storage (dict keyed by job_id)
-jobs: dict[str, Job] = {}
+class JobStore:
+    """
+    In-memory job storage sharded by job_id.
+
+    Jobs are spread across independently locked shards, so concurrent
+    requests for different jobs don't serialize on a single table.
+    Memory is bounded across the whole store: a shared counter tracks the
+    total, and once it passes max_jobs the least recently used job of the
+    fullest shard is evicted, so one busy shard can grow while others have
+    room. Age-based expiry is handled by remove_older_than(). Supports the
+    dict operations used by the endpoints.
+    """
+
+    def __init__(self, shard_count: int = 16, max_jobs: int = 1024):
+        self._shards: list[OrderedDict[str, Job]] = [OrderedDict() for _ in range(shard_count)]
+        self._locks = [threading.Lock() for _ in range(shard_count)]
+        self._max_jobs = max(1, max_jobs)
+        self._size = 0
+        self._size_lock = threading.Lock()
+
+    def _resize(self, delta: int) -> bool:
+        """
+        Adjust the job count, reserving an eviction if it passes max_jobs.
+
+        Args:
+            delta: Jobs added (positive) or removed (negative)
+
+        Returns:
+            True if the caller must evict one job to stay within max_jobs
+        """
+        with self._size_lock:
+            self._size += delta
+            if self._size <= self._max_jobs:
+                return False
+            self._size -= 1
+            return True
+
+    def _evict(self, keep: str) -> None:
+        """Evict the least recently used job of the fullest shard, never keep."""
+        for index in sorted(range(len(self._shards)), key=lambda i: -len(self._shards[i])):
+            with self._locks[index]:
+                shard = self._shards[index]
+                victim = next((jid for jid in shard if jid != keep), None)
+                if victim is not None:
+                    del shard[victim]
+                    return
+        # Nothing to evict (concurrent removals emptied the store); undo the reservation
+        with self._size_lock:
+            self._size += 1
+
+    def _shard(self, job_id: str) -> tuple[OrderedDict[str, Job], threading.Lock]:
+        """Return the (shard, lock) pair responsible for a job_id."""
+        index = hash(job_id) % len(self._shards)
+        return self._shards[index], self._locks[index]
+
+    def __getitem__(self, job_id: str) -> Job:
+        shard, lock = self._shard(job_id)
+        with lock:
+            shard.move_to_end(job_id)
+            return shard[job_id]
+
+    def __setitem__(self, job_id: str, job: Job) -> None:
+        shard, lock = self._shard(job_id)
+        with lock:
+            added = job_id not in shard
+            shard[job_id] = job
+            shard.move_to_end(job_id)
+        # Evict outside the shard lock; _evict takes other shards' locks
+        if added and self._resize(1):
+            self._evict(keep=job_id)
+
+    def __delitem__(self, job_id: str) -> None:
+        shard, lock = self._shard(job_id)
+        with lock:
+            del shard[job_id]
+        self._resize(-1)
+
+    def __contains__(self, job_id: str) -> bool:
+        shard, lock = self._shard(job_id)
+        with lock:
+            return job_id in shard
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job (marking it recently used) or None if not found."""
+        shard, lock = self._shard(job_id)
+        with lock:
+            job = shard.get(job_id)
+            if job is not None:
+                shard.move_to_end(job_id)
+            return job
+
+    def pop(self, job_id: str) -> Optional[Job]:
+        """Remove and return a job, or None if not found."""
+        shard, lock = self._shard(job_id)
+        with lock:
+            job = shard.pop(job_id, None)
+        if job is not None:
+            self._resize(-1)
+        return job
+
+    def remove_older_than(self, cutoff: datetime) -> None:
+        """Remove jobs created before cutoff, one shard at a time."""
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                expired = [jid for jid, job in shard.items() if job.created_at < cutoff]
+                for jid in expired:
+                    del shard[jid]
+            self._resize(-len(expired))
+
+    def clear(self) -> None:
+        """Remove all jobs."""
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                removed = len(shard)
+                shard.clear()
+            self._resize(-removed)
+
+
+# In-memory job storage (keyed by job_id)
+jobs = JobStore(shard_count=JOB_STORE_SHARDS, max_jobs=MAX_JOBS)
 
 
 def cleanup_expired_jobs():
     """Remove jobs older than JOB_EXPIRATION_HOURS."""
     cutoff = datetime.utcnow() - timedelta(hours=JOB_EXPIRATION_HOURS)
-    expired = [jid for jid, job in jobs.items() if job.created_at < cutoff]
-    for jid in expired:
-        del jobs[jid]
+    jobs.remove_older_than(cutoff)
 
 
 def get_job(job_id: str) -> Job:
     """Get a job by ID, raising 404 if not found."""
     cleanup_expired_jobs()
-    if job_id not in jobs:
+    job = jobs.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
-    return jobs[job_id]
+    return job
+
+
+# =============================================================================
+# Shared Anthropic Client
+# =============================================================================
+
+@functools.lru_cache(maxsize=4)
+def _anthropic_client(api_key: str) -> anthropic.Anthropic:
+    """Get the shared client for an API key, so requests reuse its connection pool."""
+    return anthropic.Anthropic(api_key=api_key)
+
+
+@functools.lru_cache(maxsize=4)
+def _async_anthropic_client(api_key: str) -> anthropic.AsyncAnthropic:
+    """Get the shared async client for an API key."""
+    return anthropic.AsyncAnthropic(api_key=api_key)
+
+
+def get_anthropic_client() -> Optional[anthropic.Anthropic]:
+    """Get the shared client for ANTHROPIC_API_KEY, or None if it is not set."""
+    api_key = os.environ.get("ANTHROPIC_API_KEY")
+    return _anthropic_client(api_key) if api_key else None
+
+
+def get_async_anthropic_client() -> Optional[anthropic.AsyncAnthropic]:
+    """Get the shared async client for ANTHROPIC_API_KEY, or None if it is not set."""
+    api_key = os.environ.get("ANTHROPIC_API_KEY")
+    return _async_anthropic_client(api_key) if api_key else None
+
+
+def get_extractor(model: str = None, include_examples: bool = False) -> FootprintExtractor:
+    """Create an extractor on the shared sync and async clients."""
+    return FootprintExtractor(
+        model=model,
+        include_examples=include_examples,
+        client=get_anthropic_client(),
+        async_client=get_async_anthropic_client(),
+    )
 
 
 # =============================================================================
@@ -219,7 +435,7 @@ def get_job(job_id: str) -> Job:
 
 class UploadResponse(BaseModel):
     """Response from upload endpoint."""
-    job_id: str
+    job_id: str = Field(..., description="Job identifier (32-character hex UUID)")
     filename: str
     image_count: int = 1
     message: str
@@ -313,8 +529,8 @@ async def upload_image(request: Request, files: list[UploadFile] = File(...)):
     if not files:
         raise HTTPException(status_code=400, detail="At least one file is required")
 
-    # Create job
-    job_id = str(uuid.uuid4())
+    # Create job (32-char hex ID, no dashes)
+    job_id = uuid.uuid4().hex
     job = Job(job_id=job_id)
 
     for file in files:
@@ -342,6 +558,7 @@ async def upload_image(request: Request, files: list[UploadFile] = File(...)):
             content_type=file.content_type,
         )
 
+    cleanup_expired_jobs()
     jobs[job_id] = job
 
     return UploadResponse(
@@ -409,10 +626,12 @@ async def extract_dimensions(request: Request, job_id: str, model: str = "sonnet
 
     Args:
         job_id: The job ID from upload
-        model: Model to use (haiku, sonnet, opus). Default: sonnet
+        model: Model to use (haiku, sonnet, opus), or "auto" to try Haiku
+               first and escalate to Sonnet on low confidence. Default: sonnet
         staged: Use 2-stage extraction pipeline for improved accuracy.
                 Stage 1 parses dimension table, Stage 2 extracts geometry.
                 Better at distinguishing pad dimensions from pitch values.
+                With model="auto", Stage 2 also tries Haiku before Sonnet.
         verify: Run verification pass to catch common errors like pad vs pitch
                 confusion. Uses Haiku model for cost efficiency. Default: False
         examples: Include few-shot examples in prompt. Can improve accuracy
@@ -430,20 +649,23 @@ async def extract_dimensions(request: Request, job_id: str, model: str = "sonnet
 
     # Create extractor and run extraction
     try:
-        extractor = FootprintExtractor(model=model, include_examples=examples)
+        extractor = get_extractor(model=model, include_examples=examples)
 
         # Prepare images list for extraction
         images = [(img.image_bytes, img.content_type) for img in job.images]
 
         # Use staged extraction if requested
         if staged:
-            result = extractor.extract_staged_from_bytes_multi(images)
+            result = extractor.extract_staged_from_bytes_multi(images, tiered_stage2=(model == "auto"))
+        elif model == "auto":
+            result = extractor.extract_tiered_from_bytes_multi(images)
         else:
             result = extractor.extract_from_bytes_multi(images)
 
         # Run verification pass if enabled and extraction succeeded
         if verify and result.success and result.extraction_result:
-            result = _run_verification(result, job.images[0].image_bytes, job.images[0].content_type)
+            image_bytes, media_type = images[0]
+            result = _run_verification(result, image_bytes, media_type)
 
         # Store result
         job.extraction_response = result
@@ -477,24 +699,22 @@ def _run_verification(result: ExtractionResponse, image_bytes: bytes, media_type
     extraction = result.extraction_result
 
     # Check if verification is needed
-    suspicious = detect_suspicious_values(extraction)
-    if not suspicious["needs_verification"]:
+    if not should_verify(extraction):
         return result
 
     # Run verification
-    import os
-    api_key = os.environ.get("ANTHROPIC_API_KEY")
-    if not api_key:
+    client = get_anthropic_client()
+    if client is None:
         # Can't verify without API key, return original result
         return result
 
-    client = anthropic.Anthropic(api_key=api_key)
+    verification_model = "claude-haiku-4-5-20251001"  # Use Haiku for cost efficiency
     verification = verify_extraction(
         extraction,
         image_bytes,
         media_type,
         client,
-        model="claude-haiku-4-5-20251001"  # Use Haiku for cost efficiency
+        model=verification_model,
     )
 
     if verification.error:
@@ -511,6 +731,9 @@ def _run_verification(result: ExtractionResponse, image_bytes: bytes, media_type
         # Update tokens to include verification cost
         total_input = (result.input_tokens or 0) + verification.input_tokens
         total_output = (result.output_tokens or 0) + verification.output_tokens
+        total_cost = result.cost_usd + estimate_cost(
+            verification.input_tokens, verification.output_tokens, verification_model
+        )
 
         # Rebuild footprint from corrected extraction
         # The corrected_extraction already has properly typed Pad, Via, and Outline objects
@@ -529,6 +752,9 @@ def _run_verification(result: ExtractionResponse, image_bytes: bytes, media_type
             model_used=result.model_used,
             input_tokens=total_input,
             output_tokens=total_output,
+            cache_read_input_tokens=result.cache_read_input_tokens,
+            cache_creation_input_tokens=result.cache_creation_input_tokens,
+            cost_usd=total_cost,
         )
 
     # Update tokens even if no corrections
@@ -536,6 +762,9 @@ def _run_verification(result: ExtractionResponse, image_bytes: bytes, media_type
     total_output = (result.output_tokens or 0) + verification.output_tokens
     result.input_tokens = total_input
     result.output_tokens = total_output
+    result.cost_usd += estimate_cost(
+        verification.input_tokens, verification.output_tokens, verification_model
+    )
 
     return result
 
@@ -553,48 +782,18 @@ def _build_extract_response(job_id: str, result: ExtractionResponse) -> ExtractR
         )
 
     # Calculate estimated cost
+    # (priced per call where the model is known; model_used may be a label)
     cost = None
-    if result.input_tokens and result.output_tokens and result.model_used:
-        cost = estimate_cost(result.input_tokens, result.output_tokens, result.model_used)
+    if result.input_tokens and result.output_tokens:
+        cost = result.cost_usd
 
     # Convert footprint to dict for JSON serialization
+    # (pydantic-core serializer, no per-pad Python dict rebuilding)
     footprint_dict = None
     if result.footprint:
-        footprint_dict = {
-            "name": result.footprint.name,
-            "description": result.footprint.description,
-            "pads": [
-                {
-                    "designator": p.designator,
-                    "x": p.x,
-                    "y": p.y,
-                    "width": p.width,
-                    "height": p.height,
-                    "shape": p.shape.value,
-                    "pad_type": p.pad_type.value,
-                    "rotation": p.rotation,
-                    "drill": {
-                        "diameter": p.drill.diameter,
-                        "drill_type": p.drill.drill_type.value,
-                        "slot_length": p.drill.slot_length,
-                    } if p.drill else None,
-                }
-                for p in result.footprint.pads
-            ],
-            "vias": [
-                {
-                    "x": v.x,
-                    "y": v.y,
-                    "diameter": v.diameter,
-                    "drill_diameter": v.drill_diameter,
-                }
-                for v in result.footprint.vias
-            ] if result.footprint.vias else [],
-            "outline": {
-                "width": result.footprint.outline.width,
-                "height": result.footprint.outline.height,
-            } if result.footprint.outline else None,
-        }
+        footprint_dict = result.footprint.model_dump(
+            mode="json", exclude=FOOTPRINT_RESPONSE_EXCLUDE
+        )
 
     # Convert extraction result to dict
     extraction_dict = None
@@ -650,16 +849,21 @@ async def confirm_extraction(job_id: str, request: ConfirmRequest):
             detail="Extraction failed. Cannot confirm."
         )
 
+    # Repeated confirm with the same selection (retry/double-click): replay
+    if job.confirm_response and job.pin1_index == request.pin1_index:
+        return job.confirm_response
+
     # Store confirmation
     job.confirmed = True
     job.confirmed_footprint = job.extraction_response.footprint
     job.pin1_index = request.pin1_index
 
-    return ConfirmResponse(
+    job.confirm_response = ConfirmResponse(
         job_id=job_id,
         confirmed=True,
         message="Extraction confirmed. Call /api/generate/{job_id} to download the footprint file."
     )
+    return job.confirm_response
 
 
 @app.get("/api/generate/{job_id}")
@@ -682,9 +886,7 @@ async def generate_footprint(job_id: str):
     footprint_name = job.confirmed_footprint.name
     safe_name = _safe_filename(footprint_name)
 
-    # Generate DelphiScript content
     generator = DelphiScriptGenerator(job.confirmed_footprint)
-    script_content = generator.generate()
 
     # Generate .PrjScr project file content
     prjscr_content = _generate_prjscr(safe_name)
@@ -694,8 +896,10 @@ async def generate_footprint(job_id: str):
     with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
         # Add script project file
         zf.writestr(f"{safe_name}.PrjScr", prjscr_content)
-        # Add DelphiScript file
-        zf.writestr(f"{safe_name}.pas", script_content)
+        # Add DelphiScript file, compressing each chunk as it is generated
+        with zf.open(f"{safe_name}.pas", "w") as pas_file:
+            for chunk in generator.generate_iter():
+                pas_file.write(chunk)
 
     zip_buffer.seek(0)
 
@@ -757,7 +961,7 @@ async def detect_standard_package(file: UploadFile = File(...)):
     content = await file.read()
 
     try:
-        extractor = FootprintExtractor(model="haiku")  # Use Haiku for quick detection
+        extractor = get_extractor(model="haiku")  # Use Haiku for quick detection
         result = extractor.detect_standard_package(content, file.content_type)
 
         return StandardPackageResponse(
@@ -797,10 +1001,9 @@ async def get_job_status(job_id: str):
 @app.delete("/api/job/{job_id}")
 async def delete_job(job_id: str):
     """Delete a job and its associated data."""
-    if job_id not in jobs:
+    if jobs.pop(job_id) is None:
         raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
 
-    del jobs[job_id]
     return {"message": f"Job {job_id} deleted"}
 
 
@@ -18,7 +18,70 @@ Extraction targets:
 - Units detection and normalization to mm
 """
 
-# JSON schema for extraction response
+from functools import lru_cache
+from typing import Optional, TypedDict
+
+import fastjsonschema
+
+
+# =============================================================================
+# Read-only schema containers
+# =============================================================================
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only; build a new mapping instead")
+
+
+class _FrozenDict(dict):
+    """
+    Read-only dict used for shared schema constants.
+
+    Subclasses dict (rather than using MappingProxyType) so the schema stays
+    JSON-serializable for the Anthropic SDK, json.dumps and fastjsonschema.
+    Copies return the same object since it can never change.
+    """
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class _FrozenList(list):
+    """Read-only list counterpart of _FrozenDict."""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def _freeze(obj):
+    """Recursively convert dicts and lists into their read-only counterparts."""
+    if isinstance(obj, (_FrozenDict, _FrozenList)):
+        return obj
+    if isinstance(obj, dict):
+        return _FrozenDict((key, _freeze(value)) for key, value in obj.items())
+    if isinstance(obj, list):
+        return _FrozenList(_freeze(item) for item in obj)
+    return obj
+
+
+# =============================================================================
+# Single-pass extraction
+# =============================================================================
+
+# JSON schema for extraction response. Frozen below and shared across threads;
+# for per-request variants shallow-merge, e.g. {**EXTRACTION_SCHEMA, ...}.
 EXTRACTION_SCHEMA = {
     "type": "object",
     "properties": {
@@ -173,193 +236,136 @@ EXTRACTION_SCHEMA = {
     },
     "required": ["footprint_name", "units_detected", "pads", "vias", "outline", "pin1_location", "overall_confidence", "warnings"]
 }
+EXTRACTION_SCHEMA = _freeze(EXTRACTION_SCHEMA)
+
+
+# Static types for payloads matching EXTRACTION_SCHEMA. total=False because
+# conversion tolerates missing fields; see validate_extraction for checking.
+class PadPayload(TypedDict, total=False):
+    designator: str
+    x: float
+    y: float
+    width: float
+    height: float
+    shape: str
+    pad_type: str
+    rotation: float
+    drill_diameter: Optional[float]
+    drill_slot_length: Optional[float]
+    confidence: float
+
+
+class ViaPayload(TypedDict, total=False):
+    x: float
+    y: float
+    drill_diameter: float
+    outer_diameter: float
+
+
+class OutlinePayload(TypedDict, total=False):
+    width: float
+    height: float
+    confidence: float
+
+
+class Pin1Payload(TypedDict, total=False):
+    designator: str
+    indicator_type: str
+    confidence: float
+
+
+class ExtractionPayload(TypedDict, total=False):
+    footprint_name: str
+    units_detected: str
+    pads: list[PadPayload]
+    vias: list[ViaPayload]
+    outline: OutlinePayload
+    pin1_location: Pin1Payload
+    overall_confidence: float
+    warnings: list[str]
+    standard_package_detected: Optional[str]
+
+# Validator compiled once from EXTRACTION_SCHEMA into plain Python checks.
+# Raises fastjsonschema.JsonSchemaException if a payload does not match.
+validate_extraction = fastjsonschema.compile(EXTRACTION_SCHEMA)
+
+# Tool definition carrying EXTRACTION_SCHEMA. The schema travels as structured
+# tool metadata instead of being re-tokenized as text inside the prompt, and
+# tool_choice forces Claude to answer with a single emit_footprint call.
+EXTRACTION_TOOL_NAME = "emit_footprint"
+
+EXTRACTION_TOOL = _freeze({
+    "name": EXTRACTION_TOOL_NAME,
+    "description": "Record the footprint geometry extracted from the datasheet image(s).",
+    "input_schema": EXTRACTION_SCHEMA,
+})
+
+EXTRACTION_TOOL_CHOICE = _freeze({"type": "tool", "name": EXTRACTION_TOOL_NAME})
+
+# Bump whenever EXTRACTION_PROMPT, the examples or EXTRACTION_SCHEMA change,
+# so results stored in ExtractionCache are not reused.
+PROMPT_VERSION = "v3"
+
+# Each rule is stated once here and referenced by letter elsewhere in the
+# prompt and in the few-shot examples.
+_RULE_PITCH_VS_PAD = (
+    "Rule P - pad size vs pitch: a dimension between TWO pad centers is pitch "
+    "(0.5, 0.635, 1.0, 1.27mm); a dimension across the edges of ONE pad is its size. "
+    "Pad width is typically 40-60% of pitch."
+)
+_RULE_WIDTH_HEIGHT = (
+    "Rule W - width = X (horizontal), height = Y (vertical). Pads extend TOWARD the "
+    "package center: on LEFT/RIGHT sides width > height, on TOP/BOTTOM sides height > width."
+)
+_RULE_DRILL_VS_PAD = (
+    "Rule D - TH pads have two diameters: the drill (⌀ symbol, typically 0.8-1.2mm, "
+    "3.0mm+ for mounting) goes in drill_diameter; the copper pad is ALWAYS larger "
+    "(drill + 0.5-0.8mm) and goes in width/height (width = height for round pads)."
+)
+
+# Main extraction prompt, split into static parts so the optional few-shot
+# examples can be joined in between without any template parsing
+_PROMPT_INTRO = """You are an expert PCB footprint extraction system. Analyze this datasheet image showing a component's recommended land pattern (PCB footprint) and extract all dimensional information.
 
-# Few-shot examples (optional, can improve accuracy for some datasheets)
-FEW_SHOT_EXAMPLES = """
-## Example: UDFN-8 Package (for reference)
-
-For a UDFN-8 with pads on LEFT and RIGHT sides, pitch=0.5mm, pad length=0.85mm, pad width=0.30mm:
-
-```json
-{{
-  "footprint_name": "UDFN-8_2x3mm",
-  "pads": [
-    {{"designator": "1", "x": -1.45, "y": -0.75, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95}},
-    {{"designator": "2", "x": -1.45, "y": -0.25, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95}},
-    {{"designator": "3", "x": -1.45, "y": 0.25, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95}},
-    {{"designator": "4", "x": -1.45, "y": 0.75, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95}},
-    {{"designator": "5", "x": 1.45, "y": 0.75, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95}},
-    {{"designator": "6", "x": 1.45, "y": 0.25, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95}},
-    {{"designator": "7", "x": 1.45, "y": -0.25, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95}},
-    {{"designator": "8", "x": 1.45, "y": -0.75, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95}},
-    {{"designator": "EP", "x": 0, "y": 0, "width": 1.60, "height": 1.40, "shape": "rectangular", "pad_type": "smd", "confidence": 0.90}}
-  ]
-}}
-```
-
-**Key points from this example:**
-- Pads on left/right extend HORIZONTALLY toward center → width (0.85) > height (0.30)
-- Pitch is 0.5mm but pad width is 0.85mm and height is 0.30mm - NEITHER equals pitch
-- Y positions calculated from pitch: ±0.75, ±0.25 (multiples of 0.5mm / 2)
-
-## Example: Through-Hole Connector (for reference)
-
-For a TH connector with ⌀0.9mm drill holes and 1.27mm pitch:
-
-```json
-{{
-  "pads": [
-    {{"designator": "1", "x": -3.81, "y": 4.45, "width": 1.5, "height": 1.5, "shape": "round", "pad_type": "th", "drill_diameter": 0.9, "confidence": 0.90}},
-    {{"designator": "2", "x": -2.54, "y": 6.98, "width": 1.5, "height": 1.5, "shape": "round", "pad_type": "th", "drill_diameter": 0.9, "confidence": 0.90}},
-    {{"designator": "MH1", "x": -5.71, "y": 0.0, "width": 3.5, "height": 3.5, "shape": "round", "pad_type": "th", "drill_diameter": 3.2, "confidence": 0.85}}
-  ]
-}}
-```
-
-**Key points for TH pads:**
-- Look for ⌀ symbol indicating drill diameter (e.g., ⌀0.9mm)
-- Pad diameter (width/height) is LARGER than drill (typically drill + 0.5-0.6mm)
-- Round TH pads have width = height
-- Mounting holes (MH) have larger drill diameters (3.0mm+)
+## Your Task
+Extract the pad geometry and positions from this footprint drawing and report them with the emit_footprint tool.
 """
 
-# Main extraction prompt
-EXTRACTION_PROMPT = """You are an expert PCB footprint extraction system. Analyze this datasheet image showing a component's recommended land pattern (PCB footprint) and extract all dimensional information.
-
-## Your Task
-Extract the pad geometry and positions from this footprint drawing. Output a JSON object following the schema below.
-{examples_placeholder}
-## Important Guidelines
-
-### Coordinate System
-- Origin (0,0) is at the component CENTER
-- +X points RIGHT
-- +Y points UP
-- All dimensions must be in MILLIMETERS (convert if necessary)
-
-### Dimension Interpretation
-- Pay attention to dimension reference points (center-to-center vs edge-to-edge)
-- If dimensions show total span, calculate individual pad positions
-- If a table maps variables (A, B, C) to values, apply those values to the drawing
-
-### Critical: Pad Dimensions vs Spacing (COMMON MISTAKE)
-Datasheets show TWO different types of measurements. Confusing them is a critical error:
-
-**Pad dimensions** (width and height): The physical size of each copper pad
-- These dimensions describe ONE pad's copper area
-- Look for dimension lines that span a SINGLE pad rectangle
-- Typically 0.3-0.8mm for small SOIC/QFN packages
-
-**Pad spacing/pitch**: The distance BETWEEN pad centers
-- These describe the REPEATING PATTERN between pads
-- Look for dimension lines that go from one pad center to another
-- Common pitches: 0.5mm, 0.635mm, 1.0mm, 1.27mm
-- Do NOT use pitch/spacing for pad width/height!
-
-**How to distinguish them:**
-- If a dimension is labeled between TWO pads → it's spacing/pitch
-- If a dimension points to the edges of ONE pad → it's pad width or height
-- Pitch values (1.27mm, 0.5mm) are almost always LARGER than pad width
-- Pad width is typically 40-60% of the pitch value
-
-**Example:** If pitch is 1.27mm, pad width is likely ~0.5-0.8mm, NOT 1.27mm
-
-### Pad Types
+_PROMPT_BODY = f"""
+## Coordinate System
+- Origin (0,0) is at the component CENTER; +X points RIGHT, +Y points UP
+- All dimensions must be in MILLIMETERS (convert mil/inch if necessary)
+- Note whether dimensions are center-to-center or edge-to-edge; derive pad positions from total spans
+- If a table maps variables (A, B, C, X1, Y1...) to values, apply those values to the drawing
+
+## Rules
+- {_RULE_PITCH_VS_PAD}
+- {_RULE_WIDTH_HEIGHT}
+- {_RULE_DRILL_VS_PAD}
+
+## Checklist: Common Mistakes
+1. Do not use pitch as pad width/height (Rule P).
+2. Do not swap width and height or rotate the whole footprint 90° (Rule W): check which side pin 1 is on and that pad positions match the drawing layout.
+3. Do not use the drill or hole spacing as the pad diameter (Rule D). "⌀0.90 × 14" means 14 holes with a 0.90mm DRILL; match each size to its holes in the drawing.
+4. Include EVERY hole, labeled or not: numbered pins, mounting holes ("MH1", "MH2"), shield/alignment holes ("SH1", "SH2").
+
+## Pad Types
 - **SMD pads**: Surface mount, no drill hole
 - **TH pads**: Through-hole, have a drill diameter
-- **Thermal/Exposed pads (EP)**: Large center pad for heat dissipation, often labeled "EP", "9", or shown as "Optional Center Pad"
-
-### CRITICAL: Thermal Pads and Thermal Vias
-Many packages (QFN, UDFN, QFP with EP) have a **thermal pad** in the center:
-- Look for "Optional Center Pad", "Exposed Pad", "EP", or a large rectangle in the center
-- Dimensions are often labeled X2/Y2 or similar in the table
-- This is a REAL PAD that MUST be included - designate it as "EP" or the next pin number
-- The thermal pad is typically much larger than signal pads (1-3mm vs 0.3-0.8mm)
-
-**Thermal vias** are small holes inside or near the thermal pad:
-- Look for small circles with X marks inside the thermal pad area
-- Labeled as "Thermal Via", "V" diameter, or "EV" pitch
-- Typically 0.2-0.4mm drill diameter
-- Used for heat transfer to inner/bottom layers
-- Include ALL thermal vias in the "vias" array
-
-### Through-Hole Pads: Drill vs Pad Size
-For through-hole pads, there are TWO different diameters:
-
-1. **Drill diameter (⌀):** The hole drilled through the PCB
-   - Shown with ⌀ symbol in datasheets
-   - Typically 0.8mm - 1.2mm for signal pins, 3.0mm+ for mounting
-   - This goes in the `drill_diameter` field
-
-2. **Pad diameter:** The copper annular ring around the hole
-   - ALWAYS LARGER than the drill diameter
-   - Typically drill + 0.5mm to 0.8mm
-   - For round pads: width = height = pad diameter
-   - This goes in the `width` and `height` fields
-
-**CRITICAL:** Do NOT use the pitch/spacing (distance between holes) for pad diameter!
-- If holes are spaced 1.27mm apart, the PAD diameter is NOT 1.27mm
-- The pad diameter is typically 1.5mm-2.5mm depending on drill size
-- Look for dimension callouts pointing to the EDGE of a single pad, not between pads
-
-### Hole Count Notation
-Datasheets use format: "⌀diameter × count" (e.g., "⌀0.90 × 14")
-- This means COUNT holes have DRILL DIAMETER of that size
-- The PAD diameter will be larger (add ~0.5-0.6mm for annular ring)
-- Pattern match which holes in the drawing correspond to each size
-
-### Extract ALL Holes (Not Just Labeled Pins)
-Include EVERY hole visible in the footprint drawing:
-- **Signal pins:** Numbered pads (1, 2, 3...) for electrical connections
-- **Mounting holes:** Large unlabeled holes (often ⌀3.0-3.5mm) - use "MH1", "MH2"
-- **Shield/alignment holes:** Medium unlabeled holes - use "SH1", "SH2"
-- **Unlabeled holes** are still part of the footprint - assign designators based on position
-- Count ALL circles/holes in the drawing, labeled or not
-
-### CRITICAL: Pad Orientation and Width vs Height
-**Width = X dimension (horizontal), Height = Y dimension (vertical)**
-
-For packages like QFN, UDFN, SOIC where pads are on the LEFT and RIGHT sides:
-- Pads on LEFT side (negative X): width is the dimension TOWARD center, height is the narrow dimension
-- Pads on RIGHT side (positive X): same orientation
-- If the pad extends horizontally (toward center), width > height
-- Example: A pad that is 0.85mm long extending toward center and 0.30mm wide → width=0.85, height=0.30
-
-For packages where pads are on TOP and BOTTOM:
-- Pads extend vertically toward center
-- Example: A pad 0.85mm tall extending toward center and 0.30mm wide → width=0.30, height=0.85
-
-**How to determine pad orientation from the drawing:**
-1. Look at the package body outline (usually a rectangle)
-2. Identify which sides the pads are on
-3. Pads always extend TOWARD the package center
-4. The "long" dimension of the pad points toward center
-5. Look for dimension labels like "X1" (pad width) and "Y1" (pad length) in the table
-
-**Common mistake:** Rotating the entire footprint 90°. Check which side has pin 1 and verify pad positions match the drawing layout.
-
-### Pin 1 Identification
-Look for these indicators:
-- Dot or circle marker
-- Chamfered corner
-- Notch in package outline
-- Square pad (others round)
-- Explicit "PIN 1" label
-- Counter-clockwise numbering convention
-
-### Confidence Scoring
+- **Thermal/Exposed pads (EP)**: QFN, UDFN and QFP-EP packages have a large center pad ("Optional Center Pad", "Exposed Pad", "EP", often X2/Y2 in the table). It is a REAL PAD and MUST be included - designate it "EP" or the next pin number.
+- **Thermal vias**: small circles with X marks inside or near the thermal pad ("Thermal Via", "V" diameter, "EV" pitch), typically 0.2-0.4mm drill. Include ALL of them in the "vias" array.
+
+## Pin 1 Identification
+Look for: dot or circle marker, chamfered corner, notch in package outline, square pad (others round), explicit "PIN 1" label, counter-clockwise numbering convention.
+
+## Confidence Scoring
 - 1.0: Clear, unambiguous dimension with explicit label
 - 0.7-0.9: Dimension inferred from related measurements
 - 0.5-0.7: Some ambiguity but reasonable interpretation
 - <0.5: Significant uncertainty, may need user verification
 
-## Output Schema
-```json
-{schema}
-```
-
 ## Output Requirements
-1. Return ONLY valid JSON, no other text
+1. Call the emit_footprint tool once with valid JSON matching its input schema
 2. All numeric values must be numbers, not strings
 3. All positions and dimensions in millimeters
 4. Include confidence scores for every pad and the outline
@@ -367,9 +373,25 @@ Look for these indicators:
 
 Analyze the image and extract the footprint data:"""
 
+# The prompt depends only on module constants, so it is built once instead of
+# on every API call
+EXTRACTION_PROMPT = "".join((_PROMPT_INTRO, _PROMPT_BODY))
+
+
+@lru_cache(maxsize=None)
+def _prompt_with_examples() -> str:
+    """Build the few-shot variant on first use, importing the examples lazily."""
+    from prompts_examples import FEW_SHOT_EXAMPLES
+
+    return "".join((_PROMPT_INTRO, FEW_SHOT_EXAMPLES, _PROMPT_BODY))
+
+
 def get_extraction_prompt(include_examples: bool = False) -> str:
     """
-    Get the full extraction prompt with schema embedded.
+    Get the extraction prompt text.
+
+    The output schema is not embedded in the text; send EXTRACTION_TOOL and
+    EXTRACTION_TOOL_CHOICE with the request so Claude answers via tool use.
 
     Args:
         include_examples: If True, include few-shot examples in the prompt.
@@ -379,11 +401,41 @@ def get_extraction_prompt(include_examples: bool = False) -> str:
     Returns:
         The complete prompt string ready to send to Claude API.
     """
-    import json
-    schema_str = json.dumps(EXTRACTION_SCHEMA, indent=2)
-    examples = FEW_SHOT_EXAMPLES if include_examples else ""
-    return EXTRACTION_PROMPT.format(schema=schema_str, examples_placeholder=examples)
+    return _prompt_with_examples() if include_examples else EXTRACTION_PROMPT
+
+
+@lru_cache(maxsize=None)
+def _prompt_block(include_examples: bool) -> dict:
+    """Build the read-only cached-prompt content block once per variant."""
+    return _freeze({
+        "type": "text",
+        "text": get_extraction_prompt(include_examples),
+        "cache_control": {"type": "ephemeral"},
+    })
+
+
+def get_extraction_prompt_blocks(include_examples: bool = False) -> list[dict]:
+    """
+    Get the extraction prompt as message content blocks for prompt caching.
+
+    The prompt text is identical on every call, so it is marked as an
+    ephemeral cache breakpoint. Together with the tool definition it forms a
+    static prefix the API can serve from cache; images must be appended
+    after these blocks so they fall outside the cached prefix.
+
+    Args:
+        include_examples: If True, include few-shot examples in the prompt.
+
+    Returns:
+        New list holding the shared, read-only prompt block; callers may
+        append image blocks to it.
+    """
+    return [_prompt_block(include_examples)]
+
 
+# =============================================================================
+# Standard package detection
+# =============================================================================
 
 # Prompt for standard package detection (lighter weight, can run first)
 STANDARD_PACKAGE_PROMPT = """Analyze this datasheet image and determine if it shows a standard IPC-7351 package type.
@@ -0,0 +1,53 @@
+"""
+Few-shot examples for the single-pass extraction prompt.
+
+Kept separate from prompts.py so the examples are only imported when a
+caller asks for them (include_examples=True).
+"""
+
+# Few-shot examples (optional, can improve accuracy for some datasheets)
+FEW_SHOT_EXAMPLES = """
+## Example: UDFN-8 Package (for reference)
+
+For a UDFN-8 with pads on LEFT and RIGHT sides, pitch=0.5mm, pad length=0.85mm, pad width=0.30mm:
+
+```json
+{
+  "footprint_name": "UDFN-8_2x3mm",
+  "pads": [
+    {"designator": "1", "x": -1.45, "y": -0.75, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95},
+    {"designator": "2", "x": -1.45, "y": -0.25, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95},
+    {"designator": "3", "x": -1.45, "y": 0.25, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95},
+    {"designator": "4", "x": -1.45, "y": 0.75, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95},
+    {"designator": "5", "x": 1.45, "y": 0.75, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95},
+    {"designator": "6", "x": 1.45, "y": 0.25, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95},
+    {"designator": "7", "x": 1.45, "y": -0.25, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95},
+    {"designator": "8", "x": 1.45, "y": -0.75, "width": 0.85, "height": 0.30, "shape": "rectangular", "pad_type": "smd", "confidence": 0.95},
+    {"designator": "EP", "x": 0, "y": 0, "width": 1.60, "height": 1.40, "shape": "rectangular", "pad_type": "smd", "confidence": 0.90}
+  ]
+}
+```
+
+**Key points from this example:**
+- Pads on left/right extend toward center → width (0.85) > height (0.30) (Rule W)
+- Pitch is 0.5mm - NEITHER pad dimension equals pitch (Rule P)
+- Y positions calculated from pitch: ±0.75, ±0.25 (multiples of 0.5mm / 2)
+
+## Example: Through-Hole Connector (for reference)
+
+For a TH connector with ⌀0.9mm drill holes and 1.27mm pitch:
+
+```json
+{
+  "pads": [
+    {"designator": "1", "x": -3.81, "y": 4.45, "width": 1.5, "height": 1.5, "shape": "round", "pad_type": "th", "drill_diameter": 0.9, "confidence": 0.90},
+    {"designator": "2", "x": -2.54, "y": 6.98, "width": 1.5, "height": 1.5, "shape": "round", "pad_type": "th", "drill_diameter": 0.9, "confidence": 0.90},
+    {"designator": "MH1", "x": -5.71, "y": 0.0, "width": 3.5, "height": 3.5, "shape": "round", "pad_type": "th", "drill_diameter": 3.2, "confidence": 0.85}
+  ]
+}
+```
+
+**Key points for TH pads:**
+- ⌀0.9mm drill → 1.5mm round pad, width = height (Rule D)
+- Mounting holes (MH) have larger drill diameters (3.0mm+)
+"""
@@ -11,7 +11,14 @@ table-variable format datasheets where dimensions are shown as labels (X1, Y1, e
 that map to values in a table.
 """
 
-import json
+import copy
+import functools
+from typing import Callable, NamedTuple
+
+import fastjsonschema
+
+from prompts import _freeze
+
 
 # =============================================================================
 # Stage 1: Scene Analysis + Table Parsing
@@ -26,11 +33,11 @@ STAGE1_SCHEMA = {
         "drawing_format": {
             "type": "string",
             "enum": ["table_variable", "inline", "mixed"],
-            "description": "table_variable = dimensions shown as labels (A, B, X1) with table mapping to values; inline = values shown directly on drawing; mixed = both"
+            "description": "mixed = both table-variable and inline dimensions"
         },
         "dimension_table": {
             "type": "object",
-            "description": "Mapping of dimension labels to their values in mm. Extract NOM/TYP values. Example: {'X1': 0.30, 'X2': 1.60, 'Y1': 0.85}",
+            "description": "Dimension label → NOM/TYP value in mm",
             "additionalProperties": {"type": "number"}
         },
         "package_type": {
@@ -61,13 +68,13 @@ STAGE1_SCHEMA = {
         },
         "dimension_semantics": {
             "type": "object",
-            "description": "For each dimension variable, what it likely represents",
+            "description": "Which label denotes each feature",
             "properties": {
-                "pad_width_label": {"type": "string", "description": "Label for pad width (e.g., 'X1', 'b')"},
-                "pad_height_label": {"type": "string", "description": "Label for pad height/length (e.g., 'Y1', 'L')"},
-                "pitch_label": {"type": "string", "description": "Label for pad pitch/spacing (e.g., 'E', 'e')"},
-                "thermal_width_label": {"type": "string", "description": "Label for thermal pad width (e.g., 'X2', 'D2')"},
-                "thermal_height_label": {"type": "string", "description": "Label for thermal pad height (e.g., 'Y2', 'E2')"}
+                "pad_width_label": {"type": "string"},
+                "pad_height_label": {"type": "string"},
+                "pitch_label": {"type": "string"},
+                "thermal_width_label": {"type": "string"},
+                "thermal_height_label": {"type": "string"}
             }
         },
         "warnings": {
@@ -83,28 +90,11 @@ STAGE1_SCHEMA = {
 STAGE1_PROMPT = """You are analyzing a PCB component datasheet image to extract metadata and parse dimension tables.
 
 ## Your Task
-Analyze this datasheet image and extract:
-1. The drawing format (table-variable vs inline dimensions)
-2. The dimension table (if present) - mapping labels to values
-3. Package type and pad arrangement
-4. What each dimension label represents
-
-## Understanding Drawing Formats
-
-### Table-Variable Format
-The drawing shows dimension LABELS (X1, Y1, E, G1, etc.) pointing to features, with a separate table mapping labels to numeric values:
-```
-Table:
-| Symbol | MIN | NOM | MAX |
-|--------|-----|-----|-----|
-| X1     | 0.25| 0.30| 0.35|
-| Y1     | 0.80| 0.85| 0.90|
-| E      |     | 0.50|     |
-```
-For table-variable format, extract the NOM (nominal) or TYP (typical) values.
-
-### Inline Format
-Dimensions are shown directly on the drawing with numeric values (e.g., "0.50" pointing to a feature).
+Extract the drawing format, the dimension table (labels → values), the package type and pad arrangement, and what each dimension label represents.
+
+## Drawing Formats
+- **Table-variable**: the drawing shows dimension LABELS (X1, Y1, E, G1, etc.) and a separate table maps them to values, e.g. `| X1 | 0.25 | 0.30 | 0.35 |` for MIN/NOM/MAX. Extract the NOM (nominal) or TYP (typical) values.
+- **Inline**: numeric values are shown directly on the drawing (e.g., "0.50" pointing to a feature).
 
 ## Common Dimension Label Semantics
 
@@ -124,12 +114,26 @@ For UDFN/QFN/SOIC packages, labels typically mean:
 - **Pad width (X1, b)** = width of ONE pad's copper (typically 40-70% of pitch)
 - If E = 0.50mm, the pad width is probably 0.25-0.35mm, NOT 0.50mm
 
-## Output Schema
-```json
-{schema}
-```
+Analyze the image and report the metadata with the emit_table_analysis tool."""
+
+
+# Compiled validator for Stage 1 responses (raises fastjsonschema.JsonSchemaException)
+validate_stage1 = fastjsonschema.compile(STAGE1_SCHEMA)
+
+# Shared by every request, so read-only like the single-pass schema
+STAGE1_SCHEMA = _freeze(STAGE1_SCHEMA)
+
+# Stage 1 output is constrained by a forced tool call, so the schema never
+# has to be stringified into the prompt
+STAGE1_TOOL_NAME = "emit_table_analysis"
 
-Return ONLY valid JSON, no other text. Analyze the image and extract the metadata:"""
+STAGE1_TOOL = _freeze({
+    "name": STAGE1_TOOL_NAME,
+    "description": "Record the drawing format, parsed dimension table and package metadata.",
+    "input_schema": STAGE1_SCHEMA,
+})
+
+STAGE1_TOOL_CHOICE = _freeze({"type": "tool", "name": STAGE1_TOOL_NAME})
 
 
 def get_stage1_prompt() -> str:
@@ -137,10 +141,23 @@ def get_stage1_prompt() -> str:
     Get the Stage 1 prompt for scene analysis and table parsing.
 
     Returns:
-        Complete prompt string with schema embedded.
+        Complete prompt string (the schema is supplied via STAGE1_TOOL).
+    """
+    return STAGE1_PROMPT
+
+
+def get_stage1_prompt_blocks() -> list[dict]:
+    """
+    Get the Stage 1 prompt as message content blocks.
+
+    The prompt (with the tool definition) is shorter than the minimum
+    cacheable prefix, so it carries no cache_control marker. Images must
+    be appended after it.
+
+    Returns:
+        New list holding the Stage 1 prompt block.
     """
-    schema_str = json.dumps(STAGE1_SCHEMA, indent=2)
-    return STAGE1_PROMPT.format(schema=schema_str)
+    return [{"type": "text", "text": STAGE1_PROMPT}]
 
 
 # =============================================================================
@@ -163,10 +180,10 @@ STAGE2_SCHEMA = {
                 "type": "object",
                 "properties": {
                     "designator": {"type": "string", "description": "Pin number (1, 2, 3...) or EP for thermal pad"},
-                    "x": {"type": "number", "description": "X position of pad CENTER in mm (origin at component center)"},
-                    "y": {"type": "number", "description": "Y position of pad CENTER in mm (origin at component center)"},
-                    "width": {"type": "number", "description": "Pad width (X dimension) in mm"},
-                    "height": {"type": "number", "description": "Pad height (Y dimension) in mm"},
+                    "x": {"type": "number", "description": "Pad CENTER X in mm"},
+                    "y": {"type": "number", "description": "Pad CENTER Y in mm"},
+                    "width": {"type": "number", "description": "X size in mm"},
+                    "height": {"type": "number", "description": "Y size in mm"},
                     "shape": {"type": "string", "enum": ["rectangular", "round", "oval", "rounded_rectangle"]},
                     "pad_type": {"type": "string", "enum": ["smd", "th"]},
                     "rotation": {"type": "number", "description": "Rotation in degrees (0 = no rotation)"},
@@ -211,8 +228,29 @@ STAGE2_SCHEMA = {
     "required": ["footprint_name", "pads", "vias", "outline", "pin1_location", "overall_confidence"]
 }
 
-STAGE2_PROMPT_TEMPLATE = """You are extracting precise PCB footprint geometry from a datasheet image.
+# Static instructions, rendered once per thermal variant below. Identical on
+# every request of a variant; the per-request Stage 1 context follows them.
+_STAGE2_STATIC_TEMPLATE = """You are extracting precise PCB footprint geometry from a datasheet image.
 
+## Your Task
+Using the Stage 1 dimension values given below, extract the COMPLETE footprint geometry: {scope} and the Pin 1 location.
+
+## Coordinate System
+Origin (0,0) at the COMPONENT CENTER, +X RIGHT, +Y UP, all dimensions in MILLIMETERS.
+
+## Pad Orientation (Pads on Left/Right Sides)
+Pads on the LEFT and RIGHT sides extend HORIZONTALLY toward the center, so the datasheet "pad length" (Y1, L) becomes the output **width** and the "pad width" (X1, b) becomes the output **height** - the OPPOSITE of what the variable names suggest.
+Example (UDFN-8): X1 = 0.30mm, Y1 = 0.85mm → width = 0.85, height = 0.30.
+
+## Position Calculation
+- Pad Y positions come from pitch: with E = 0.5mm and 4 pads per side, y = +0.75, +0.25, -0.25, -0.75
+- Pad X position comes from G1 (pad center to component center distance)
+{via_layout}
+Report the geometry with the emit_footprint_geometry tool.
+"""
+
+# Per-request Stage 1 context, appended after the static prefix
+STAGE2_CONTEXT_TEMPLATE = """
 ## Stage 1 Analysis (Already Completed)
 The image has been analyzed and the following was determined:
 
@@ -230,67 +268,103 @@ The image has been analyzed and the following was determined:
 **Dimension Semantics (what each label means):**
 {dimension_semantics_formatted}
 
-## Your Task
-Using the dimension values above, extract the COMPLETE footprint geometry:
-1. Calculate exact pad positions using the parsed dimension values
-2. Create ALL pads (including thermal pad if present)
-3. Create thermal vias if present
-4. Identify Pin 1 location
-
-## Coordinate System
-- Origin (0,0) is at the COMPONENT CENTER
-- +X points RIGHT
-- +Y points UP
-- All dimensions in MILLIMETERS
-
 ## CRITICAL: Using the Dimension Table Correctly
-
 You MUST use the parsed dimension values from Stage 1. Do NOT re-read values from the image.
 
 For this {package_type} package with {pad_arrangement} arrangement:
 {dimension_usage_guide}
+Extract the complete footprint geometry:"""
 
-## CRITICAL: Pad Orientation for UDFN/QFN/SOIC (Pads on Left/Right Sides)
+STAGE2_TOOL_NAME = "emit_footprint_geometry"
 
-For packages with pads on the LEFT and RIGHT sides (not top/bottom):
-- Pads extend HORIZONTALLY toward the component center
-- The "pad length" dimension (Y1, L) is the HORIZONTAL extent = OUTPUT **WIDTH**
-- The "pad width" dimension (X1, b) is the VERTICAL extent = OUTPUT **HEIGHT**
+STAGE2_TOOL_CHOICE = _freeze({"type": "tool", "name": STAGE2_TOOL_NAME})
 
-**Example for UDFN-8:**
-- Datasheet says: X1 = 0.30mm (pad width), Y1 = 0.85mm (pad length)
-- For pads on left/right sides, output should be:
-  - width = 0.85mm (the longer dimension, extending toward center)
-  - height = 0.30mm (the shorter dimension)
 
-**This is the OPPOSITE of what the variable names suggest!**
-- "Pad length" (Y1) → output width (because pads extend horizontally)
-- "Pad width" (X1) → output height
+class Stage2Variant(NamedTuple):
+    """
+    Stage 2 prompt prefix, tool and validator for one thermal regime.
+
+    Packages without thermal vias get a schema without the vias array and
+    no via grid rule; packages without a thermal pad also lose the EP
+    designator hint. This keeps both the prompt and the constrained output
+    space no larger than the package needs.
+
+    Attributes:
+        prompt_static: Cacheable instruction prefix
+        tool: Forced tool definition carrying the variant's schema
+        validate: Compiled validator for the variant's schema
+            (raises fastjsonschema.JsonSchemaException)
+    """
+    prompt_static: str
+    tool: dict
+    validate: Callable[[dict], dict]
+
+
+def _build_stage2_variant(scope: str, via_layout: str, schema: dict) -> Stage2Variant:
+    """Render the static prompt, read-only tool and validator for one thermal regime."""
+    return Stage2Variant(
+        prompt_static=_STAGE2_STATIC_TEMPLATE.format(scope=scope, via_layout=via_layout),
+        tool=_freeze({
+            "name": STAGE2_TOOL_NAME,
+            "description": "Record the footprint geometry derived from the Stage 1 dimensions.",
+            "input_schema": schema,
+        }),
+        validate=fastjsonschema.compile(schema),
+    )
 
-## Example Pad Position Calculation for UDFN/QFN
 
-If pitch (E) = 0.5mm and there are 4 pads per side:
-- Pad 1: y = +1.5 * 0.5 = +0.75mm
-- Pad 2: y = +0.5 * 0.5 = +0.25mm
-- Pad 3: y = -0.5 * 0.5 = -0.25mm
-- Pad 4: y = -1.5 * 0.5 = -0.75mm
+_STAGE2_SCHEMA_NO_VIAS = copy.deepcopy(STAGE2_SCHEMA)
+del _STAGE2_SCHEMA_NO_VIAS["properties"]["vias"]
+_STAGE2_SCHEMA_NO_VIAS["required"].remove("vias")
+
+_STAGE2_SCHEMA_NO_THERMAL = copy.deepcopy(_STAGE2_SCHEMA_NO_VIAS)
+_STAGE2_SCHEMA_NO_THERMAL["properties"]["pads"]["items"]["properties"]["designator"]["description"] = (
+    "Pin number (1, 2, 3...)"
+)
+
+# Frozen only after the pruned variants are derived (deepcopy of a frozen
+# schema returns the same object)
+STAGE2_SCHEMA = _freeze(STAGE2_SCHEMA)
+
+_STAGE2_VARIANT_NO_THERMAL = _build_stage2_variant("every pad", "", _STAGE2_SCHEMA_NO_THERMAL)
+_STAGE2_VARIANT_THERMAL = _build_stage2_variant(
+    "every pad (including the thermal pad)", "", _STAGE2_SCHEMA_NO_VIAS
+)
+_STAGE2_VARIANT_THERMAL_VIAS = _build_stage2_variant(
+    "every pad (including the thermal pad), the thermal vias,",
+    "- Vias form a grid at via pitch (EV) centered in the thermal pad: EV = 1.0mm in a 2x2 grid → (±0.5, ±0.5)\n",
+    STAGE2_SCHEMA,
+)
+
+# Keyed by (has_thermal_pad, has_thermal_vias); vias imply a thermal pad
+_STAGE2_VARIANTS = {
+    (False, False): _STAGE2_VARIANT_NO_THERMAL,
+    (True, False): _STAGE2_VARIANT_THERMAL,
+    (True, True): _STAGE2_VARIANT_THERMAL_VIAS,
+    (False, True): _STAGE2_VARIANT_THERMAL_VIAS,
+}
 
-The X position comes from G1 (pad center to component center distance).
+# The full variant: every field of STAGE2_SCHEMA
+STAGE2_PROMPT_STATIC = _STAGE2_VARIANT_THERMAL_VIAS.prompt_static
+STAGE2_PROMPT_TEMPLATE = STAGE2_PROMPT_STATIC + STAGE2_CONTEXT_TEMPLATE
+STAGE2_TOOL = _STAGE2_VARIANT_THERMAL_VIAS.tool
+validate_stage2 = _STAGE2_VARIANT_THERMAL_VIAS.validate
 
-## Via Grid Calculation
 
-If via pitch (EV) = 1.0mm and thermal pad has room for a 2x2 grid:
-- Via 1: (x=-0.5, y=+0.5)
-- Via 2: (x=+0.5, y=+0.5)
-- Via 3: (x=-0.5, y=-0.5)
-- Via 4: (x=+0.5, y=-0.5)
+def get_stage2_variant(stage1_result: dict) -> Stage2Variant:
+    """
+    Select the Stage 2 variant matching the Stage 1 thermal flags.
 
-## Output Schema
-```json
-{schema}
-```
+    Args:
+        stage1_result: Output from Stage 1 analysis.
 
-Return ONLY valid JSON. Extract the complete footprint geometry:"""
+    Returns:
+        Prebuilt Stage2Variant for the package's thermal pad / via regime.
+    """
+    return _STAGE2_VARIANTS[
+        bool(stage1_result.get("has_thermal_pad")),
+        bool(stage1_result.get("has_thermal_vias")),
+    ]
 
 
 def get_stage2_prompt(stage1_result: dict) -> str:
@@ -302,22 +376,84 @@ def get_stage2_prompt(stage1_result: dict) -> str:
                        and package metadata.
 
     Returns:
-        Complete prompt string with Stage 1 context and schema embedded.
+        Complete prompt string with Stage 1 context (the schema is supplied
+        via the variant's tool, see get_stage2_variant).
+    """
+    return get_stage2_variant(stage1_result).prompt_static + _stage2_context(stage1_result)
+
+
+def get_stage2_prompt_blocks(stage1_result: dict) -> list[dict]:
+    """
+    Get the Stage 2 prompt as message content blocks.
+
+    The static instructions of the matching variant form the first block and
+    the Stage 1 context the second. Neither is a cache breakpoint: the static
+    prefix is shorter than the minimum cacheable length. Images must be
+    appended after these blocks.
+
+    Args:
+        stage1_result: Output from Stage 1 analysis.
+
+    Returns:
+        New list of [static prefix block, Stage 1 context block].
     """
+    return [
+        {"type": "text", "text": get_stage2_variant(stage1_result).prompt_static},
+        {"type": "text", "text": _stage2_context(stage1_result)},
+    ]
+
+
+def _stage2_context(stage1_result: dict) -> str:
+    """
+    Render the per-request Stage 1 context section of the Stage 2 prompt.
+
+    Retries and tier escalation re-send the same Stage 1 result, so
+    rendering is memoized on a normalized tuple of the fields it reads.
+    Table and semantics items keep their insertion order, which is the
+    order the lines are rendered in.
+    """
+    key = (
+        stage1_result.get("drawing_format", "unknown"),
+        stage1_result.get("package_type", "unknown"),
+        stage1_result.get("pad_arrangement", "unknown"),
+        stage1_result.get("estimated_pad_count", "unknown"),
+        stage1_result.get("has_thermal_pad", False),
+        stage1_result.get("has_thermal_vias", False),
+        stage1_result.get("units_detected", "mm"),
+        tuple(stage1_result.get("dimension_table", {}).items()),
+        tuple(stage1_result.get("dimension_semantics", {}).items()),
+    )
+    try:
+        return _render_stage2_context(*key)
+    except TypeError:
+        # Unhashable values in a malformed Stage 1 result; render uncached
+        return _render_stage2_context.__wrapped__(*key)
+
+
+@functools.lru_cache(maxsize=128, typed=True)
+def _render_stage2_context(
+    drawing_format,
+    package_type,
+    pad_arrangement,
+    estimated_pad_count,
+    has_thermal,
+    has_vias,
+    units_detected,
+    dim_items: tuple,
+    sem_items: tuple,
+) -> str:
+    """Render the Stage 1 context section from normalized Stage 1 fields."""
     # Format dimension table
-    dim_table = stage1_result.get("dimension_table", {})
-    dim_table_lines = [f"  - {k} = {v}mm" for k, v in dim_table.items()]
-    dimension_table_formatted = "\n".join(dim_table_lines) if dim_table_lines else "  (no table found)"
+    dim_table = dict(dim_items)
+    dimension_table_formatted = (
+        "\n".join(f"  - {k} = {v}mm" for k, v in dim_table.items()) or "  (no table found)"
+    )
 
     # Format dimension semantics
-    semantics = stage1_result.get("dimension_semantics", {})
-    sem_lines = [f"  - {k}: {v}" for k, v in semantics.items() if v]
-    dimension_semantics_formatted = "\n".join(sem_lines) if sem_lines else "  (no semantics identified)"
-
-    # Generate dimension usage guide based on package type
-    pkg_type = stage1_result.get("package_type", "").upper()
-    has_thermal = stage1_result.get("has_thermal_pad", False)
-    has_vias = stage1_result.get("has_thermal_vias", False)
+    semantics = dict(sem_items)
+    dimension_semantics_formatted = (
+        "\n".join(f"  - {k}: {v}" for k, v in semantics.items() if v) or "  (no semantics identified)"
+    )
 
     # Get specific dimension labels
     pad_width_label = semantics.get("pad_width_label", "X1")
@@ -326,64 +462,65 @@ def get_stage2_prompt(stage1_result: dict) -> str:
     thermal_width_label = semantics.get("thermal_width_label", "X2")
     thermal_height_label = semantics.get("thermal_height_label", "Y2")
 
+    # Resolve every referenced label against the table in one pass
+    pad_width_val, pad_height_val, pitch_val, thermal_width_val, thermal_height_val, via_val, via_pitch_val = (
+        dim_table.get(label, '?')
+        for label in (pad_width_label, pad_height_label, pitch_label,
+                      thermal_width_label, thermal_height_label, "V", "EV")
+    )
+
     # For peripheral packages (UDFN, QFN, SOIC) with pads on left/right sides,
     # the "pad length" extends toward center (horizontal) and becomes OUTPUT WIDTH
-    pad_arrangement = stage1_result.get("pad_arrangement", "").lower()
-    is_peripheral = pad_arrangement in ["peripheral", "dual_row"]
-
-    pad_width_val = dim_table.get(pad_width_label, '?')
-    pad_height_val = dim_table.get(pad_height_label, '?')
+    is_peripheral = str(pad_arrangement).lower() in ["peripheral", "dual_row"]
 
+    guide_parts = []
     if is_peripheral:
         # For left/right pads: length (Y1) -> width, width (X1) -> height
-        usage_guide = f"""
+        guide_parts.append(f"""
 **For signal pads on LEFT and RIGHT sides:**
 IMPORTANT: Pads extend horizontally toward center, so dimensions are SWAPPED:
 - OUTPUT width = {pad_height_label} = {pad_height_val}mm (the longer "length" dimension)
 - OUTPUT height = {pad_width_label} = {pad_width_val}mm (the shorter "width" dimension)
-- Pitch (spacing) = {pitch_label} = {dim_table.get(pitch_label, '?')}mm
+- Pitch (spacing) = {pitch_label} = {pitch_val}mm
 - Use pitch to calculate Y positions of pads
-"""
+""")
     else:
-        usage_guide = f"""
+        guide_parts.append(f"""
 **For signal pads:**
 - Pad width = {pad_width_label} = {pad_width_val}mm
 - Pad height = {pad_height_label} = {pad_height_val}mm
-- Pitch (spacing) = {pitch_label} = {dim_table.get(pitch_label, '?')}mm
-"""
+- Pitch (spacing) = {pitch_label} = {pitch_val}mm
+""")
 
     if has_thermal:
-        usage_guide += f"""
+        guide_parts.append(f"""
 **For thermal pad (designate as 'EP' or '9'):**
-- Width = {thermal_width_label} = {dim_table.get(thermal_width_label, '?')}mm
-- Height = {thermal_height_label} = {dim_table.get(thermal_height_label, '?')}mm
+- Width = {thermal_width_label} = {thermal_width_val}mm
+- Height = {thermal_height_label} = {thermal_height_val}mm
 - Position at center (x=0, y=0)
-"""
+""")
 
     if has_vias:
-        v_label = "V"
-        ev_label = "EV"
-        usage_guide += f"""
+        guide_parts.append(f"""
 **For thermal vias:**
-- Via drill diameter = {v_label} = {dim_table.get(v_label, dim_table.get('V', '?'))}mm
-- Via pitch = {ev_label} = {dim_table.get(ev_label, dim_table.get('EV', '?'))}mm
+- Via drill diameter = V = {via_val}mm
+- Via pitch = EV = {via_pitch_val}mm
 - Calculate grid positions based on pitch within thermal pad area
 - Outer diameter = drill + 0.3mm (typical annular ring)
-"""
-
-    # Build final prompt
-    schema_str = json.dumps(STAGE2_SCHEMA, indent=2)
-
-    return STAGE2_PROMPT_TEMPLATE.format(
-        drawing_format=stage1_result.get("drawing_format", "unknown"),
-        package_type=stage1_result.get("package_type", "unknown"),
-        pad_arrangement=stage1_result.get("pad_arrangement", "unknown"),
-        estimated_pad_count=stage1_result.get("estimated_pad_count", "unknown"),
-        has_thermal_pad=stage1_result.get("has_thermal_pad", False),
-        has_thermal_vias=stage1_result.get("has_thermal_vias", False),
-        units_detected=stage1_result.get("units_detected", "mm"),
+""")
+
+    usage_guide = "".join(guide_parts)
+
+    # Build the Stage 1 context section
+    return STAGE2_CONTEXT_TEMPLATE.format(
+        drawing_format=drawing_format,
+        package_type=package_type,
+        pad_arrangement=pad_arrangement,
+        estimated_pad_count=estimated_pad_count,
+        has_thermal_pad=has_thermal,
+        has_thermal_vias=has_vias,
+        units_detected=units_detected,
         dimension_table_formatted=dimension_table_formatted,
         dimension_semantics_formatted=dimension_semantics_formatted,
         dimension_usage_guide=usage_guide,
-        schema=schema_str,
     )
@@ -11,8 +11,20 @@ Usage:
 
 Or run a single image:
     python run_extraction_test.py path/to/image.png
+
+Or submit all images as one Message Batch (half price, minutes-scale latency):
+    python run_extraction_test.py --batch
+
+Images are extracted up to 8 at a time; to run them one by one:
+    python run_extraction_test.py --concurrency 1
 """
 
+import asyncio
+import contextlib
+import functools
+import io
+import math
+import mimetypes
 import sys
 import os
 from pathlib import Path
@@ -20,9 +32,16 @@ from pathlib import Path
 # Add backend directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from extraction import FootprintExtractor, estimate_cost
+from extraction import FootprintExtractor, extract_many
 from models import PadShape, PadType
 
+# Separator lines around report sections and the pad table
+SECTION_SEPARATOR = "=" * 70
+TABLE_SEPARATOR = "-" * 100
+
+# Images extracted at once by default; the calls are network-bound
+DEFAULT_CONCURRENCY = 8
+
 
 # =============================================================================
 # Ground Truth Data for Comparison
@@ -141,39 +160,54 @@ SAMTEC_GROUND_TRUTH = {
     ]
 }
 
+# Position/dimension match tolerance in mm (relaxed for rotation handling)
+GROUND_TRUTH_TOLERANCE = 0.1
+
+# Pads off by more than this many tolerances are reported for position only;
+# their dimensions would be compared against a different pad
+GROSS_POSITION_ERROR_FACTOR = 10
 
-def get_ground_truth_for_image(image_name: str) -> dict | None:
+# Alternate designator mappings (extraction -> ground truth)
+DESIGNATOR_ALIASES = {
+    "EP": "9", "ep": "9", "THERMAL": "9", "thermal": "9", "GND": "9",
+}
+
+
+# (filename substrings, ground truth) pairs, checked in order (first match wins)
+GROUND_TRUTH_PATTERNS = (
+    (("so-8ep", "so8ep"), SO_8EP_GROUND_TRUTH),
+    (("rj45", "lpjg"), RJ45_GROUND_TRUTH),
+    (("usb3", "usb_3"), USB3_GROUND_TRUTH),
+    (("m2", "mini_pcie", "minipcie"), M2_GROUND_TRUTH),
+    (("samtec", "hle"), SAMTEC_GROUND_TRUTH),
+)
+
+
+@functools.lru_cache(maxsize=256)
+def get_ground_truth_for_image(name_lower: str) -> dict | None:
     """
     Get ground truth data for an image by matching filename patterns.
 
+    The caller passes the filename already lowercased, so case variants of
+    one name also share a cache entry.
+
+    Results are memoized and shared module-level dicts; treat them as
+    read-only.
+
     Returns None if no ground truth is available.
     """
-    name_lower = image_name.lower()
-
-    if "so-8ep" in name_lower or "so8ep" in name_lower:
-        return SO_8EP_GROUND_TRUTH
-    elif "rj45" in name_lower or "lpjg" in name_lower:
-        return RJ45_GROUND_TRUTH
-    elif "usb3" in name_lower or "usb_3" in name_lower:
-        return USB3_GROUND_TRUTH
-    elif "m2" in name_lower or "mini_pcie" in name_lower or "minipcie" in name_lower:
-        return M2_GROUND_TRUTH
-    elif "samtec" in name_lower or "hle" in name_lower:
-        return SAMTEC_GROUND_TRUTH
+    for patterns, ground_truth in GROUND_TRUTH_PATTERNS:
+        if any(pattern in name_lower for pattern in patterns):
+            return ground_truth
 
     return None
 
 
-def print_separator(char="-", length=70):
-    """Print a separator line."""
-    print(char * length)
-
-
 def print_extraction_result(result, image_name: str):
     """Pretty-print extraction results."""
-    print_separator("=")
+    print(SECTION_SEPARATOR)
     print(f"EXTRACTION RESULTS: {image_name}")
-    print_separator("=")
+    print(SECTION_SEPARATOR)
 
     if not result.success:
         print(f"❌ EXTRACTION FAILED: {result.error}")
@@ -182,7 +216,7 @@ def print_extraction_result(result, image_name: str):
     print(f"✅ Extraction successful!")
     print(f"   Model: {result.model_used}")
     print(f"   Tokens: {result.input_tokens} in, {result.output_tokens} out")
-    print(f"   Est. cost: ${estimate_cost(result.input_tokens, result.output_tokens):.4f}")
+    print(f"   Est. cost: ${result.cost_usd:.4f}")
     print()
 
     fp = result.footprint
@@ -203,27 +237,30 @@ def print_extraction_result(result, image_name: str):
         print()
 
     print(f"Pads ({len(fp.pads)}):")
-    print_separator("-", 100)
+    print(TABLE_SEPARATOR)
     print(f"{'#':<4} {'Desig':<6} {'X':>8} {'Y':>8} {'W':>7} {'H':>7} {'Drill':>6} {'Rot':>5} {'Shape':<12} {'Type':<5} {'Conf':>5}")
-    print_separator("-", 100)
+    print(TABLE_SEPARATOR)
 
+    # Build the rows first and write the table in one call
+    raw_pads = (result.raw_response or {}).get("pads") or []
+    pad_confs = [f"{raw_pad.get('confidence', 0):.2f}" for raw_pad in raw_pads]
+    rows = []
     for i, pad in enumerate(fp.pads):
         # Get confidence from raw response if available
-        conf = ""
-        if result.raw_response and "pads" in result.raw_response:
-            if i < len(result.raw_response["pads"]):
-                conf = f"{result.raw_response['pads'][i].get('confidence', 0):.2f}"
+        conf = pad_confs[i] if i < len(pad_confs) else ""
 
         # Get drill diameter if available
         drill_str = ""
         if pad.drill and pad.drill.diameter:
             drill_str = f"{pad.drill.diameter:.2f}"
 
-        print(f"{i+1:<4} {pad.designator:<6} {pad.x:>8.3f} {pad.y:>8.3f} "
-              f"{pad.width:>7.3f} {pad.height:>7.3f} {drill_str:>6} {pad.rotation:>5.0f} "
-              f"{pad.shape.value:<12} {pad.pad_type.value:<5} {conf:>5}")
+        rows.append(f"{i+1:<4} {pad.designator:<6} {pad.x:>8.3f} {pad.y:>8.3f} "
+                    f"{pad.width:>7.3f} {pad.height:>7.3f} {drill_str:>6} {pad.rotation:>5.0f} "
+                    f"{pad.shape.value:<12} {pad.pad_type.value:<5} {conf:>5}")
+    if rows:
+        print("\n".join(rows))
 
-    print_separator("-", 100)
+    print(TABLE_SEPARATOR)
     print()
 
 
@@ -235,6 +272,8 @@ def compare_to_ground_truth(result, ground_truth: dict) -> dict:
     - Alternate designators (EP, 9, thermal for thermal pad)
     - 90° rotation differences between extraction and ground truth
     - Width/height swaps due to rotation
+
+    Pads grossly out of position are not checked for dimensions.
     """
     if not result.success:
         return {"error": "Extraction failed"}
@@ -249,25 +288,15 @@ def compare_to_ground_truth(result, ground_truth: dict) -> dict:
         "rotation_detected": False,
     }
 
-    # Alternate designator mappings (extraction -> ground truth)
-    designator_aliases = {
-        "EP": "9", "ep": "9", "THERMAL": "9", "thermal": "9", "GND": "9",
-    }
+    # Index pads by designator and by alias; the first pad claiming a key wins
+    pad_by_designator = {}
+    for pad in fp.pads:
+        pad_by_designator.setdefault(pad.designator, pad)
+        pad_by_designator.setdefault(DESIGNATOR_ALIASES.get(pad.designator, pad.designator), pad)
 
     # Compare individual pads
     for expected in ground_truth["expected_pads"]:
-        # Find matching pad by designator (with aliases)
-        actual = None
-        for pad in fp.pads:
-            pad_desig = pad.designator
-            # Check direct match or alias
-            if pad_desig == expected["designator"]:
-                actual = pad
-                break
-            if designator_aliases.get(pad_desig) == expected["designator"]:
-                actual = pad
-                break
-
+        actual = pad_by_designator.get(expected["designator"])
         if actual is None:
             comparisons["pad_errors"].append({
                 "designator": expected["designator"],
@@ -275,52 +304,36 @@ def compare_to_ground_truth(result, ground_truth: dict) -> dict:
             })
             continue
 
-        # Try both orientations for position comparison
-        # Original orientation
-        x_error_orig = abs(actual.x - expected["x"])
-        y_error_orig = abs(actual.y - expected["y"])
-
-        # 90° rotated (swap X and Y, may need sign flip)
-        x_error_rot = abs(actual.y - expected["x"])  # actual.y matches expected.x
-        y_error_rot = abs(actual.x - expected["y"])  # actual.x matches expected.y
-
-        # Also try with sign flips for different rotation directions
-        x_error_rot2 = abs(-actual.y - expected["x"])
-        y_error_rot2 = abs(actual.x - expected["y"])
-
-        # Find best position match
-        pos_error_orig = max(x_error_orig, y_error_orig)
-        pos_error_rot = max(x_error_rot, y_error_rot)
-        pos_error_rot2 = max(x_error_rot2, y_error_rot2)
-
-        best_pos_error = min(pos_error_orig, pos_error_rot, pos_error_rot2)
-        if best_pos_error == pos_error_rot or best_pos_error == pos_error_rot2:
-            comparisons["rotation_detected"] = True
-
-        # Compare dimensions (width/height might be swapped due to rotation)
-        w_error_orig = abs(actual.width - expected["width"])
-        h_error_orig = abs(actual.height - expected["height"])
-
-        # Swapped (rotation swaps width/height)
-        w_error_swap = abs(actual.width - expected["height"])
-        h_error_swap = abs(actual.height - expected["width"])
-
-        dim_error_orig = max(w_error_orig, h_error_orig)
-        dim_error_swap = max(w_error_swap, h_error_swap)
-
-        best_dim_error = min(dim_error_orig, dim_error_swap)
-
-        # Report errors
-        tolerance = 0.1  # 0.1mm tolerance (relaxed for rotation handling)
-
-        if best_pos_error > tolerance:
+        # Best position error over the original orientation and both 90°
+        # rotations (X and Y swapped, with and without a sign flip on X).
+        # The rotations are only tried when the original orientation misses;
+        # they share the Y error, so only the X error differs.
+        best_pos_error = max(abs(actual.x - expected["x"]), abs(actual.y - expected["y"]))
+        if best_pos_error > GROUND_TRUTH_TOLERANCE:
+            pos_error_rot = max(
+                min(abs(actual.y - expected["x"]), abs(actual.y + expected["x"])),
+                abs(actual.x - expected["y"]),
+            )
+            if pos_error_rot <= best_pos_error:
+                best_pos_error = pos_error_rot
+                comparisons["rotation_detected"] = True
+
+        if best_pos_error > GROUND_TRUTH_TOLERANCE:
             comparisons["pad_errors"].append({
                 "designator": expected["designator"],
                 "position_error": best_pos_error,
                 "note": "Position mismatch" + (" (rotation adjusted)" if comparisons["rotation_detected"] else "")
             })
+            if best_pos_error > GROSS_POSITION_ERROR_FACTOR * GROUND_TRUTH_TOLERANCE:
+                continue
 
-        if best_dim_error > tolerance:
+        # Compare dimensions (width/height might be swapped due to rotation)
+        best_dim_error = min(
+            max(abs(actual.width - expected["width"]), abs(actual.height - expected["height"])),
+            max(abs(actual.width - expected["height"]), abs(actual.height - expected["width"])),
+        )
+
+        if best_dim_error > GROUND_TRUTH_TOLERANCE:
             comparisons["dimension_errors"].append({
                 "designator": expected["designator"],
                 "expected_w": expected["width"],
@@ -335,9 +348,9 @@ def compare_to_ground_truth(result, ground_truth: dict) -> dict:
 
 def print_ground_truth_comparison(result, ground_truth: dict, name: str):
     """Print ground truth comparison."""
-    print_separator("=")
+    print(SECTION_SEPARATOR)
     print(f"GROUND TRUTH COMPARISON: {name}")
-    print_separator("=")
+    print(SECTION_SEPARATOR)
 
     comp = compare_to_ground_truth(result, ground_truth)
 
@@ -381,23 +394,71 @@ def print_ground_truth_comparison(result, ground_truth: dict, name: str):
 
 def run_extraction_test(image_path: Path, extractor: FootprintExtractor) -> dict:
     """Run extraction on a single image."""
+    result = extractor.extract_from_image(image_path)
+    return report_extraction_result(image_path, result)
+
+
+def load_images(image_paths: list[Path]) -> list[tuple[bytes, str]]:
+    """Read image files as (bytes, media_type) tuples."""
+    return [
+        (path.read_bytes(), mimetypes.guess_type(path.name)[0] or "image/png")
+        for path in image_paths
+    ]
+
+
+def run_batch_extraction_test(image_paths: list[Path], extractor: FootprintExtractor) -> list:
+    """Run extraction on all images as one Message Batch."""
+    images = load_images(image_paths)
+    print(f"\n📦 Submitting batch of {len(images)} images (this may take several minutes)...")
+    results = extractor.extract_batch(images)
+    return [report_extraction_result(path, result) for path, result in zip(image_paths, results)]
+
+
+def run_concurrent_extraction_test(image_paths: list[Path], model: str, concurrency: int) -> list:
+    """Run extraction on all images concurrently, up to `concurrency` at once."""
+    print(f"\n⚡ Extracting {len(image_paths)} images, {concurrency} at a time...")
+    results = asyncio.run(extract_many(load_images(image_paths), model=model, concurrency=concurrency))
+    return [report_extraction_result(path, result) for path, result in zip(image_paths, results)]
+
+
+def write_buffered(print_fn, *args):
+    """
+    Run a print_* function and write its output to stdout in one call.
+
+    Reports are assembled in memory rather than emitted as dozens of
+    small writes.
+    """
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        print_fn(*args)
+    sys.stdout.write(buf.getvalue())
+    sys.stdout.flush()
+
+
+def report_extraction_result(image_path: Path, result) -> dict:
+    """Print an extraction result and compare it to ground truth."""
+    write_buffered(print_extraction_report, image_path, result)
+    return result
+
+
+def print_extraction_report(image_path: Path, result):
+    """Print the full report for one image: result, then ground truth comparison."""
     print(f"\n📷 Testing: {image_path.name}")
     print(f"   Path: {image_path}")
 
-    result = extractor.extract_from_image(image_path)
     print_extraction_result(result, image_path.name)
 
     # Compare to ground truth if available
-    ground_truth = get_ground_truth_for_image(image_path.name)
+    ground_truth = get_ground_truth_for_image(image_path.name.lower())
     if ground_truth:
         # Only compare if we have expected pads defined
         if ground_truth.get("expected_pads"):
             print_ground_truth_comparison(result, ground_truth, ground_truth["name"])
         else:
             # Show notes about what we know
-            print_separator("=")
+            print(SECTION_SEPARATOR)
             print(f"GROUND TRUTH: {ground_truth['name']}")
-            print_separator("=")
+            print(SECTION_SEPARATOR)
             if ground_truth.get("pad_count"):
                 actual_count = len(result.footprint.pads) if result.success else 0
                 expected = ground_truth["pad_count"]
@@ -410,7 +471,27 @@ def run_extraction_test(image_path: Path, extractor: FootprintExtractor) -> dict
             print("\n⚠️  Detailed pad comparison not available - ground truth needs values")
             print()
 
-    return result
+
+def print_summary(results: dict, total_cost: float):
+    """Print the success count, total cost and per-image outcome."""
+    print(SECTION_SEPARATOR)
+    print("SUMMARY")
+    print(SECTION_SEPARATOR)
+
+    success_count = sum(1 for r in results.values() if r.success)
+    print(f"Successful extractions: {success_count}/{len(results)}")
+    print(f"Total estimated cost: ${total_cost:.4f}")
+
+    print()
+    print("Results by image:")
+    for name, result in results.items():
+        status = "✅" if result.success else "❌"
+        if result.success:
+            conf = result.extraction_result.overall_confidence
+            pads = len(result.footprint.pads)
+            print(f"  {status} {name}: {pads} pads, confidence {conf:.2f}")
+        else:
+            print(f"  {status} {name}: {result.error}")
 
 
 def main():
@@ -421,11 +502,15 @@ def main():
     parser.add_argument("image", nargs="?", help="Path to image file (optional, tests all if omitted)")
     parser.add_argument("--model", "-m", choices=["haiku", "sonnet", "opus"], default="haiku",
                         help="Model to use (default: haiku)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Submit all images as one Message Batch instead of one call each")
+    parser.add_argument("--concurrency", "-c", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Number of images to extract at once (default: {DEFAULT_CONCURRENCY})")
     args = parser.parse_args()
 
-    print_separator("=")
+    print(SECTION_SEPARATOR)
     print("PCB FOOTPRINT EXTRACTION TEST - SPIKE 2")
-    print_separator("=")
+    print(SECTION_SEPARATOR)
 
     # Check for API key
     api_key = os.environ.get("ANTHROPIC_API_KEY")
@@ -461,7 +546,12 @@ def main():
             print(f"❌ Example directory not found: {example_dir}")
             sys.exit(1)
 
-        images = sorted(example_dir.glob("*.png"))
+        with os.scandir(example_dir) as entries:
+            images = sorted(
+                (Path(entry.path) for entry in entries
+                 if entry.name.endswith(".png") and entry.is_file()),
+                key=lambda path: path.name,
+            )
         if not images:
             print(f"❌ No PNG images found in {example_dir}")
             sys.exit(1)
@@ -469,36 +559,23 @@ def main():
         print(f"📁 Found {len(images)} example images")
 
     # Run extraction on each image
-    results = {}
-    total_cost = 0.0
+    concurrency = min(args.concurrency, len(images))
 
-    for image_path in images:
-        result = run_extraction_test(image_path, extractor)
-        results[image_path.name] = result
+    if args.batch:
+        image_results = run_batch_extraction_test(images, extractor)
+    elif concurrency > 1:
+        image_results = run_concurrent_extraction_test(images, args.model, concurrency)
+    else:
+        image_results = (run_extraction_test(image_path, extractor) for image_path in images)
 
-        if result.success:
-            cost = estimate_cost(result.input_tokens, result.output_tokens)
-            total_cost += cost
+    results = {image_path.name: result for image_path, result in zip(images, image_results)}
+    total_cost = math.fsum(
+        result.cost_usd
+        for result in results.values() if result.success
+    )
 
     # Summary
-    print_separator("=")
-    print("SUMMARY")
-    print_separator("=")
-
-    success_count = sum(1 for r in results.values() if r.success)
-    print(f"Successful extractions: {success_count}/{len(results)}")
-    print(f"Total estimated cost: ${total_cost:.4f}")
-
-    print()
-    print("Results by image:")
-    for name, result in results.items():
-        status = "✅" if result.success else "❌"
-        if result.success:
-            conf = result.extraction_result.overall_confidence
-            pads = len(result.footprint.pads)
-            print(f"  {status} {name}: {pads} pads, confidence {conf:.2f}")
-        else:
-            print(f"  {status} {name}: {result.error}")
+    write_buffered(print_summary, results, total_cost)
 
 
 if __name__ == "__main__":
@@ -15,25 +15,42 @@ Examples:
 
 import argparse
 import base64
-import json
+import mmap
 import os
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import anthropic
+from prompts_staged import (
+    STAGE1_TOOL,
+    STAGE1_TOOL_CHOICE,
+    STAGE2_TOOL_CHOICE,
+    get_stage1_prompt,
+    get_stage2_prompt,
+    get_stage2_variant,
+)
 
-# Load .env file if present
-try:
-    from dotenv import load_dotenv
-    load_dotenv(Path(__file__).parent.parent / ".env")
-except ImportError:
-    pass  # dotenv not installed, rely on environment
+# anthropic (and its httpx/pydantic stack) is imported in main(), so helpers
+# like encode_image can be imported without it
+if TYPE_CHECKING:
+    import anthropic
 
-from prompts_staged import get_stage1_prompt, get_stage2_prompt
+
+# Encoded images by (resolved path, mtime, size), so Stage 2 reuses Stage 1's payload
+_ENCODED_IMAGES: dict[tuple[str, int, int], tuple[str, str]] = {}
 
 
 def encode_image(image_path: Path) -> tuple[str, str]:
-    """Encode image to base64 and determine media type."""
+    """
+    Encode image to base64 and determine media type.
+
+    The encoding is cached until the file changes on disk.
+    """
+    stat = image_path.stat()
+    key = (str(image_path.resolve()), stat.st_mtime_ns, stat.st_size)
+    if key in _ENCODED_IMAGES:
+        return _ENCODED_IMAGES[key]
+
     suffix = image_path.suffix.lower()
     media_type_map = {
         ".png": "image/png",
@@ -44,13 +61,15 @@ def encode_image(image_path: Path) -> tuple[str, str]:
     }
     media_type = media_type_map.get(suffix, "image/png")
 
-    with open(image_path, "rb") as f:
-        image_base64 = base64.b64encode(f.read()).decode("utf-8")
+    # Encode straight from the mapped file rather than a read() copy
+    with open(image_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        image_base64 = base64.b64encode(mm).decode("ascii")
 
+    _ENCODED_IMAGES[key] = (image_base64, media_type)
     return image_base64, media_type
 
 
-def run_stage1(image_path: Path, client: anthropic.Anthropic) -> dict:
+def run_stage1(image_path: Path, client: "anthropic.Anthropic") -> dict:
     """
     Run Stage 1: Scene analysis and table parsing.
 
@@ -70,6 +89,8 @@ def run_stage1(image_path: Path, client: anthropic.Anthropic) -> dict:
     response = client.messages.create(
         model="claude-haiku-4-5-20251001",
         max_tokens=2048,
+        tools=[STAGE1_TOOL],
+        tool_choice=STAGE1_TOOL_CHOICE,
         messages=[
             {
                 "role": "user",
@@ -91,30 +112,12 @@ def run_stage1(image_path: Path, client: anthropic.Anthropic) -> dict:
         ],
     )
 
-    # Parse response
-    response_text = response.content[0].text
-
-    # Try to extract JSON
-    try:
-        # Direct parse
-        result = json.loads(response_text)
-    except json.JSONDecodeError:
-        # Try extracting from code block
-        if "```json" in response_text:
-            start = response_text.find("```json") + 7
-            end = response_text.find("```", start)
-            result = json.loads(response_text[start:end].strip())
-        elif "```" in response_text:
-            start = response_text.find("```") + 3
-            newline = response_text.find("\n", start)
-            start = newline + 1
-            end = response_text.find("```", start)
-            result = json.loads(response_text[start:end].strip())
-        else:
-            print("ERROR: Could not parse JSON from response")
-            print("Raw response:")
-            print(response_text)
-            return {}
+    # The forced tool call carries the analysis as already-parsed input
+    tool_use = next((b for b in response.content if b.type == "tool_use"), None)
+    if tool_use is None:
+        print("ERROR: Response contains no tool call")
+        return {}
+    result = tool_use.input
 
     # Print results
     print("\nStage 1 Results:")
@@ -152,7 +155,7 @@ def run_stage1(image_path: Path, client: anthropic.Anthropic) -> dict:
     return result
 
 
-def run_stage2(image_path: Path, stage1_result: dict, client: anthropic.Anthropic) -> dict:
+def run_stage2(image_path: Path, stage1_result: dict, client: "anthropic.Anthropic") -> dict:
     """
     Run Stage 2: Geometry extraction with table context.
 
@@ -172,6 +175,8 @@ def run_stage2(image_path: Path, stage1_result: dict, client: anthropic.Anthropi
     response = client.messages.create(
         model="claude-sonnet-4-5-20250929",
         max_tokens=4096,
+        tools=[get_stage2_variant(stage1_result).tool],
+        tool_choice=STAGE2_TOOL_CHOICE,
         messages=[
             {
                 "role": "user",
@@ -193,28 +198,12 @@ def run_stage2(image_path: Path, stage1_result: dict, client: anthropic.Anthropi
         ],
     )
 
-    # Parse response
-    response_text = response.content[0].text
-
-    # Try to extract JSON
-    try:
-        result = json.loads(response_text)
-    except json.JSONDecodeError:
-        if "```json" in response_text:
-            start = response_text.find("```json") + 7
-            end = response_text.find("```", start)
-            result = json.loads(response_text[start:end].strip())
-        elif "```" in response_text:
-            start = response_text.find("```") + 3
-            newline = response_text.find("\n", start)
-            start = newline + 1
-            end = response_text.find("```", start)
-            result = json.loads(response_text[start:end].strip())
-        else:
-            print("ERROR: Could not parse JSON from response")
-            print("Raw response:")
-            print(response_text[:2000])
-            return {}
+    # The forced tool call carries the analysis as already-parsed input
+    tool_use = next((b for b in response.content if b.type == "tool_use"), None)
+    if tool_use is None:
+        print("ERROR: Response contains no tool call")
+        return {}
+    result = tool_use.input
 
     # Print results
     print("\nStage 2 Results:")
@@ -222,19 +211,26 @@ def run_stage2(image_path: Path, stage1_result: dict, client: anthropic.Anthropi
     print(f"Footprint name: {result.get('footprint_name')}")
     print(f"Overall confidence: {result.get('overall_confidence', 0):.2f}")
 
-    print(f"\nPads ({len(result.get('pads', []))} total):")
-    for pad in result.get("pads", []):
-        pad_type = pad.get("pad_type", "smd")
-        shape = pad.get("shape", "rectangular")
-        print(f"  {pad.get('designator'):>3}: ({pad.get('x'):>6.3f}, {pad.get('y'):>6.3f}) "
-              f"{pad.get('width'):.3f}x{pad.get('height'):.3f}mm {shape} {pad_type} "
-              f"conf={pad.get('confidence', 0):.2f}")
-
-    if result.get("vias"):
-        print(f"\nVias ({len(result.get('vias', []))} total):")
-        for i, via in enumerate(result.get("vias", []), 1):
-            print(f"  Via {i}: ({via.get('x'):>6.3f}, {via.get('y'):>6.3f}) "
-                  f"drill={via.get('drill_diameter'):.2f}mm outer={via.get('outer_diameter'):.2f}mm")
+    # Pad and via listings are written in one call each
+    pads = result.get("pads", [])
+    print(f"\nPads ({len(pads)} total):")
+    if pads:
+        print("\n".join(
+            f"  {pad.get('designator'):>3}: ({pad.get('x'):>6.3f}, {pad.get('y'):>6.3f}) "
+            f"{pad.get('width'):.3f}x{pad.get('height'):.3f}mm "
+            f"{pad.get('shape', 'rectangular')} {pad.get('pad_type', 'smd')} "
+            f"conf={pad.get('confidence', 0):.2f}"
+            for pad in pads
+        ))
+
+    vias = result.get("vias", [])
+    if vias:
+        print(f"\nVias ({len(vias)} total):")
+        print("\n".join(
+            f"  Via {i}: ({via.get('x'):>6.3f}, {via.get('y'):>6.3f}) "
+            f"drill={via.get('drill_diameter'):.2f}mm outer={via.get('outer_diameter'):.2f}mm"
+            for i, via in enumerate(vias, 1)
+        ))
 
     outline = result.get("outline", {})
     if outline:
@@ -262,6 +258,15 @@ def run_stage2(image_path: Path, stage1_result: dict, client: anthropic.Anthropi
 
 
 def main():
+    import anthropic
+
+    # Load .env file if present
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(Path(__file__).parent.parent / ".env")
+    except ImportError:
+        pass  # dotenv not installed, rely on environment
+
     parser = argparse.ArgumentParser(description="Test staged extraction pipeline")
     parser.add_argument("image_path", help="Path to datasheet image")
     parser.add_argument(
@@ -3,12 +3,15 @@
 Test script for extraction with verification pass.
 
 Usage:
-    python run_verification_test.py <image_path>
+    python run_verification_test.py <image_path> [--no-cache]
 
 This runs:
 1. Original single-shot extraction
 2. Verification pass to check for common errors
 3. Applies corrections if needed
+
+Extractions are cached on disk (see CACHE_PATH), so re-running the script
+on the same image skips the extraction call; pass --no-cache to force it.
 """
 
 import argparse
@@ -23,14 +26,21 @@ try:
 except ImportError:
     pass
 
-from extraction import FootprintExtractor
+from extraction import FootprintExtractor, estimate_cost
+from extraction_cache import ExtractionCache
 from verification import detect_suspicious_values, verify_extraction, apply_corrections
 
+# Persistent extraction cache shared across runs of this script; keyed on
+# the exact image bytes, model and prompt version (no near-duplicate hits)
+CACHE_PATH = Path.home() / ".cache" / "footprint_extract" / "extractions.sqlite3"
+
 
 def main():
     parser = argparse.ArgumentParser(description="Test extraction with verification")
     parser.add_argument("image_path", help="Path to datasheet image")
     parser.add_argument("--model", default="sonnet", help="Model for extraction (default: sonnet)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always call the API instead of reusing a cached extraction")
     args = parser.parse_args()
 
     # Check API key
@@ -60,24 +70,28 @@ def main():
     print("STEP 1: Single-Shot Extraction")
     print("=" * 60)
 
-    extractor = FootprintExtractor(model=args.model)
-    result = extractor.extract_from_bytes(image_bytes, media_type)
+    cache = None
+    if not args.no_cache:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        cache = ExtractionCache(CACHE_PATH, near_duplicates=False)
+
+    def print_pad(pad):
+        print(f"  {pad.designator}: ({pad.x:.3f}, {pad.y:.3f}) {pad.width:.3f}x{pad.height:.3f}mm", flush=True)
+
+    # Pads are printed as the model writes them
+    print("Pads:")
+    extractor = FootprintExtractor(model=args.model, cache=cache)
+    result = extractor.extract_streaming_from_bytes_multi([(image_bytes, media_type)], on_pad=print_pad)
 
     if not result.success:
         print(f"ERROR: Extraction failed: {result.error}")
         sys.exit(1)
 
     extraction = result.extraction_result
+    print(f"\nExtracted {len(extraction.pads)} pads")
     print(f"Model: {result.model_used}")
     print(f"Tokens: {result.input_tokens} in, {result.output_tokens} out")
 
-    # Show extraction results
-    print(f"\nExtracted {len(extraction.pads)} pads:")
-    for pad in extraction.pads[:5]:  # Show first 5
-        print(f"  {pad.designator}: ({pad.x:.3f}, {pad.y:.3f}) {pad.width:.3f}x{pad.height:.3f}mm")
-    if len(extraction.pads) > 5:
-        print(f"  ... and {len(extraction.pads) - 5} more")
-
     print("\n" + "=" * 60)
     print("STEP 2: Check for Suspicious Values")
     print("=" * 60)
@@ -97,8 +111,8 @@ def main():
     print("STEP 3: Verification Pass")
     print("=" * 60)
 
-    import anthropic
-    client = anthropic.Anthropic(api_key=api_key)
+    # Reuse the extractor's client (and its open connection)
+    client = extractor.client
 
     verification = verify_extraction(
         extraction,
@@ -150,9 +164,11 @@ def main():
     print("\n" + "=" * 60)
     print("COST SUMMARY")
     print("=" * 60)
-    extraction_cost = (result.input_tokens * 3.00 + result.output_tokens * 15.00) / 1_000_000
-    verification_cost = (verification.input_tokens * 0.80 + verification.output_tokens * 4.00) / 1_000_000
-    print(f"Extraction (Sonnet): ${extraction_cost:.4f}")
+    extraction_cost = result.cost_usd
+    verification_cost = estimate_cost(
+        verification.input_tokens, verification.output_tokens, "claude-haiku-4-5-20251001"
+    )
+    print(f"Extraction ({result.model_used}): ${extraction_cost:.4f}")
     print(f"Verification (Haiku): ${verification_cost:.4f}")
     print(f"Total: ${extraction_cost + verification_cost:.4f}")
 
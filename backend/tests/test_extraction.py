@@ -6,7 +6,11 @@ Integration tests with real API calls are marked with @pytest.mark.integration
 and require ANTHROPIC_API_KEY environment variable.
 """
 
+import asyncio
+import base64
+import io
 import json
+import anthropic
 import pytest
 from unittest.mock import Mock, patch, MagicMock
 from pathlib import Path
@@ -16,11 +20,16 @@ from extraction import (
     ExtractionResponse,
     StandardPackageResponse,
     extract_footprint,
+    extract_many,
     estimate_cost,
     DEFAULT_MODEL,
     MODELS,
+    STAGED_ESCALATED_MODEL_LABEL,
+    STAGED_HAIKU_MODEL_LABEL,
     SUPPORTED_MEDIA_TYPES,
+    TIERED_ESCALATED_MODEL_LABEL,
 )
+from extraction_cache import ExtractionCache
 from models import PadShape, PadType
 
 
@@ -165,6 +174,33 @@ class TestExtractorInit:
             extractor = FootprintExtractor(model="claude-haiku-4-5-20251001")
             assert extractor.model == "claude-haiku-4-5-20251001"
 
+    def test_init_reuses_given_client(self, mock_client):
+        """Test that a shared client is used as-is, supplying the API key."""
+        shared = Mock(api_key="shared-key")
+        with patch.dict('os.environ', {}, clear=True):
+            extractor = FootprintExtractor(client=shared)
+
+        assert extractor.client is shared
+        mock_client.assert_not_called()
+
+    def test_async_client_is_created_on_first_use(self, mock_client):
+        """Test that sync-only extractors never open an async client."""
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            with patch('extraction.anthropic.AsyncAnthropic') as mock_async:
+                extractor = FootprintExtractor()
+                mock_async.assert_not_called()
+
+                assert extractor.async_client is extractor.async_client
+                mock_async.assert_called_once_with(api_key="test-key")
+
+    def test_init_reuses_given_async_client(self, mock_client):
+        """Test that a shared async client is used as-is."""
+        shared = Mock()
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor(async_client=shared)
+
+        assert extractor.async_client is shared
+
 
 # =============================================================================
 # Image Extraction Tests
@@ -204,6 +240,56 @@ class TestImageExtraction:
             assert not result.success
             assert "unsupported media type" in result.error.lower()
 
+    def test_hosted_image_is_sent_by_url(self, mock_client):
+        """Test that http(s) image URLs become URL-sourced image blocks."""
+        url = "https://example.com/datasheet.png"
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            request = extractor._build_extraction_request([url, (b"fake", "image/png")])
+
+        images = [b for b in request["messages"][0]["content"] if b["type"] == "image"]
+        assert images[0]["source"] == {"type": "url", "url": url}
+        assert images[1]["source"]["type"] == "base64"
+
+    def test_non_url_string_is_rejected(self, mock_client):
+        """Test that a string image that is not an http(s) URL is rejected."""
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_from_bytes_multi(["/local/datasheet.png"])
+
+            assert not result.success
+            assert "unsupported image url" in result.error.lower()
+
+    def test_decompression_bomb_returns_failed_response(self, mock_client):
+        """Test that an image too large to decode fails the result instead of raising."""
+        Image = pytest.importorskip("PIL.Image")
+        buf = io.BytesIO()
+        Image.new("1", (20000, 20000)).save(buf, "PNG")
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_from_bytes_multi([(buf.getvalue(), "image/png")])
+
+        assert not result.success
+        assert result.error == "Image too large to decode"
+        mock_client.return_value.messages.create.assert_not_called()
+
+    def test_prompt_cache_usage_is_reported(self, mock_client, mock_anthropic_response):
+        """Test that cache read/write token counts are carried into the response."""
+        block = Mock(type="tool_use", input=mock_anthropic_response)
+        block.name = "emit_footprint"
+        usage = Mock(input_tokens=100, output_tokens=50,
+                     cache_read_input_tokens=1800, cache_creation_input_tokens=None)
+        mock_client.return_value.messages.create.return_value = Mock(content=[block], usage=usage)
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_from_bytes(b"fake", "image/png")
+
+        assert result.success
+        assert result.cache_read_input_tokens == 1800
+        assert result.cache_creation_input_tokens == 0
+
 
 # =============================================================================
 # Response Parsing Tests
@@ -237,6 +323,482 @@ class TestResponseParsing:
 
             assert result is None
 
+    def test_parse_tool_use_block(self, mock_client):
+        """Test that the emit_footprint tool input is returned as the payload."""
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            block = Mock(type="tool_use", input={"test": "value"})
+            block.name = "emit_footprint"
+            result = extractor._parse_tool_response(Mock(content=[block]))
+
+            assert result == {"test": "value"}
+
+    def test_parse_tool_response_falls_back_to_text(self, mock_client):
+        """Test that a plain-text JSON answer is still accepted."""
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            block = Mock(type="text", text='{"test": "value"}')
+            result = extractor._parse_tool_response(Mock(content=[block]))
+
+            assert result == {"test": "value"}
+
+    def test_extraction_request_uses_tool_schema(self, mock_client, mock_anthropic_response):
+        """Test that extraction forces the emit_footprint tool and parses its input."""
+        mock_anthropic_response["vias"] = []
+        block = Mock(type="tool_use", input=mock_anthropic_response)
+        block.name = "emit_footprint"
+        create = mock_client.return_value.messages.create
+        create.return_value = Mock(
+            content=[block],
+            usage=Mock(input_tokens=100, output_tokens=50),
+        )
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_from_bytes(b"fake", "image/png")
+
+        assert result.success
+        assert len(result.footprint.pads) == 2
+        assert not any("schema" in w for w in result.extraction_result.warnings)
+        kwargs = create.call_args.kwargs
+        assert kwargs["tools"][0]["name"] == "emit_footprint"
+        assert kwargs["tool_choice"] == {"type": "tool", "name": "emit_footprint"}
+
+    def test_schema_mismatch_is_reported_as_warning(self, mock_client, mock_anthropic_response):
+        """Test that a tool payload violating the schema adds a warning."""
+        mock_anthropic_response["vias"] = []
+        del mock_anthropic_response["pin1_location"]
+        block = Mock(type="tool_use", input=mock_anthropic_response)
+        block.name = "emit_footprint"
+        mock_client.return_value.messages.create.return_value = Mock(
+            content=[block],
+            usage=Mock(input_tokens=100, output_tokens=50),
+        )
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_from_bytes(b"fake", "image/png")
+
+        assert result.success
+        assert any("pin1_location" in w for w in result.extraction_result.warnings)
+
+    def test_extraction_request_caches_static_prompt(self, mock_client, mock_anthropic_response):
+        """Test that the cached prompt block precedes the images."""
+        block = Mock(type="tool_use", input=mock_anthropic_response)
+        block.name = "emit_footprint"
+        create = mock_client.return_value.messages.create
+        create.return_value = Mock(
+            content=[block],
+            usage=Mock(input_tokens=100, output_tokens=50),
+        )
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            extractor.extract_from_bytes_multi([(b"a", "image/png"), (b"b", "image/png")])
+
+        content = create.call_args.kwargs["messages"][0]["content"]
+        assert content[0]["cache_control"] == {"type": "ephemeral"}
+        assert [part["type"] for part in content[1:]] == ["text", "image", "image"]
+
+
+# =============================================================================
+# Tiered Extraction Tests
+# =============================================================================
+
+class TestTieredExtraction:
+    """Tests for Haiku-first extraction with Sonnet escalation."""
+
+    @staticmethod
+    def _message(payload, input_tokens=100, output_tokens=50):
+        block = Mock(type="tool_use", input=payload)
+        block.name = "emit_footprint"
+        return Mock(content=[block], usage=Mock(input_tokens=input_tokens, output_tokens=output_tokens))
+
+    def test_confident_haiku_result_is_kept(self, mock_client, mock_anthropic_response):
+        """Test that a confident, valid Haiku result skips Sonnet."""
+        mock_anthropic_response["vias"] = []
+        create = mock_client.return_value.messages.create
+        create.return_value = self._message(mock_anthropic_response)
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_tiered_from_bytes_multi([(b"fake", "image/png")])
+
+        assert result.success
+        assert result.model_used == MODELS["haiku"]
+        assert create.call_count == 1
+        assert create.call_args.kwargs["model"] == MODELS["haiku"]
+
+    def test_low_confidence_escalates_to_sonnet(self, mock_client, mock_anthropic_response):
+        """Test that a low-confidence Haiku result is re-run with Sonnet."""
+        mock_anthropic_response["vias"] = []
+        uncertain = {**mock_anthropic_response, "overall_confidence": 0.3}
+        create = mock_client.return_value.messages.create
+        create.side_effect = [
+            self._message(uncertain, 100, 50),
+            self._message(mock_anthropic_response, 120, 60),
+        ]
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_tiered_from_bytes_multi([(b"fake", "image/png")])
+
+        assert result.success
+        assert result.extraction_result.overall_confidence == 0.91
+        assert [c.kwargs["model"] for c in create.call_args_list] == [MODELS["haiku"], MODELS["sonnet"]]
+        assert result.input_tokens == 220
+        assert result.output_tokens == 110
+
+    def test_schema_mismatch_escalates_to_sonnet(self, mock_client, mock_anthropic_response):
+        """Test that a Haiku payload failing validation is re-run with Sonnet."""
+        create = mock_client.return_value.messages.create
+        create.return_value = self._message(mock_anthropic_response)  # missing "vias"
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_tiered_from_bytes_multi([(b"fake", "image/png")])
+
+        assert create.call_count == 2
+        assert result.model_used == TIERED_ESCALATED_MODEL_LABEL
+
+    def test_escalated_cost_prices_each_tier_at_its_own_rate(self, mock_client, mock_anthropic_response):
+        """Test that Sonnet tokens are not priced at Haiku rates after escalation."""
+        mock_anthropic_response["vias"] = []
+        uncertain = {**mock_anthropic_response, "overall_confidence": 0.3}
+        create = mock_client.return_value.messages.create
+        create.side_effect = [
+            self._message(uncertain, 100, 50),
+            self._message(mock_anthropic_response, 120, 60),
+        ]
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_tiered_from_bytes_multi([(b"fake", "image/png")])
+
+        assert result.cost_usd == pytest.approx(
+            estimate_cost(100, 50, MODELS["haiku"]) + estimate_cost(120, 60, MODELS["sonnet"])
+        )
+
+    def test_failure_before_escalation_reports_haiku(self, mock_client):
+        """Test that a failed Haiku call is not labeled as a Sonnet run."""
+        mock_client.return_value.messages.create.side_effect = RuntimeError("boom")
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_tiered_from_bytes_multi([(b"fake", "image/png")])
+
+        assert not result.success
+        assert result.model_used == MODELS["haiku"]
+
+    def test_cached_haiku_result_skips_the_haiku_call(self, mock_client, mock_anthropic_response):
+        """Test that tiered extraction reuses a cached Haiku result."""
+        mock_anthropic_response["vias"] = []
+        create = mock_client.return_value.messages.create
+        create.return_value = self._message(mock_anthropic_response)
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor(model="haiku", cache=ExtractionCache())
+            extractor.extract_from_bytes_multi([(b"fake", "image/png")])
+            result = extractor.extract_tiered_from_bytes_multi([(b"fake", "image/png")])
+
+        assert create.call_count == 1
+        assert result.success
+        assert result.model_used == MODELS["haiku"]
+        assert result.input_tokens == 0
+
+
+# =============================================================================
+# Result Cache Tests
+# =============================================================================
+
+class TestResultCache:
+    """Tests for skipping the API on cached extractions."""
+
+    def test_repeat_image_is_served_from_cache(self, mock_client, mock_anthropic_response):
+        """Test that a second extraction of the same image does not call the API."""
+        mock_anthropic_response["vias"] = []
+        block = Mock(type="tool_use", input=mock_anthropic_response)
+        block.name = "emit_footprint"
+        create = mock_client.return_value.messages.create
+        create.return_value = Mock(content=[block], usage=Mock(input_tokens=100, output_tokens=50))
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor(cache=ExtractionCache())
+            first = extractor.extract_from_bytes(b"fake", "image/png")
+            second = extractor.extract_from_bytes(b"fake", "image/png")
+
+        assert create.call_count == 1
+        assert second.success
+        assert second.input_tokens == 0
+        assert second.footprint == first.footprint
+
+    def test_schema_mismatch_is_not_cached(self, mock_client, mock_anthropic_response):
+        """Test that results with schema warnings are re-extracted next time."""
+        block = Mock(type="tool_use", input=mock_anthropic_response)  # fixture lacks "vias"
+        block.name = "emit_footprint"
+        create = mock_client.return_value.messages.create
+        create.return_value = Mock(content=[block], usage=Mock(input_tokens=100, output_tokens=50))
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor(cache=ExtractionCache())
+            extractor.extract_from_bytes(b"fake", "image/png")
+            extractor.extract_from_bytes(b"fake", "image/png")
+
+        assert create.call_count == 2
+
+
+# =============================================================================
+# Streaming Extraction Tests
+# =============================================================================
+
+class TestStreamingExtraction:
+    """Tests for reporting pads while the tool input streams in."""
+
+    @staticmethod
+    def _stream(mock_client, payload):
+        """Script a stream whose partial snapshots grow one pad at a time."""
+        pads = payload["pads"]
+        events = [Mock(type="content_block_start")]
+        for i in range(len(pads)):
+            events.append(Mock(type="input_json", snapshot={"pads": pads[:i] + [{"designator": pads[i]["designator"]}]}))
+            events.append(Mock(type="input_json", snapshot={"pads": pads[:i + 1]}))
+
+        block = Mock(type="tool_use", input=payload)
+        block.name = "emit_footprint"
+        stream = MagicMock()
+        stream.__iter__.return_value = iter(events)
+        stream.get_final_message.return_value = Mock(
+            content=[block], usage=Mock(input_tokens=100, output_tokens=50)
+        )
+        mock_client.return_value.messages.stream.return_value.__enter__.return_value = stream
+        return stream
+
+    def test_pads_are_reported_once_each_in_order(self, mock_client, mock_anthropic_response):
+        """Test that each pad is reported once, before the stream has finished."""
+        stream = self._stream(mock_client, mock_anthropic_response)
+        seen = []
+        streamed = []
+
+        def on_pad(pad):
+            seen.append(pad)
+            streamed.append(not stream.get_final_message.called)
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_streaming_from_bytes_multi([(b"fake", "image/png")], on_pad=on_pad)
+
+        assert result.success
+        assert [pad.designator for pad in seen] == ["1", "2"]
+        assert seen == result.footprint.pads
+        assert streamed == [True, False]  # the last pad is only known complete at the end
+        mock_client.return_value.messages.create.assert_not_called()
+
+    def test_cache_hit_replays_pads(self, mock_client, mock_anthropic_response):
+        """Test that a cached result still reports its pads to the callback."""
+        mock_anthropic_response["vias"] = []
+        self._stream(mock_client, mock_anthropic_response)
+        seen = []
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor(cache=ExtractionCache())
+            extractor.extract_streaming_from_bytes_multi([(b"fake", "image/png")], on_pad=lambda pad: None)
+            result = extractor.extract_streaming_from_bytes_multi(
+                [(b"fake", "image/png")], on_pad=lambda pad: seen.append(pad)
+            )
+
+        assert mock_client.return_value.messages.stream.call_count == 1
+        assert result.input_tokens == 0
+        assert [pad.designator for pad in seen] == ["1", "2"]
+
+
+# =============================================================================
+# Batch Extraction Tests
+# =============================================================================
+
+class TestBatchExtraction:
+    """Tests for Message Batches API extraction."""
+
+    def test_results_are_matched_to_inputs_by_custom_id(self, mock_client, mock_anthropic_response):
+        """Test that out-of-order batch results map back to input order."""
+        block = Mock(type="tool_use", input=mock_anthropic_response)
+        block.name = "emit_footprint"
+        message = Mock(content=[block], usage=Mock(input_tokens=100, output_tokens=50))
+        batches = mock_client.return_value.messages.batches
+        batches.create.return_value = Mock(id="batch-1", processing_status="in_progress")
+        batches.retrieve.return_value = Mock(id="batch-1", processing_status="ended")
+        batches.results.return_value = [
+            Mock(custom_id="img-2", result=Mock(type="expired")),
+            Mock(custom_id="img-0", result=Mock(type="succeeded", message=message)),
+        ]
+        images = [(b"a", "image/png"), (b"b", "image/bmp"), (b"c", "image/png")]
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            results = extractor.extract_batch(images, poll_interval=0)
+
+        requests = batches.create.call_args.kwargs["requests"]
+        assert [r["custom_id"] for r in requests] == ["img-0", "img-2"]
+        assert requests[0]["params"]["tool_choice"]["name"] == "emit_footprint"
+        assert results[0].success
+        assert "Unsupported media type" in results[1].error
+        assert results[2].error == "Batch request expired"
+
+
+# =============================================================================
+# Staged Extraction Tests
+# =============================================================================
+
+class TestStagedExtraction:
+    """Tests for the two-stage extraction pipeline."""
+
+    def test_stage_schema_mismatches_become_warnings(self, mock_client, mock_anthropic_response):
+        """Test that Stage 1 / Stage 2 validation failures are reported as warnings."""
+        stage1 = {"drawing_format": "inline", "package_type": "SOIC"}  # missing required fields
+        mock_anthropic_response["vias"] = []
+        create = mock_client.return_value.messages.create
+        create.side_effect = [
+            Mock(content=[Mock(type="text", text=json.dumps(stage1))], usage=Mock(input_tokens=10, output_tokens=5)),
+            Mock(content=[Mock(type="text", text=json.dumps(mock_anthropic_response))], usage=Mock(input_tokens=20, output_tokens=10)),
+        ]
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_staged_from_bytes_multi([(b"fake", "image/png")])
+
+        assert result.success
+        warnings = result.extraction_result.warnings
+        assert any(w.startswith("Response did not match extraction schema (Stage 1)") for w in warnings)
+        assert not any("(Stage 2)" in w for w in warnings)
+        assert result.input_tokens == 30
+
+    @staticmethod
+    def _text_message(payload, input_tokens=10, output_tokens=5):
+        return Mock(content=[Mock(type="text", text=json.dumps(payload))],
+                    usage=Mock(input_tokens=input_tokens, output_tokens=output_tokens))
+
+    def test_tiered_stage2_keeps_confident_haiku_result(self, mock_client, mock_anthropic_response):
+        """Test that a confident, valid Haiku Stage 2 result skips Sonnet."""
+        stage1 = {"drawing_format": "inline", "package_type": "SOIC", "pad_arrangement": "linear_rows"}
+        mock_anthropic_response["vias"] = []
+        create = mock_client.return_value.messages.create
+        create.side_effect = [self._text_message(stage1), self._text_message(mock_anthropic_response)]
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_staged_from_bytes_multi([(b"fake", "image/png")], tiered_stage2=True)
+
+        assert result.success
+        assert result.model_used == STAGED_HAIKU_MODEL_LABEL
+        assert [c.kwargs["model"] for c in create.call_args_list] == [MODELS["haiku"], MODELS["haiku"]]
+
+    def test_tiered_stage2_escalates_on_low_confidence(self, mock_client, mock_anthropic_response):
+        """Test that an uncertain Haiku Stage 2 result is re-run with Sonnet."""
+        stage1 = {"drawing_format": "inline", "package_type": "SOIC", "pad_arrangement": "linear_rows"}
+        mock_anthropic_response["vias"] = []
+        uncertain = {**mock_anthropic_response, "overall_confidence": 0.3}
+        create = mock_client.return_value.messages.create
+        create.side_effect = [
+            self._text_message(stage1),
+            self._text_message(uncertain),
+            self._text_message(mock_anthropic_response, 30, 15),
+        ]
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_staged_from_bytes_multi([(b"fake", "image/png")], tiered_stage2=True)
+
+        assert result.success
+        assert result.extraction_result.overall_confidence == 0.91
+        assert result.model_used == STAGED_ESCALATED_MODEL_LABEL
+        assert result.input_tokens == 50
+        assert create.call_args_list[-1].kwargs["model"] == MODELS["sonnet"]
+
+    def test_staged_cost_prices_each_call_at_its_model(self, mock_client, mock_anthropic_response):
+        """Test that escalated staged cost sums Haiku and Sonnet calls at their own rates."""
+        stage1 = {"drawing_format": "inline", "package_type": "SOIC", "pad_arrangement": "linear_rows"}
+        mock_anthropic_response["vias"] = []
+        uncertain = {**mock_anthropic_response, "overall_confidence": 0.3}
+        create = mock_client.return_value.messages.create
+        create.side_effect = [
+            self._text_message(stage1, 1000, 100),
+            self._text_message(uncertain, 2000, 200),
+            self._text_message(mock_anthropic_response, 3000, 300),
+        ]
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_staged_from_bytes_multi([(b"fake", "image/png")], tiered_stage2=True)
+
+        expected = (
+            estimate_cost(1000, 100, MODELS["haiku"])
+            + estimate_cost(2000, 200, MODELS["haiku"])
+            + estimate_cost(3000, 300, MODELS["sonnet"])
+        )
+        assert result.cost_usd == pytest.approx(expected)
+        assert result.cost_usd > estimate_cost(6000, 600, MODELS["haiku"])
+
+    def test_stages_force_and_parse_tool_calls(self, mock_client, mock_anthropic_response):
+        """Test that each stage forces its tool and reads the payload from tool_use."""
+        stage1 = {"drawing_format": "inline", "package_type": "SOIC", "pad_arrangement": "linear_rows"}
+        messages = []
+        for name, payload in (("emit_table_analysis", stage1), ("emit_footprint_geometry", mock_anthropic_response)):
+            block = Mock(type="tool_use", input=payload)
+            block.name = name
+            messages.append(Mock(content=[block], usage=Mock(input_tokens=10, output_tokens=5)))
+        create = mock_client.return_value.messages.create
+        create.side_effect = messages
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_staged_from_bytes_multi([(b"fake", "image/png")])
+
+        assert result.success
+        assert result.raw_response["_stage1_analysis"]["package_type"] == "SOIC"
+        assert [c.kwargs["tool_choice"]["name"] for c in create.call_args_list] == [
+            "emit_table_analysis", "emit_footprint_geometry",
+        ]
+
+    def test_stage2_tool_is_pruned_for_package_without_thermal_pad(self, mock_client, mock_anthropic_response):
+        """Test that Stage 2 offers no vias field when Stage 1 found no thermal pad."""
+        stage1 = {"drawing_format": "inline", "package_type": "SOIC", "pad_arrangement": "linear_rows"}
+        mock_anthropic_response.pop("vias", None)
+        create = mock_client.return_value.messages.create
+        create.side_effect = [
+            Mock(content=[Mock(type="text", text=json.dumps(stage1))], usage=Mock(input_tokens=10, output_tokens=5)),
+            Mock(content=[Mock(type="text", text=json.dumps(mock_anthropic_response))], usage=Mock(input_tokens=20, output_tokens=10)),
+        ]
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            result = extractor.extract_staged_from_bytes_multi([(b"fake", "image/png")])
+
+        stage2_tool = create.call_args_list[1].kwargs["tools"][0]
+        assert "vias" not in stage2_tool["input_schema"]["properties"]
+        assert result.success
+        assert result.footprint.vias == []
+        assert not any("(Stage 2)" in w for w in result.extraction_result.warnings)
+
+    def test_stage_prompts_precede_images_uncached(self, mock_client, mock_anthropic_response):
+        """Test that each stage sends its prompt blocks, without cache breakpoints, ahead of the images."""
+        stage1 = {"drawing_format": "inline", "package_type": "SOIC", "pad_arrangement": "linear_rows"}
+        create = mock_client.return_value.messages.create
+        create.side_effect = [
+            Mock(content=[Mock(type="text", text=json.dumps(stage1))], usage=Mock(input_tokens=10, output_tokens=5)),
+            Mock(content=[Mock(type="text", text=json.dumps(mock_anthropic_response))], usage=Mock(input_tokens=20, output_tokens=10)),
+        ]
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            extractor = FootprintExtractor()
+            extractor.extract_staged_from_bytes_multi([(b"fake", "image/png")])
+
+        stage1_content, stage2_content = (
+            call.kwargs["messages"][0]["content"] for call in create.call_args_list
+        )
+        for content in (stage1_content, stage2_content):
+            assert not any("cache_control" in block for block in content)
+            assert content[-1]["type"] == "image"
+        assert "**Package Type:** SOIC" in stage2_content[1]["text"]
+
 
 # =============================================================================
 # Model Conversion Tests
@@ -320,6 +882,18 @@ class TestCostEstimation:
         # 10000 * 15/1M + 1000 * 75/1M = 0.15 + 0.075 = 0.225
         assert cost == pytest.approx(0.225, rel=0.01)
 
+    def test_estimate_cost_weights_cache_tokens(self):
+        """Test that cache reads bill at 0.1x and cache writes at 1.25x the input rate."""
+        cost = estimate_cost(0, 0, "sonnet", cache_read_input_tokens=10000,
+                             cache_creation_input_tokens=10000)
+        # (10000 * 0.1 + 10000 * 1.25) * 3/1M = 0.0405
+        assert cost == pytest.approx(0.0405, rel=0.01)
+
+    def test_estimate_cost_resolves_full_model_names(self):
+        """Test that full model ids use their family's rates and unknown models Haiku's."""
+        assert estimate_cost(10000, 1000, MODELS["sonnet"]) == estimate_cost(10000, 1000, "sonnet")
+        assert estimate_cost(10000, 1000, "unknown-model") == estimate_cost(10000, 1000, "haiku")
+
 
 # =============================================================================
 # Convenience Function Tests
@@ -341,17 +915,95 @@ class TestConvenienceFunctions:
                 mock_extract.assert_called_once()
 
 
+    def test_extract_many_bounds_concurrency(self, mock_client, mock_anthropic_response):
+        """Test that extract_many runs calls concurrently up to the limit and keeps order."""
+        in_flight = 0
+        peak = 0
+
+        async def fake_create(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            name = kwargs["messages"][0]["content"][-1]["source"]["data"]
+            block = Mock(type="tool_use", input={**mock_anthropic_response, "footprint_name": name})
+            block.name = "emit_footprint"
+            return Mock(content=[block], usage=Mock(input_tokens=10, output_tokens=5))
+
+        images = [(bytes([i]), "image/png") for i in range(6)]
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            with patch('extraction.anthropic.AsyncAnthropic') as mock_async:
+                mock_async.return_value.messages.create = fake_create
+                results = asyncio.run(extract_many(images, concurrency=2))
+
+        assert peak == 2
+        assert all(r.success for r in results)
+        assert [r.footprint.name for r in results] == [
+            base64.b64encode(bytes([i])).decode() for i in range(6)
+        ]
+
+    def test_extract_many_staged_runs_both_stages_per_image(self, mock_client, mock_anthropic_response):
+        """Test that staged extract_many runs Stage 1 then Stage 2 for every image."""
+        calls = []
+        stage1 = {"drawing_format": "inline", "package_type": "SOIC", "pad_arrangement": "linear_rows"}
+
+        async def fake_create(**kwargs):
+            data = kwargs["messages"][0]["content"][-1]["source"]["data"]
+            calls.append((data, kwargs["model"]))
+            await asyncio.sleep(0.01)
+            payload = stage1 if kwargs["model"] == MODELS["haiku"] else {**mock_anthropic_response, "footprint_name": data}
+            return Mock(content=[Mock(type="text", text=json.dumps(payload))],
+                        usage=Mock(input_tokens=10, output_tokens=5))
+
+        images = [(bytes([i]), "image/png") for i in range(3)]
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            with patch('extraction.anthropic.AsyncAnthropic') as mock_async:
+                mock_async.return_value.messages.create = fake_create
+                results = asyncio.run(extract_many(images, concurrency=3, staged=True))
+
+        assert all(r.success and r.input_tokens == 20 for r in results)
+        assert [r.footprint.name for r in results] == [
+            base64.b64encode(bytes([i])).decode() for i in range(3)
+        ]
+        # All Stage 1 calls are issued before any image reaches Stage 2
+        assert [model for _, model in calls] == [MODELS["haiku"]] * 3 + [MODELS["sonnet"]] * 3
+
+    def test_async_staged_api_error_keeps_stage1_usage(self, mock_client):
+        """Test that an async Stage 2 API error fails the result like the sync path does."""
+        stage1 = {"drawing_format": "inline", "package_type": "SOIC", "pad_arrangement": "linear_rows"}
+
+        async def fake_create(**kwargs):
+            if kwargs["model"] == MODELS["sonnet"]:
+                raise anthropic.APIError("overloaded", request=Mock(), body=None)
+            return Mock(content=[Mock(type="text", text=json.dumps(stage1))],
+                        usage=Mock(input_tokens=10, output_tokens=5))
+
+        with patch.dict('os.environ', {'ANTHROPIC_API_KEY': 'test-key'}):
+            with patch('extraction.anthropic.AsyncAnthropic') as mock_async:
+                mock_async.return_value.messages.create = fake_create
+                extractor = FootprintExtractor()
+                result = asyncio.run(extractor.extract_staged_from_bytes_multi_async([(b"fake", "image/png")]))
+
+        assert not result.success
+        assert result.error == "Claude API error: overloaded"
+        assert result.input_tokens == 10
+
+
 # =============================================================================
 # Integration Tests (require API key)
 # =============================================================================
 
 @pytest.mark.integration
+@pytest.mark.xdist_group("anthropic_api")
 class TestIntegration:
     """
     Integration tests that make real API calls.
 
     Run with: pytest -m integration
 
+    Grouped onto one xdist worker so parallel runs do not trip rate limits.
+
     Requires ANTHROPIC_API_KEY environment variable.
     """
 
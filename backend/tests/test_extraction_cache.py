@@ -0,0 +1,125 @@
+"""
+Tests for extraction_cache.py - result cache keyed by image fingerprint.
+"""
+
+import functools
+import io
+
+import pytest
+
+from extraction_cache import ExtractionCache, image_fingerprint
+
+
+# =============================================================================
+# Helpers
+# =============================================================================
+
+@functools.lru_cache(maxsize=None)
+def _drawing(fmt: str = "PNG", **save_kwargs) -> bytes:
+    """Render a simple two-pad drawing in the given format (memoized; bytes are immutable)."""
+    Image = pytest.importorskip("PIL.Image")
+    ImageDraw = pytest.importorskip("PIL.ImageDraw")
+    im = Image.new("RGB", (256, 256), "white")
+    draw = ImageDraw.Draw(im)
+    draw.rectangle((40, 100, 90, 160), fill="black")
+    draw.rectangle((166, 100, 216, 160), fill="black")
+    buf = io.BytesIO()
+    im.save(buf, fmt, **save_kwargs)
+    return buf.getvalue()
+
+
+# =============================================================================
+# Fingerprint Tests
+# =============================================================================
+
+class TestImageFingerprint:
+    """Tests for image_fingerprint."""
+
+    def test_decodable_image_uses_perceptual_hash(self):
+        """Test that images get a perceptual fingerprint when imagehash is installed."""
+        pytest.importorskip("imagehash")
+        assert image_fingerprint(_drawing("PNG")).startswith(b"p")
+
+    def test_undecodable_bytes_use_content_digest(self):
+        """Test that non-image bytes fall back to an exact content hash."""
+        assert image_fingerprint(b"abc") == image_fingerprint(b"abc")
+        assert image_fingerprint(b"abc") != image_fingerprint(b"abd")
+
+
+# =============================================================================
+# Cache Tests
+# =============================================================================
+
+class TestExtractionCache:
+    """Tests for ExtractionCache storage and keys."""
+
+    def test_put_then_get_round_trips(self):
+        """Test that stored raw responses are returned on lookup."""
+        cache = ExtractionCache()
+        key = cache.key([(b"abc", "image/png")], "model-a")
+        assert cache.get(key) is None
+
+        cache.put(key, {"footprint_name": "X", "pads": []})
+        assert cache.get(key) == {"footprint_name": "X", "pads": []}
+
+    def test_key_covers_model_and_examples(self):
+        """Test that model and prompt variant are part of the key."""
+        images = [(b"abc", "image/png")]
+        cache = ExtractionCache()
+        keys = {
+            cache.key(images, "model-a"),
+            cache.key(images, "model-b"),
+            cache.key(images, "model-a", include_examples=True),
+        }
+        assert len(keys) == 3
+
+    def test_prompt_version_changes_key(self, monkeypatch):
+        """Test that bumping the prompt version invalidates old keys."""
+        images = [(b"abc", "image/png")]
+        cache = ExtractionCache()
+        before = cache.key(images, "model-a")
+        monkeypatch.setattr("extraction_cache.PROMPT_VERSION", "next")
+        assert cache.key(images, "model-a") != before
+
+    def test_near_duplicates_are_a_miss_by_default(self):
+        """Test that the default cache only replays byte-identical images."""
+        cache = ExtractionCache()
+        cache.put(cache.key([(_drawing("PNG"), "image/png")], "model-a"), {"pads": []})
+
+        assert cache.get(cache.key([(_drawing("PNG"), "image/png")], "model-a")) == {"pads": []}
+        assert cache.get(cache.key([(_drawing("JPEG", quality=75), "image/jpeg")], "model-a")) is None
+        assert not cache.key([(_drawing("PNG"), "image/png")], "model-a").perceptual
+
+    def test_reencoded_image_is_a_near_duplicate_hit(self):
+        """Test that with near_duplicates, a JPEG re-encode of a cached PNG is served."""
+        pytest.importorskip("imagehash")
+        cache = ExtractionCache(near_duplicates=True)
+        cache.put(cache.key([(_drawing("PNG"), "image/png")], "model-a"), {"pads": []})
+
+        key = cache.key([(_drawing("JPEG", quality=75), "image/jpeg")], "model-a")
+        assert key.fingerprint != cache.key([(_drawing("PNG"), "image/png")], "model-a").fingerprint
+        assert cache.get(key) == {"pads": []}
+
+    def test_different_drawing_is_a_miss(self):
+        """Test that a visibly different drawing is not matched."""
+        pytest.importorskip("imagehash")
+        Image = pytest.importorskip("PIL.Image")
+        cache = ExtractionCache(near_duplicates=True)
+        cache.put(cache.key([(_drawing("PNG"), "image/png")], "model-a"), {"pads": []})
+
+        other = Image.open(io.BytesIO(_drawing("PNG"))).rotate(90)
+        buf = io.BytesIO()
+        other.save(buf, "PNG")
+        assert cache.get(cache.key([(buf.getvalue(), "image/png")], "model-a")) is None
+
+    def test_hosted_images_are_not_cached(self):
+        """Test that requests with URL images have no key."""
+        assert ExtractionCache().key(["https://example.com/a.png"], "model-a") is None
+
+    def test_cache_persists_to_file(self, tmp_path):
+        """Test that entries survive reopening the database file."""
+        path = tmp_path / "cache.sqlite3"
+        key = ExtractionCache().key([(b"abc", "image/png")], "model-a")
+        ExtractionCache(path).put(key, {"pads": []})
+
+        assert ExtractionCache(path).get(key) == {"pads": []}
@@ -461,6 +461,22 @@ class TestConvenienceFunctions:
             if os.path.exists(filepath):
                 os.remove(filepath)
 
+    def test_generate_iter_matches_generate(self, footprint_with_vias):
+        """Test that streamed chunks join to the same script as generate()."""
+        generator = DelphiScriptGenerator(footprint_with_vias)
+        chunks = list(generator.generate_iter())
+
+        assert all(isinstance(chunk, bytes) for chunk in chunks)
+        assert b"".join(chunks).decode("utf-8") == generator.generate()
+
+    def test_generate_iter_chunks_per_element(self, footprint_with_vias):
+        """Test that each pad and via is emitted as its own chunk."""
+        generator = DelphiScriptGenerator(footprint_with_vias)
+        chunks = list(generator.generate_iter())
+
+        element_count = len(footprint_with_vias.pads) + len(footprint_with_vias.vias)
+        assert len(chunks) == element_count + 2  # header/setup + footer
+
 
 # =============================================================================
 # Name Sanitization Tests
@@ -0,0 +1,73 @@
+"""
+Tests for image_preprocessing.py - downscaling images before upload.
+"""
+
+import base64
+import io
+
+import pytest
+
+from image_preprocessing import (
+    MAX_IMAGE_SIDE,
+    image_content_block,
+    preprocess_image,
+)
+
+Image = pytest.importorskip("PIL.Image")
+
+
+# =============================================================================
+# Helpers
+# =============================================================================
+
+def _png(width: int, height: int, mode: str = "RGBA") -> bytes:
+    """Encode a blank PNG of the given size."""
+    buf = io.BytesIO()
+    Image.new(mode, (width, height), "white").save(buf, "PNG")
+    return buf.getvalue()
+
+
+# =============================================================================
+# Preprocessing Tests
+# =============================================================================
+
+class TestPreprocessImage:
+    """Tests for preprocess_image."""
+
+    def test_small_image_is_unchanged(self):
+        """Test that images under the pixel budget are passed through untouched."""
+        data = _png(800, 600)
+        assert preprocess_image(data, "image/png") == (data, "image/png")
+
+    def test_large_image_is_downscaled_to_jpeg(self):
+        """Test that oversized images are resized within bounds, keeping aspect ratio."""
+        data, media_type = preprocess_image(_png(3000, 1500), "image/png")
+
+        assert media_type == "image/jpeg"
+        with Image.open(io.BytesIO(data)) as im:
+            assert im.format == "JPEG"
+            assert im.size == (MAX_IMAGE_SIDE, MAX_IMAGE_SIDE // 2)
+
+    def test_undecodable_bytes_are_unchanged(self):
+        """Test that bytes Pillow cannot read are left for the API to reject."""
+        assert preprocess_image(b"not an image", "image/png") == (b"not an image", "image/png")
+
+    def test_decompression_bomb_raises_value_error(self):
+        """Test that a small file with a huge pixel count is rejected as ValueError."""
+        data = _png(20000, 20000, mode="1")
+
+        with pytest.raises(ValueError, match="Image too large to decode"):
+            preprocess_image(data, "image/png")
+
+
+class TestImageContentBlock:
+    """Tests for image_content_block."""
+
+    def test_block_embeds_base64_image(self):
+        """Test that the block carries the base64 image and its media type."""
+        data = _png(10, 10)
+        block = image_content_block(data, "image/png")
+
+        assert block["type"] == "image"
+        assert block["source"]["media_type"] == "image/png"
+        assert base64.b64decode(block["source"]["data"]) == data
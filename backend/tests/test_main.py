@@ -9,7 +9,7 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 from fastapi.testclient import TestClient
 
-from main import app, jobs, Job, SUPPORTED_FORMATS, MAX_FILE_SIZE
+from main import app, jobs, Job, JobStore, ImageData, SUPPORTED_FORMATS, MAX_FILE_SIZE
 from extraction import ExtractionResponse
 from models import Footprint, Pad, PadShape, PadType, Outline, ExtractionResult
 
@@ -115,6 +115,8 @@ class TestUploadEndpoint:
         assert response.status_code == 200
         data = response.json()
         assert "job_id" in data
+        assert len(data["job_id"]) == 32
+        assert "-" not in data["job_id"]
         assert data["filename"] == "test.png"
         assert data["image_count"] == 1
         assert "message" in data
@@ -170,6 +172,38 @@ class TestUploadEndpoint:
         assert jobs[job_id].image_count == 2
 
 
+# =============================================================================
+# Image Storage Tests
+# =============================================================================
+
+class TestImageStorage:
+    """Tests for in-memory image storage."""
+
+    def test_image_bytes_round_trip(self):
+        """Test that stored images are returned unchanged."""
+        data = b"\x89PNG" + b"\x00" * 4096
+        image = ImageData("test.png", data, "image/png")
+
+        assert image.image_bytes == data
+
+    def test_compressible_image_stored_smaller(self):
+        """Test that compressible uploads take less memory when zstd is available."""
+        pytest.importorskip("zstandard")
+        data = b"\x89PNG" + b"\x00" * 4096
+        image = ImageData("test.png", data, "image/png")
+
+        assert image.compressed is True
+        assert image.stored_size < len(data)
+
+    def test_jpeg_stored_uncompressed(self):
+        """Test that JPEG uploads are stored as-is."""
+        data = b"\xff\xd8" + b"\x00" * 4096
+        image = ImageData("test.jpg", data, "image/jpeg")
+
+        assert image.compressed is False
+        assert image.stored_size == len(data)
+
+
 # =============================================================================
 # Extract Endpoint Tests
 # =============================================================================
@@ -209,6 +243,51 @@ class TestExtractEndpoint:
         assert data["pad_count"] == 2
         assert data["overall_confidence"] == 0.9
 
+    def test_extract_auto_model_uses_tiered(self, client, sample_image, mock_extraction_response):
+        """Test that model=auto runs the Haiku-first tiered extraction."""
+        upload_response = client.post(
+            "/api/upload",
+            files=[("files", ("test.png", io.BytesIO(sample_image), "image/png"))]
+        )
+        job_id = upload_response.json()["job_id"]
+
+        with patch('main.FootprintExtractor') as mock_extractor_class:
+            mock_extractor = Mock()
+            mock_extractor.extract_tiered_from_bytes_multi.return_value = mock_extraction_response
+            mock_extractor_class.return_value = mock_extractor
+
+            response = client.get(f"/api/extract/{job_id}?model=auto")
+
+        assert response.json()["success"] is True
+        mock_extractor.extract_tiered_from_bytes_multi.assert_called_once()
+        mock_extractor.extract_from_bytes_multi.assert_not_called()
+
+    def test_extract_footprint_serialization(self, client, sample_image, mock_extraction_response):
+        """Test that the footprint payload keeps its public shape."""
+        upload_response = client.post(
+            "/api/upload",
+            files=[("files", ("test.png", io.BytesIO(sample_image), "image/png"))]
+        )
+        job_id = upload_response.json()["job_id"]
+
+        with patch('main.FootprintExtractor') as mock_extractor_class:
+            mock_extractor = Mock()
+            mock_extractor.extract_from_bytes_multi.return_value = mock_extraction_response
+            mock_extractor_class.return_value = mock_extractor
+
+            response = client.get(f"/api/extract/{job_id}")
+
+        footprint = response.json()["footprint"]
+        assert footprint["name"] == "TEST-FOOTPRINT"
+        assert footprint["vias"] == []
+        assert footprint["outline"] == {"width": 4.0, "height": 2.0}
+
+        pad = footprint["pads"][0]
+        assert pad["shape"] == "rectangular"
+        assert pad["pad_type"] == "smd"
+        assert pad["drill"] is None
+        assert "confidence" not in pad
+
     def test_extract_caches_result(self, client, sample_image, mock_extraction_response):
         """Test that extraction result is cached."""
         # Upload first
@@ -298,6 +377,33 @@ class TestConfirmEndpoint:
         assert jobs[job_id].pin1_index == 0
 
 
+    def test_confirm_repeat_is_idempotent(self, client, sample_image, mock_extraction_response):
+        """Test that repeating an identical confirm replays the stored response."""
+        upload_response = client.post(
+            "/api/upload",
+            files=[("files", ("test.png", io.BytesIO(sample_image), "image/png"))]
+        )
+        job_id = upload_response.json()["job_id"]
+
+        with patch('main.FootprintExtractor') as mock_extractor_class:
+            mock_extractor = Mock()
+            mock_extractor.extract_from_bytes_multi.return_value = mock_extraction_response
+            mock_extractor_class.return_value = mock_extractor
+            client.get(f"/api/extract/{job_id}")
+
+        response1 = client.post(f"/api/confirm/{job_id}", json={"pin1_index": 0})
+        cached = jobs[job_id].confirm_response
+        response2 = client.post(f"/api/confirm/{job_id}", json={"pin1_index": 0})
+
+        assert response1.json() == response2.json()
+        assert jobs[job_id].confirm_response is cached
+
+        # A different Pin 1 selection is applied, not replayed
+        client.post(f"/api/confirm/{job_id}", json={"pin1_index": 1})
+        assert jobs[job_id].pin1_index == 1
+        assert jobs[job_id].confirm_response is not cached
+
+
 # =============================================================================
 # Generate Endpoint Tests
 # =============================================================================
@@ -464,3 +570,65 @@ class TestJobManagement:
         """Test deleting non-existent job."""
         response = client.delete("/api/job/nonexistent")
         assert response.status_code == 404
+
+
+class TestJobStore:
+    """Tests for the sharded in-memory job store."""
+
+    def test_set_get_delete(self):
+        """Test basic dict-style operations across shards."""
+        store = JobStore(shard_count=4)
+        for i in range(20):
+            store[f"job-{i}"] = Job(job_id=f"job-{i}")
+
+        assert len(store) == 20
+        assert "job-7" in store
+        assert store["job-7"].job_id == "job-7"
+
+        del store["job-7"]
+        assert "job-7" not in store
+        assert store.get("job-7") is None
+        assert len(store) == 19
+
+    def test_remove_older_than(self):
+        """Test that expired jobs are removed from every shard."""
+        from datetime import datetime, timedelta
+
+        store = JobStore(shard_count=4)
+        for i in range(10):
+            job = Job(job_id=f"old-{i}")
+            job.created_at = datetime.utcnow() - timedelta(hours=2)
+            store[job.job_id] = job
+        store["new"] = Job(job_id="new")
+
+        store.remove_older_than(datetime.utcnow() - timedelta(hours=1))
+
+        assert len(store) == 1
+        assert "new" in store
+
+    def test_evicts_least_recently_used(self):
+        """Test that a full store evicts the least recently used job."""
+        store = JobStore(shard_count=1, max_jobs=3)
+        for name in ("a", "b", "c"):
+            store[name] = Job(job_id=name)
+
+        store.get("a")  # "b" is now least recently used
+        store["d"] = Job(job_id="d")
+
+        assert len(store) == 3
+        assert "b" not in store
+        assert "a" in store and "d" in store
+
+    def test_limit_is_global_not_per_shard(self):
+        """Test that one shard can hold jobs beyond its share while the store has room."""
+        store = JobStore(shard_count=4, max_jobs=8)
+        same_shard = [k for k in (f"job-{i}" for i in range(1000)) if hash(k) % 4 == hash("job-0") % 4]
+        for name in same_shard[:8]:
+            store[name] = Job(job_id=name)
+
+        assert len(store) == 8
+        assert all(name in store for name in same_shard[:8])
+
+        store["extra"] = Job(job_id="extra")
+        assert len(store) == 8
+        assert "extra" in store
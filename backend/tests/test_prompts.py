@@ -5,14 +5,26 @@ These tests verify that the prompts are correctly formatted and contain
 all necessary instructions for the Claude Vision API.
 """
 
+import copy
 import json
+
+import fastjsonschema
 import pytest
 
 from prompts import (
     EXTRACTION_SCHEMA,
     EXTRACTION_PROMPT,
+    EXTRACTION_TOOL,
+    EXTRACTION_TOOL_CHOICE,
+    ExtractionPayload,
+    OutlinePayload,
+    PadPayload,
+    Pin1Payload,
+    ViaPayload,
     get_extraction_prompt,
+    get_extraction_prompt_blocks,
     get_standard_package_prompt,
+    validate_extraction,
 )
 
 
@@ -122,6 +134,76 @@ class TestExtractionSchema:
         assert "numbered" in indicators
         assert "unknown" in indicators
 
+    def test_schema_is_read_only(self):
+        """Test that the shared schema cannot be mutated in place."""
+        with pytest.raises(TypeError):
+            EXTRACTION_SCHEMA["additionalProperties"] = False
+        with pytest.raises(TypeError):
+            EXTRACTION_SCHEMA["required"].append("vias")
+        with pytest.raises(TypeError):
+            EXTRACTION_SCHEMA["properties"]["pads"]["items"]["properties"].pop("x")
+
+    def test_schema_copies_are_free(self):
+        """Test that copying the frozen schema returns the same object."""
+        assert copy.deepcopy(EXTRACTION_SCHEMA) is EXTRACTION_SCHEMA
+        assert copy.copy(EXTRACTION_SCHEMA) is EXTRACTION_SCHEMA
+
+    def test_schema_shallow_merge_gives_mutable_dict(self):
+        """Test that per-request variants can be built by shallow merge."""
+        variant = {**EXTRACTION_SCHEMA, "additionalProperties": False}
+        assert variant["additionalProperties"] is False
+        assert "additionalProperties" not in EXTRACTION_SCHEMA
+
+    @pytest.mark.parametrize("payload_type, path", [
+        (ExtractionPayload, ()),
+        (PadPayload, ("pads", "items")),
+        (ViaPayload, ("vias", "items")),
+        (OutlinePayload, ("outline",)),
+        (Pin1Payload, ("pin1_location",)),
+    ])
+    def test_payload_types_match_schema(self, payload_type, path):
+        """Test that each TypedDict declares exactly the schema's properties."""
+        node = EXTRACTION_SCHEMA
+        for i, key in enumerate(path):
+            node = node["properties"][key] if i == 0 else node[key]
+        assert set(payload_type.__annotations__) == set(node["properties"])
+
+
+class TestValidateExtraction:
+    """Tests for the compiled extraction schema validator."""
+
+    @pytest.fixture
+    def payload(self):
+        return {
+            "footprint_name": "SOT-23",
+            "units_detected": "mm",
+            "pads": [
+                {"designator": "1", "x": -0.95, "y": -1.0, "width": 0.6, "height": 0.7,
+                 "shape": "rectangular", "pad_type": "smd", "confidence": 0.9},
+            ],
+            "vias": [],
+            "outline": {"width": 2.9, "height": 1.3, "confidence": 0.8},
+            "pin1_location": {"designator": "1", "indicator_type": "numbered", "confidence": 0.9},
+            "overall_confidence": 0.9,
+            "warnings": [],
+        }
+
+    def test_valid_payload_passes(self, payload):
+        """Test that a schema-conforming payload validates."""
+        validate_extraction(payload)
+
+    def test_missing_required_field_fails(self, payload):
+        """Test that a missing required field is rejected."""
+        del payload["pads"]
+        with pytest.raises(fastjsonschema.JsonSchemaException):
+            validate_extraction(payload)
+
+    def test_bad_enum_value_fails(self, payload):
+        """Test that an unknown pad shape is rejected."""
+        payload["pads"][0]["shape"] = "hexagon"
+        with pytest.raises(fastjsonschema.JsonSchemaException):
+            validate_extraction(payload)
+
 
 class TestExtractionPrompt:
     """Tests for the extraction prompt content."""
@@ -140,13 +222,14 @@ class TestExtractionPrompt:
         assert "JSON" in prompt
         assert "valid json" in prompt.lower()
 
-    def test_prompt_contains_schema(self):
-        """Test that prompt embeds the JSON schema."""
+    def test_prompt_references_tool_schema(self):
+        """Test that the schema travels via the emit_footprint tool."""
         prompt = get_extraction_prompt()
-        # Schema should be embedded
-        assert '"footprint_name"' in prompt
-        assert '"pads"' in prompt
-        assert '"confidence"' in prompt
+        # Schema is sent as tool metadata, not embedded in the text
+        assert "emit_footprint" in prompt
+        assert '"footprint_name"' not in prompt
+        assert EXTRACTION_TOOL["input_schema"] is EXTRACTION_SCHEMA
+        assert EXTRACTION_TOOL_CHOICE == {"type": "tool", "name": EXTRACTION_TOOL["name"]}
 
     def test_prompt_explains_millimeters(self):
         """Test that prompt specifies millimeter units."""
@@ -207,6 +290,23 @@ class TestPromptFunctions:
         assert isinstance(result, str)
         assert len(result) > 100  # Should be substantial
 
+    def test_get_extraction_prompt_blocks_marks_cache_breakpoint(self):
+        """Test that the prompt block carries an ephemeral cache_control marker."""
+        blocks = get_extraction_prompt_blocks(include_examples=True)
+        assert len(blocks) == 1
+        assert blocks[0]["type"] == "text"
+        assert blocks[0]["text"] == get_extraction_prompt(include_examples=True)
+        assert blocks[0]["cache_control"] == {"type": "ephemeral"}
+
+    def test_get_extraction_prompt_blocks_reuses_block(self):
+        """Test that the prompt block is built once and the list is fresh per call."""
+        first = get_extraction_prompt_blocks()
+        second = get_extraction_prompt_blocks()
+        assert first is not second
+        assert first[0] is second[0]
+        with pytest.raises(TypeError):
+            first[0]["text"] = "changed"
+
     def test_get_standard_package_prompt_returns_string(self):
         """Test that get_standard_package_prompt returns a string."""
         result = get_standard_package_prompt()
@@ -222,3 +322,12 @@ class TestPromptFunctions:
         # And can be parsed back
         parsed = json.loads(json_str)
         assert parsed == EXTRACTION_SCHEMA
+
+    def test_examples_have_single_braces(self):
+        """Test that few-shot examples reach the model as literal JSON."""
+        prompt = get_extraction_prompt(include_examples=True)
+        assert '"footprint_name": "UDFN-8_2x3mm"' in prompt
+        assert "{{" not in prompt
+        assert "}}" not in prompt
+        assert "$examples" not in prompt
+
@@ -0,0 +1,263 @@
+"""
+Tests for prompts_staged.py - two-stage extraction prompt generation.
+
+These tests verify that the Stage 1 and Stage 2 prompts defer their schemas
+to forced tool calls and carry the Stage 1 analysis into the Stage 2 prompt.
+"""
+
+import json
+
+import fastjsonschema
+import pytest
+
+from prompts_staged import (
+    STAGE1_SCHEMA,
+    STAGE1_TOOL,
+    STAGE1_TOOL_CHOICE,
+    STAGE2_SCHEMA,
+    STAGE2_TOOL,
+    STAGE2_TOOL_CHOICE,
+    get_stage1_prompt,
+    get_stage1_prompt_blocks,
+    get_stage2_prompt,
+    get_stage2_prompt_blocks,
+    get_stage2_variant,
+    validate_stage1,
+    validate_stage2,
+)
+
+
+# =============================================================================
+# Fixtures
+# =============================================================================
+
+@pytest.fixture
+def udfn_stage1_result():
+    """Stage 1 analysis for a UDFN-8 with thermal pad and vias."""
+    return {
+        "drawing_format": "table_variable",
+        "dimension_table": {"X1": 0.3, "Y1": 0.85, "E": 0.5, "X2": 1.6, "Y2": 1.4, "V": 0.3, "EV": 1.0},
+        "package_type": "UDFN",
+        "pad_arrangement": "peripheral",
+        "estimated_pad_count": 9,
+        "has_thermal_pad": True,
+        "has_thermal_vias": True,
+        "units_detected": "mm",
+        "dimension_semantics": {
+            "pad_width_label": "X1",
+            "pad_height_label": "Y1",
+            "pitch_label": "E",
+            "thermal_width_label": "X2",
+            "thermal_height_label": "Y2",
+        },
+    }
+
+
+# =============================================================================
+# Stage 1 Tests
+# =============================================================================
+
+class TestStage1Prompt:
+    """Tests for the Stage 1 scene analysis prompt."""
+
+    def test_prompt_defers_schema_to_tool(self):
+        """Test that the prompt names the tool instead of embedding the schema."""
+        prompt = get_stage1_prompt()
+        assert STAGE1_TOOL["name"] in prompt
+        assert '"dimension_table"' not in prompt
+        assert "{schema}" not in prompt
+
+    def test_tool_carries_schema(self):
+        """Test that the forced Stage 1 tool uses the Stage 1 schema."""
+        assert STAGE1_TOOL["input_schema"] is STAGE1_SCHEMA
+        assert STAGE1_TOOL_CHOICE == {"type": "tool", "name": STAGE1_TOOL["name"]}
+
+    def test_schema_and_tool_are_read_only(self):
+        """Test that the shared Stage 1 schema, tool and tool choice cannot be mutated."""
+        with pytest.raises(TypeError):
+            STAGE1_SCHEMA["required"].append("notes")
+        with pytest.raises(TypeError):
+            STAGE1_TOOL["input_schema"]["properties"].pop("package_type")
+        with pytest.raises(TypeError):
+            STAGE1_TOOL_CHOICE["name"] = "other"
+
+    def test_prompt_is_reused(self):
+        """Test that the Stage 1 prompt is rendered once and reused."""
+        assert get_stage1_prompt() is get_stage1_prompt()
+
+    def test_schema_is_json_serializable(self):
+        """Test that the Stage 1 schema round-trips through JSON."""
+        assert json.loads(json.dumps(STAGE1_SCHEMA)) == STAGE1_SCHEMA
+
+    def test_prompt_blocks_hold_uncached_prompt(self):
+        """Test that the Stage 1 prompt block carries no cache breakpoint (too short to cache)."""
+        blocks = get_stage1_prompt_blocks()
+        assert blocks == [{"type": "text", "text": get_stage1_prompt()}]
+
+
+# =============================================================================
+# Stage 2 Tests
+# =============================================================================
+
+class TestStage2Prompt:
+    """Tests for the Stage 2 geometry extraction prompt."""
+
+    def test_prompt_defers_schema_to_tool(self, udfn_stage1_result):
+        """Test that the prompt names the tool instead of embedding the schema."""
+        prompt = get_stage2_prompt(udfn_stage1_result)
+        assert STAGE2_TOOL["name"] in prompt
+        assert '"footprint_name"' not in prompt
+        assert "{schema}" not in prompt
+
+    def test_tool_carries_schema(self):
+        """Test that the forced Stage 2 tool uses the Stage 2 schema."""
+        assert STAGE2_TOOL["input_schema"] is STAGE2_SCHEMA
+        assert STAGE2_TOOL_CHOICE == {"type": "tool", "name": STAGE2_TOOL["name"]}
+
+    def test_variant_tools_are_read_only(self):
+        """Test that every Stage 2 variant tool and the tool choice cannot be mutated."""
+        for stage1 in ({}, {"has_thermal_pad": True}, {"has_thermal_pad": True, "has_thermal_vias": True}):
+            tool = get_stage2_variant(stage1).tool
+            with pytest.raises(TypeError):
+                tool["input_schema"]["required"].append("notes")
+        with pytest.raises(TypeError):
+            STAGE2_SCHEMA["properties"]["pads"]["items"]["properties"].pop("x")
+        with pytest.raises(TypeError):
+            STAGE2_TOOL_CHOICE["name"] = "other"
+
+    def test_prompt_includes_stage1_context(self, udfn_stage1_result):
+        """Test that Stage 1 metadata is carried into the prompt."""
+        prompt = get_stage2_prompt(udfn_stage1_result)
+        assert "**Package Type:** UDFN" in prompt
+        assert "**Pad Arrangement:** peripheral" in prompt
+        assert "  - X1 = 0.3mm" in prompt
+
+    def test_peripheral_pads_swap_width_and_height(self, udfn_stage1_result):
+        """Test that left/right pads map pad length to output width."""
+        prompt = get_stage2_prompt(udfn_stage1_result)
+        assert "OUTPUT width = Y1 = 0.85mm" in prompt
+        assert "OUTPUT height = X1 = 0.3mm" in prompt
+
+    def test_thermal_pad_and_vias_guidance(self, udfn_stage1_result):
+        """Test that thermal pad and via dimensions are listed when present."""
+        prompt = get_stage2_prompt(udfn_stage1_result)
+        assert "- Width = X2 = 1.6mm" in prompt
+        assert "- Via pitch = EV = 1.0mm" in prompt
+
+    def test_missing_table_values_use_placeholder(self):
+        """Test that unknown labels render as '?' instead of failing."""
+        prompt = get_stage2_prompt({"package_type": "SOIC", "pad_arrangement": "linear_rows"})
+        assert "  (no table found)" in prompt
+        assert "  (no semantics identified)" in prompt
+        assert "- Pad width = X1 = ?mm" in prompt
+
+    def test_braces_and_quotes_in_stage1_values_render_verbatim(self):
+        """Test that model-provided strings cannot break or inject template fields."""
+        prompt = get_stage2_prompt({
+            "package_type": 'SO"8 {package_type}',
+            "pad_arrangement": "peripheral",
+            "dimension_table": {"X{1}": 0.3, "{0}": 0.5},
+            "dimension_semantics": {"pad_width_label": "X{1}", "pitch_label": "{0}"},
+        })
+        assert '**Package Type:** SO"8 {package_type}' in prompt
+        assert "  - X{1} = 0.3mm" in prompt
+        assert "OUTPUT height = X{1} = 0.3mm" in prompt
+        assert "Pitch (spacing) = {0} = 0.5mm" in prompt
+
+    def test_context_is_memoized_for_identical_stage1_results(self, udfn_stage1_result):
+        """Test that an identical Stage 1 result reuses the rendered context."""
+        first = get_stage2_prompt_blocks(udfn_stage1_result)[1]["text"]
+        again = get_stage2_prompt_blocks(json.loads(json.dumps(udfn_stage1_result)))[1]["text"]
+        assert again is first
+
+    def test_unhashable_stage1_values_still_render(self, udfn_stage1_result):
+        """Test that a malformed table value bypasses the cache instead of failing."""
+        udfn_stage1_result["dimension_table"]["X1"] = [0.25, 0.3]
+        assert "  - X1 = [0.25, 0.3]mm" in get_stage2_prompt(udfn_stage1_result)
+
+    def test_schema_is_json_serializable(self):
+        """Test that the Stage 2 schema round-trips through JSON."""
+        assert json.loads(json.dumps(STAGE2_SCHEMA)) == STAGE2_SCHEMA
+
+    def test_prompt_blocks_split_static_prefix_from_context(self, udfn_stage1_result):
+        """Test that the static prefix comes first, Stage 1 context follows it and neither is cached."""
+        static, context = get_stage2_prompt_blocks(udfn_stage1_result)
+        assert "cache_control" not in static
+        assert "cache_control" not in context
+        assert static["text"] + context["text"] == get_stage2_prompt(udfn_stage1_result)
+        assert STAGE2_TOOL["name"] in static["text"]
+        assert "## Stage 1 Analysis" not in static["text"]
+
+    def test_static_prefix_is_shared_across_requests(self, udfn_stage1_result):
+        """Test that different Stage 1 results in one thermal regime share the cached prefix."""
+        other = get_stage2_prompt_blocks(
+            {"package_type": "QFN", "has_thermal_pad": True, "has_thermal_vias": True}
+        )[0]
+        assert other == get_stage2_prompt_blocks(udfn_stage1_result)[0]
+
+
+# =============================================================================
+# Stage 2 Variant Tests
+# =============================================================================
+
+class TestStage2Variants:
+    """Tests for the thermal-regime Stage 2 variants."""
+
+    def test_thermal_vias_variant_is_full_schema(self, udfn_stage1_result):
+        """Test that packages with thermal vias get the unpruned tool and prompt."""
+        variant = get_stage2_variant(udfn_stage1_result)
+        assert variant.tool is STAGE2_TOOL
+        assert "Vias form a grid" in variant.prompt_static
+
+    def test_no_thermal_variant_prunes_vias(self):
+        """Test that packages without a thermal pad drop vias from schema and prompt."""
+        variant = get_stage2_variant({"package_type": "SOIC"})
+        schema = variant.tool["input_schema"]
+        assert "vias" not in schema["properties"]
+        assert "vias" not in schema["required"]
+        assert "EP" not in schema["properties"]["pads"]["items"]["properties"]["designator"]["description"]
+        assert "Vias form a grid" not in variant.prompt_static
+        assert variant.tool["name"] == STAGE2_TOOL_CHOICE["name"]
+
+    def test_thermal_pad_without_vias_keeps_thermal_pad(self):
+        """Test that the thermal-pad-only variant mentions the pad but not vias."""
+        variant = get_stage2_variant({"has_thermal_pad": True, "has_thermal_vias": False})
+        assert "thermal pad" in variant.prompt_static
+        assert "vias" not in variant.tool["input_schema"]["properties"]
+
+    def test_vias_imply_thermal_variant(self, udfn_stage1_result):
+        """Test that vias reported without a thermal pad still get the via schema."""
+        variant = get_stage2_variant({"has_thermal_pad": False, "has_thermal_vias": True})
+        assert variant is get_stage2_variant(udfn_stage1_result)
+
+    def test_pruned_validator_accepts_response_without_vias(self):
+        """Test that a no-thermal response without vias validates for its variant."""
+        response = {"footprint_name": "SOIC-8", "pads": [], "outline": {},
+                    "pin1_location": {}, "overall_confidence": 0.9}
+        get_stage2_variant({"package_type": "SOIC"}).validate(response)
+        with pytest.raises(fastjsonschema.JsonSchemaException):
+            validate_stage2(response)
+
+
+# =============================================================================
+# Validator Tests
+# =============================================================================
+
+class TestStageValidators:
+    """Tests for the compiled Stage 1 / Stage 2 validators."""
+
+    def test_stage1_accepts_valid_analysis(self, udfn_stage1_result):
+        """Test that a complete Stage 1 analysis validates."""
+        validate_stage1(udfn_stage1_result)
+
+    def test_stage1_rejects_non_numeric_table_value(self, udfn_stage1_result):
+        """Test that dimension table values must be numbers."""
+        udfn_stage1_result["dimension_table"]["X1"] = "0.30mm"
+        with pytest.raises(fastjsonschema.JsonSchemaException):
+            validate_stage1(udfn_stage1_result)
+
+    def test_stage2_rejects_missing_pads(self):
+        """Test that Stage 2 output without pads is rejected."""
+        with pytest.raises(fastjsonschema.JsonSchemaException):
+            validate_stage2({"footprint_name": "X", "vias": [], "outline": {},
+                             "pin1_location": {}, "overall_confidence": 0.5})
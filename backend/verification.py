@@ -11,16 +11,26 @@ The verification pass sends the extraction results back to the model
 along with the original image and asks it to verify specific values.
 """
 
-import base64
 import json
 from dataclasses import dataclass
 from typing import Optional
 
 import anthropic
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from image_preprocessing import image_content_block
 from models import ExtractionResult, Pad
 
 
+# JSON parser for model responses; orjson's C parser is several times faster
+# on float-heavy payloads, and its JSONDecodeError subclasses json's
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
 # =============================================================================
 # Verification Prompts
 # =============================================================================
@@ -176,6 +186,22 @@ def detect_suspicious_values(extraction_result: ExtractionResult) -> dict:
     return suspicious
 
 
+def should_verify(extraction_result: ExtractionResult) -> bool:
+    """
+    Decide whether an extraction warrants the paid verification pass.
+
+    Shared gate for every caller, so a clean extraction is accepted before
+    any API client is created.
+
+    Args:
+        extraction_result: The extraction to check
+
+    Returns:
+        True if detect_suspicious_values found something to verify
+    """
+    return detect_suspicious_values(extraction_result)["needs_verification"]
+
+
 def verify_extraction(
     extraction_result: ExtractionResult,
     image_bytes: bytes,
@@ -234,9 +260,6 @@ def verify_extraction(
         thermal_status=thermal_status
     )
 
-    # Encode image
-    image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-
     try:
         response = client.messages.create(
             model=model,
@@ -245,14 +268,7 @@ def verify_extraction(
                 {
                     "role": "user",
                     "content": [
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": media_type,
-                                "data": image_base64,
-                            },
-                        },
+                        image_content_block(image_bytes, media_type),
                         {
                             "type": "text",
                             "text": prompt,
@@ -365,7 +381,7 @@ def _parse_json(text: str) -> Optional[dict]:
     text = text.strip()
 
     try:
-        return json.loads(text)
+        return _json_loads(text)
     except json.JSONDecodeError:
         pass
 
@@ -375,7 +391,7 @@ def _parse_json(text: str) -> Optional[dict]:
         end = text.find("```", start)
         if end > start:
             try:
-                return json.loads(text[start:end].strip())
+                return _json_loads(text[start:end].strip())
             except json.JSONDecodeError:
                 pass
 
@@ -387,7 +403,7 @@ def _parse_json(text: str) -> Optional[dict]:
         end = text.find("```", start)
         if end > start:
             try:
-                return json.loads(text[start:end].strip())
+                return _json_loads(text[start:end].strip())
             except json.JSONDecodeError:
                 pass
 